@@ -12,11 +12,14 @@ from __future__ import print_function
 
 import sys
 import os
+import hashlib
 import logging
 import re
+from concurrent.futures import ProcessPoolExecutor
 # CCPP framework imports
 from ccpp_database_obj import CCPPDatabaseObj
-from ccpp_datafile import generate_ccpp_datatable
+from ccpp_datafile import generate_ccpp_datatable, retrieve_capgen_inputs
+from ccpp_datafile import update_capgen_inputs, retrieve_generated_file_hashes
 from ccpp_suite import API
 from file_utils import check_for_writeable_file, remove_dir, replace_paths
 from file_utils import create_file_list, move_modified_files
@@ -26,9 +29,14 @@ from framework_env import parse_command_line
 from host_cap import write_host_cap
 from host_model import HostModel
 from metadata_table import parse_metadata_file, register_ddts, SCHEME_HEADER_TYPE
+from metadata_table import find_ddt_names, find_scheme_names
 from parse_tools import init_log, set_log_level, context_string
-from parse_tools import register_fortran_ddt_name
+from parse_tools import register_fortran_ddt_name, registered_fortran_ddt_names
+from parse_tools import reset_fortran_ddt_names
 from parse_tools import CCPPError, ParseInternalError
+from parse_tools import ParseCache, file_hash, framework_version
+from parse_tools import dumps_parse_data, loads_parse_data
+from var_props import VarCompatObj
 
 ## Capture the Framework root
 _SCRIPT_PATH = os.path.dirname(__file__)
@@ -126,8 +134,8 @@ def create_kinds_file(run_env, output_dir):
         run_env.logger.info(msg.format(KINDS_FILENAME, output_dir))
     # end if
     kind_types = run_env.kind_types()
-    with FortranWriter(kinds_filepath, "w",
-                       "kinds for CCPP", KINDS_MODULE) as kindf:
+    with FortranWriter(kinds_filepath, "w", "kinds for CCPP", KINDS_MODULE,
+                       buffered=True) as kindf:
         for kind_type in kind_types:
             use_stmt = "use ISO_FORTRAN_ENV, only: {} => {}"
             kindf.write(use_stmt.format(kind_type,
@@ -467,6 +475,189 @@ def duplicate_item_error(title, filename, itype, orig_item):
     # end if
     raise CCPPError(errmsg.format(**edict))
 
+###############################################################################
+def _register_table_ddts(mtables):
+###############################################################################
+    """Register the DDTs defined or used by the metadata tables, <mtables>,
+    as happens when the tables are parsed."""
+    for table in mtables:
+        for header in table.sections():
+            if header.header_type == 'ddt':
+                register_fortran_ddt_name(header.title)
+            # end if
+            for var in header.variable_list():
+                if var.is_ddt():
+                    register_fortran_ddt_name(var.get_prop_value('type'))
+                # end if
+            # end for
+        # end for
+    # end for
+
+###############################################################################
+def _parse_cache_key(parse_cache, filename, known_ddts, run_env,
+                     skip_ddt_check):
+###############################################################################
+    """Return the key for the parse of <filename> in <parse_cache>.
+    The key includes the contents of <filename> and its associated Fortran
+    file along with the parse options and <known_ddts>.
+    Registered DDT names are not part of the key, they are checked when an
+    entry is loaded.
+    Return None if the key cannot be created (e.g., a missing file), the
+    parse will report the error."""
+    try:
+        fort_file = find_associated_fortran_file(filename)
+        return parse_cache.key(os.path.abspath(filename), file_hash(filename),
+                               os.path.abspath(fort_file), file_hash(fort_file),
+                               sorted(run_env.preproc_defs.items()),
+                               sorted(set(known_ddts)), skip_ddt_check)
+    except (CCPPError, OSError):
+        return None
+    # end try
+
+###############################################################################
+def _parse_metadata_fortran_pair(filename, known_ddts, run_env,
+                                 skip_ddt_check=False):
+###############################################################################
+    """Parse the metadata file, <filename>, and its associated Fortran file
+    and check the Fortran against the metadata (an exception is raised
+    on error).
+    Return the list of metadata tables found in <filename>."""
+    profiler = run_env.profiler
+    with profiler.phase('parse_metadata'):
+        mtables = parse_metadata_file(filename, known_ddts, run_env,
+                                      skip_ddt_check=skip_ddt_check)
+    # end with
+    fort_file = find_associated_fortran_file(filename)
+    with profiler.phase('parse_fortran'):
+        ftables, additional_routines = parse_fortran_file(fort_file, run_env)
+    # end with
+    # Check Fortran against metadata (will raise an exception on error)
+    mheaders = list()
+    for sect in [x.sections() for x in mtables]:
+        mheaders.extend(sect)
+    # end for
+    fheaders = list()
+    for sect in [x.sections() for x in ftables]:
+        fheaders.extend(sect)
+    # end for
+    with profiler.phase('check_fortran_against_metadata'):
+        check_fortran_against_metadata(mheaders, fheaders,
+                                       filename, fort_file, run_env.logger,
+                                       fortran_routines=additional_routines)
+    # end with
+    return mtables
+
+###############################################################################
+def parse_metadata_fortran_pair(filename, known_ddts, run_env,
+                                skip_ddt_check=False):
+###############################################################################
+    """Parse the metadata file, <filename>, and its associated Fortran file
+    and check the Fortran against the metadata (an exception is raised
+    on error).
+    If run_env.parse_cache_dir is set, a successful result is stored in
+    the parse cache and later parses of unchanged files load the result
+    from the cache.
+    Return the list of metadata tables found in <filename>."""
+    if not run_env.parse_cache_dir:
+        return _parse_metadata_fortran_pair(filename, known_ddts, run_env,
+                                            skip_ddt_check=skip_ddt_check)
+    # end if
+    parse_cache = ParseCache(run_env.parse_cache_dir, run_env)
+    cache_key = _parse_cache_key(parse_cache, filename, known_ddts, run_env,
+                                 skip_ddt_check)
+    # Registering more DDTs cannot change a successful parse so a cache
+    # entry is valid if the DDTs registered when it was stored still are.
+    curr_registered = set(registered_fortran_ddt_names())
+    if cache_key is not None:
+        with run_env.profiler.phase('parse_cache_load'):
+            entry = parse_cache.load(cache_key)
+        # end with
+        if (entry is not None) and (entry[0] <= curr_registered):
+            mtables = entry[1]
+            run_env.logger.debug("Using cached parse of {}".format(filename))
+            # Reproduce the side effects of parsing <filename>
+            _register_table_ddts(mtables)
+            for table in mtables:
+                if table.table_type == 'ddt':
+                    known_ddts.append(table.table_name)
+                # end if
+            # end for
+            return mtables
+        # end if
+    # end if
+    mtables = _parse_metadata_fortran_pair(filename, known_ddts, run_env,
+                                           skip_ddt_check=skip_ddt_check)
+    if cache_key is not None:
+        parse_cache.store(cache_key, (curr_registered, mtables))
+    # end if
+    return mtables
+
+###############################################################################
+def _parse_worker(filename, known_ddts, registered_ddts, run_env,
+                  skip_ddt_check):
+###############################################################################
+    """Parse a metadata / Fortran file pair in a worker process.
+    Worker processes are reused for several files so the registered DDTs
+    are reset to <registered_ddts>, the DDTs registered at this point of
+    a serial parse.
+    The metadata tables are returned pickled so that the parent process
+    can attach them to its own run environment."""
+    reset_fortran_ddt_names(registered_ddts)
+    try:
+        mtables = parse_metadata_fortran_pair(filename, known_ddts, run_env,
+                                              skip_ddt_check=skip_ddt_check)
+    except CCPPError as cperr:
+        # Not all CCPPError types can be unpickled, pass on the message
+        raise CCPPError(str(cperr)) from None
+    # end try
+    return dumps_parse_data(mtables, run_env)
+
+###############################################################################
+def parse_metadata_fortran_pairs(filenames, known_ddts, run_env, file_desc,
+                                 skip_ddt_check=False):
+###############################################################################
+    """Parse each metadata file in <filenames> along with its associated
+    Fortran file and yield a (filename, metadata tables) tuple for each file,
+    in the order of <filenames>.
+    If run_env.jobs is greater than one, the files are parsed by a pool
+    of worker processes. Each worker is given the DDTs which would be in
+    <known_ddts> at that point in a serial parse so that the results
+    (and any errors) are the same as for a serial parse.
+    <file_desc> describes the file contents for logging.
+    """
+    logger = run_env.logger
+    if (run_env.jobs > 1) and (len(filenames) > 1):
+        worker_ddts = list()
+        registered_ddts = list()
+        file_ddts = list(known_ddts)
+        for filename in filenames:
+            worker_ddts.append(list(file_ddts))
+            registered_ddts.append(registered_fortran_ddt_names() + file_ddts)
+            file_ddts.extend(find_ddt_names(filename))
+        # end for
+        num_files = len(filenames)
+        with ProcessPoolExecutor(max_workers=min(run_env.jobs,
+                                                 num_files)) as pool:
+            results = pool.map(_parse_worker, filenames, worker_ddts,
+                               registered_ddts, [run_env]*num_files,
+                               [skip_ddt_check]*num_files)
+            for filename, mdata in zip(filenames, results):
+                logger.info('Reading {} from {}'.format(file_desc, filename))
+                mtables = loads_parse_data(mdata, run_env)
+                # Register DDTs found by the worker in this process
+                _register_table_ddts(mtables)
+                yield filename, mtables
+            # end for
+        # end with
+    else:
+        for filename in filenames:
+            logger.info('Reading {} from {}'.format(file_desc, filename))
+            yield filename, parse_metadata_fortran_pair(filename, known_ddts,
+                                                        run_env,
+                                                        skip_ddt_check=skip_ddt_check)
+        # end for
+    # end if
+
 ###############################################################################
 def parse_host_model_files(host_filenames, host_name, run_env,
                            known_ddts=list()):
@@ -477,24 +668,13 @@ def parse_host_model_files(host_filenames, host_name, run_env,
     """
     header_dict = {}
     table_dict = {}
-    logger = run_env.logger
-    for filename in host_filenames:
-        logger.info('Reading host model data from {}'.format(filename))
-        # parse metadata file
-        mtables = parse_metadata_file(filename, known_ddts, run_env)
-        fort_file = find_associated_fortran_file(filename)
-        ftables, _ = parse_fortran_file(fort_file, run_env)
-        # Check Fortran against metadata (will raise an exception on error)
+    for filename, mtables in parse_metadata_fortran_pairs(host_filenames,
+                                                          known_ddts, run_env,
+                                                          'host model data'):
         mheaders = list()
         for sect in [x.sections() for x in mtables]:
             mheaders.extend(sect)
         # end for
-        fheaders = list()
-        for sect in [x.sections() for x in ftables]:
-            fheaders.extend(sect)
-        # end for
-        check_fortran_against_metadata(mheaders, fheaders,
-                                       filename, fort_file, logger)
         # Check for duplicate tables, then add to dict
         for table in mtables:
             if table.table_name in table_dict:
@@ -533,26 +713,14 @@ def parse_scheme_files(scheme_filenames, run_env, skip_ddt_check=False,
     """
     table_dict = {} # Duplicate check and for dependencies processing
     header_dict = {} # To check for duplicates
-    logger = run_env.logger
-    for filename in scheme_filenames:
-        logger.info('Reading CCPP schemes from {}'.format(filename))
-        # parse metadata file
-        mtables = parse_metadata_file(filename, known_ddts, run_env,
-                                      skip_ddt_check=skip_ddt_check)
-        fort_file = find_associated_fortran_file(filename)
-        ftables, additional_routines = parse_fortran_file(fort_file, run_env)
-        # Check Fortran against metadata (will raise an exception on error)
+    for filename, mtables in parse_metadata_fortran_pairs(scheme_filenames,
+                                                          known_ddts, run_env,
+                                                          'CCPP schemes',
+                                                          skip_ddt_check=skip_ddt_check):
         mheaders = list()
         for sect in [x.sections() for x in mtables]:
             mheaders.extend(sect)
         # end for
-        fheaders = list()
-        for sect in [x.sections() for x in ftables]:
-            fheaders.extend(sect)
-        # end for
-        check_fortran_against_metadata(mheaders, fheaders,
-                                       filename, fort_file, logger,
-                                       fortran_routines=additional_routines)
         # Check for duplicate tables, then add to dict
         for table in mtables:
             if table.table_name in table_dict:
@@ -578,6 +746,121 @@ def parse_scheme_files(scheme_filenames, run_env, skip_ddt_check=False,
 
     return header_dict.values(), table_dict
 
+###############################################################################
+def _capgen_signature(run_env, host_files, scheme_files, sdfs):
+###############################################################################
+    """Return a hash of everything, other than the contents of the input
+    files, which affects the files generated by capgen."""
+    kinds = sorted((x, run_env.kind_spec(x)) for x in run_env.kind_types())
+    items = (framework_version(), host_files, scheme_files, sdfs,
+             sorted(run_env.preproc_defs.items()), kinds, run_env.host_name,
+             run_env.use_error_obj, run_env.debug, run_env.generate_docfiles,
+             run_env.output_dir, run_env.debug_check_interval,
+             run_env.persistent_work_arrays, run_env.threaded_run,
+             run_env.instrument)
+    return hashlib.sha256(repr(items).encode('utf-8')).hexdigest()
+
+###############################################################################
+def _capgen_input_files(host_files, scheme_files, sdfs):
+###############################################################################
+    """Return a list of input file entries for <host_files>, <scheme_files>,
+    and <sdfs> to be recorded in the datatable. Each metadata file entry is
+    followed by an entry for its associated Fortran file."""
+    input_files = list()
+    found_files = set()
+    for ftype, mfiles in [('host', host_files), ('scheme', scheme_files)]:
+        for mfile in mfiles:
+            if mfile in found_files:
+                continue
+            # end if
+            found_files.add(mfile)
+            if ftype == 'scheme':
+                schemes = find_scheme_names(mfile)
+            else:
+                schemes = []
+            # end if
+            ddts = find_ddt_names(mfile)
+            for filename in [mfile, find_associated_fortran_file(mfile)]:
+                input_files.append({'filename' : filename, 'type' : ftype,
+                                    'hash' : file_hash(filename),
+                                    'schemes' : schemes, 'ddts' : ddts})
+            # end for
+        # end for
+    # end for
+    for sdf in sdfs:
+        input_files.append({'filename' : sdf, 'type' : 'suite',
+                            'hash' : file_hash(sdf),
+                            'schemes' : [], 'ddts' : []})
+    # end for
+    return input_files
+
+###############################################################################
+def _find_modified_suites(run_env, signature, input_files, sdfs):
+###############################################################################
+    """Compare <signature> and <input_files> to the information recorded
+    in the datatable by the previous capgen run and return a tuple with
+    the list of SDFs from <sdfs> whose suite caps must be regenerated,
+    a flag which is True if any input file has changed, and the input file
+    entries recorded by the previous run.
+    The list is None if all files must be regenerated (e.g., there is no
+    usable datatable or a host model file or DDT definition has changed)."""
+    logger = run_env.logger
+    if not os.path.exists(run_env.datatable_file):
+        return None, True, {}
+    # end if
+    try:
+        prev_signature, prev_files, suite_schemes, prev_outputs =           \
+            retrieve_capgen_inputs(run_env.datatable_file)
+    except (CCPPError, ValueError) as err:
+        logger.info("Cannot use previous datatable, {}".format(err))
+        return None, True, {}
+    # end try
+    if prev_signature != signature:
+        logger.info("Regenerating all files, capgen inputs or options changed")
+        return None, True, prev_files
+    # end if
+    missing = [x for x in prev_outputs if not os.path.exists(x)]
+    if missing:
+        logger.info("Regenerating all files, {} not found".format(missing[0]))
+        return None, True, prev_files
+    # end if
+    modified_sdfs = set()
+    inputs_changed = False
+    for ifile in input_files:
+        prev_file = prev_files.get(ifile['filename'])
+        if (prev_file is not None) and (prev_file['hash'] == ifile['hash']):
+            continue
+        # end if
+        inputs_changed = True
+        if (prev_file is None) or (ifile['type'] != prev_file['type']):
+            return None, True, prev_files
+        # end if
+        if ifile['type'] == 'suite':
+            modified_sdfs.add(ifile['filename'])
+        elif (ifile['type'] == 'host') or ifile['ddts'] or prev_file['ddts']:
+            # Host model data and DDTs may be used by any suite
+            logger.info("Regenerating all files, {} modified".format(ifile['filename']))
+            return None, True, prev_files
+        else:
+            schemes = {x.lower() for x in ifile['schemes'] + prev_file['schemes']}
+            for sdf in sdfs:
+                if suite_schemes.get(sdf, set()) & schemes:
+                    modified_sdfs.add(sdf)
+                # end if
+            # end for
+        # end if
+    # end for
+    return [x for x in sdfs if x in modified_sdfs], inputs_changed, prev_files
+
+###############################################################################
+def _suite_cache_key(suite_cache, signature, input_files):
+###############################################################################
+    """Return the key for the analyzed suites of a capgen run with
+    <signature> and <input_files> (input file entries) in <suite_cache>."""
+    return suite_cache.key('analyzed_suites', signature,
+                           sorted((x['filename'], x['hash'])
+                                  for x in input_files))
+
 ###############################################################################
 def clean_capgen(cap_output_file, logger):
 ###############################################################################
@@ -593,6 +876,23 @@ def clean_capgen(cap_output_file, logger):
     # end if
     set_log_level(logger, log_level)
 
+###############################################################################
+def _recorded_file_hashes(run_env):
+###############################################################################
+    """Return the (size, mtime_ns, hash) of each generated file recorded in
+    the datatable written by a previous run (keyed by absolute pathname).
+    Return an empty dictionary if there is no usable datatable."""
+    if not os.path.isfile(run_env.datatable_file):
+        return {}
+    # end if
+    try:
+        return retrieve_generated_file_hashes(run_env.datatable_file)
+    except (CCPPError, ValueError) as err:
+        lmsg = "Ignoring file hashes in {}: {}"
+        run_env.logger.debug(lmsg.format(run_env.datatable_file, err))
+        return {}
+    # end try
+
 ###############################################################################
 def capgen(run_env, return_db=False):
 ###############################################################################
@@ -618,30 +918,95 @@ def capgen(run_env, return_db=False):
         register_fortran_ddt_name(ddt_name)
     # end for
     src_dir = os.path.join(_FRAMEWORK_ROOT, "src")
+    profiler = run_env.profiler
     host_files = run_env.host_files
     host_name = run_env.host_name
     scheme_files = run_env.scheme_files
     # We need to create three lists of files, hosts, schemes, and SDFs
-    host_files = create_file_list(run_env.host_files, ['meta'], 'Host',
-                                  run_env.logger)
-    # The host model needs to know about the constituents module
-    const_mod = os.path.join(_SRC_ROOT, "ccpp_constituent_prop_mod.meta")
-    if const_mod not in host_files:
-        host_files.append(const_mod)
-    # end if
-    scheme_files = create_file_list(run_env.scheme_files, ['meta'],
-                                    'Scheme', run_env.logger)
-    sdfs = create_file_list(run_env.suites, ['xml'], 'Suite', run_env.logger)
+    with profiler.phase('create_file_lists'):
+        host_files = create_file_list(run_env.host_files, ['meta'], 'Host',
+                                      run_env.logger)
+        # The host model needs to know about the constituents module
+        const_mod = os.path.join(_SRC_ROOT, "ccpp_constituent_prop_mod.meta")
+        if const_mod not in host_files:
+            host_files.append(const_mod)
+        # end if
+        scheme_files = create_file_list(run_env.scheme_files, ['meta'],
+                                        'Scheme', run_env.logger)
+        sdfs = create_file_list(run_env.suites, ['xml'], 'Suite',
+                                run_env.logger)
+    # end with
     check_for_writeable_file(run_env.datatable_file, "Cap output datatable")
     ##XXgoldyXX: Temporary warning
     if run_env.generate_docfiles:
         raise CCPPError("--generate-docfiles not yet supported")
     # end if
+    # In incremental mode, find the suites whose inputs have changed.
+    # Only those suites are analyzed and have their caps rewritten, the
+    #    other suites (which the host cap and the datatable also need)
+    #    are loaded from the analysis stored by the previous run.
+    keep_suites = None
+    analyzed_suites = None
+    signature = None
+    input_files = None
+    suite_cache = None
+    prev_key = None
+    if run_env.incremental:
+        suite_cache = ParseCache(run_env.suite_cache_dir, run_env)
+        with profiler.phase('find_modified_suites'):
+            signature = _capgen_signature(run_env, host_files,
+                                          scheme_files, sdfs)
+            input_files = _capgen_input_files(host_files, scheme_files, sdfs)
+            modified_sdfs, inputs_changed, prev_files =                       \
+                _find_modified_suites(run_env, signature, input_files, sdfs)
+        # end with
+        if modified_sdfs is not None:
+            prev_key = _suite_cache_key(suite_cache, signature,
+                                        prev_files.values())
+            if inputs_changed or return_db:
+                with profiler.phase('suite_cache_load'):
+                    analyzed_suites = suite_cache.load(prev_key)
+                # end with
+            # end if
+            if (not modified_sdfs) and (not return_db):
+                if inputs_changed:
+                    # Record the new hashes of input files not used by
+                    #    any suite so they are not found modified again
+                    update_capgen_inputs(run_env.datatable_file, signature,
+                                         input_files)
+                    if analyzed_suites is not None:
+                        suite_cache.store(_suite_cache_key(suite_cache,
+                                                           signature,
+                                                           input_files),
+                                          analyzed_suites)
+                        suite_cache.remove(prev_key)
+                    # end if
+                # end if
+                run_env.logger.info("All CCPP files are up to date")
+                if run_env.profile:
+                    profiler.write_report(run_env.profile_file)
+                    profiler.stop()
+                # end if
+                return None
+            # end if
+            keep_suites = [x for x in sdfs if x not in modified_sdfs]
+            if analyzed_suites is not None:
+                analyzed_suites = {x : analyzed_suites[x] for x in keep_suites
+                                   if x in analyzed_suites}
+                lmsg = "Regenerating CCPP suite caps for {}"
+            else:
+                lmsg = "Regenerating CCPP suite caps for {} (analyzing all suites)"
+            # end if
+            run_env.logger.info(lmsg.format(', '.join(modified_sdfs)))
+        # end if
+    # end if
     # The host model may depend on suite DDTs
     scheme_ddts = register_ddts(scheme_files)
     # Handle the host files
-    host_model = parse_host_model_files(host_files, host_name, run_env,
-                                        known_ddts=scheme_ddts)
+    with profiler.phase('parse_host_model_files'):
+        host_model = parse_host_model_files(host_files, host_name, run_env,
+                                            known_ddts=scheme_ddts)
+    # end with
     # Next, parse the scheme files
     # We always need to parse the constituent DDTs
     const_prop_mod = os.path.join(src_dir, "ccpp_constituent_prop_mod.meta")
@@ -649,8 +1014,11 @@ def capgen(run_env, return_db=False):
         scheme_files = [const_prop_mod] + scheme_files
     # end if
     host_ddts = register_ddts(host_files)
-    scheme_headers, scheme_tdict = parse_scheme_files(scheme_files, run_env,
-                                                      known_ddts=host_ddts)
+    with profiler.phase('parse_scheme_files'):
+        scheme_headers, scheme_tdict = parse_scheme_files(scheme_files,
+                                                          run_env,
+                                                          known_ddts=host_ddts)
+    # end with
     if run_env.verbose:
         ddts = host_model.ddt_lib.keys()
         if ddts:
@@ -681,21 +1049,66 @@ def capgen(run_env, return_db=False):
         # end if
         os.makedirs(outtemp_dir)
     # end if
-    ccpp_api = API(sdfs, host_model, scheme_headers, run_env)
-    cap_filenames = ccpp_api.write(outtemp_dir, run_env)
+    with profiler.phase('api_analyze'):
+        ccpp_api = API(sdfs, host_model, scheme_headers, run_env,
+                       analyzed_suites=analyzed_suites)
+    # end with
+    if suite_cache is not None:
+        # Store the analyzed suites for the next incremental run, they
+        #    replace the analysis stored by the previous run
+        with profiler.phase('suite_cache_store'):
+            new_key = _suite_cache_key(suite_cache, signature, input_files)
+            suite_cache.store(new_key,
+                              {x.sdf_name : x for x in ccpp_api.suites})
+            if prev_key and (prev_key != new_key):
+                suite_cache.remove(prev_key)
+            # end if
+        # end with
+    # end if
+    if run_env.verbose:
+        cstats = VarCompatObj.cache_statistics()
+        run_env.logger.debug(("Variable compatibility cache: {hits} hits, " +
+                              "{misses} misses, {entries} entries").format(**cstats))
+    # end if
+    with profiler.phase('api_write'):
+        cap_filenames = ccpp_api.write(outtemp_dir, run_env,
+                                       keep_suites=keep_suites,
+                                       keep_dir=run_env.output_dir)
+    # end with
     if run_env.generate_host_cap:
         # Create a cap file
         cap_module = host_model.ccpp_cap_name()
-        host_files = [write_host_cap(host_model, ccpp_api, cap_module,
-                                     outtemp_dir, run_env)]
+        with profiler.phase('write_host_cap'):
+            host_files = [write_host_cap(host_model, ccpp_api, cap_module,
+                                         outtemp_dir, run_env)]
+        # end with
     else:
         host_files = list()
     # end if
     # Create the kinds file
     kinds_file = create_kinds_file(run_env, outtemp_dir)
     # Move any changed files to output_dir and remove outtemp_dir
-    move_modified_files(outtemp_dir, run_env.output_dir,
-                        overwrite=run_env.force_overwrite, remove_src=True)
+    with profiler.phase('move_modified_files'):
+        src_hashes = FortranWriter.content_hashes()
+        dest_hashes = _recorded_file_hashes(run_env)
+        file_hashes = move_modified_files(outtemp_dir, run_env.output_dir,
+                                          overwrite=run_env.force_overwrite,
+                                          remove_src=True,
+                                          src_hashes=src_hashes,
+                                          dest_hashes=dest_hashes)
+        # Suite caps which were kept as is keep their recorded hashes
+        for cap_file in cap_filenames:
+            cap_path = os.path.abspath(cap_file)
+            if (cap_path in file_hashes) or (cap_path not in dest_hashes):
+                continue
+            # end if
+            fstat = os.stat(cap_path)
+            if dest_hashes[cap_path][0:2] == (fstat.st_size,
+                                              fstat.st_mtime_ns):
+                file_hashes[cap_path] = dest_hashes[cap_path]
+            # end if
+        # end for
+    # end with
     # We have to rename the files we created
     if outtemp_dir != run_env.output_dir:
         replace_paths(cap_filenames, outtemp_dir, run_env.output_dir)
@@ -704,9 +1117,17 @@ def capgen(run_env, return_db=False):
     # end if
     # Finally, create the database of generated files and caps
     # This can be directly in output_dir because it will not affect dependencies
-    generate_ccpp_datatable(run_env, host_model, ccpp_api,
-                            scheme_headers, scheme_tdict, host_files,
-                            cap_filenames, kinds_file, src_dir)
+    with profiler.phase('generate_ccpp_datatable'):
+        generate_ccpp_datatable(run_env, host_model, ccpp_api,
+                                scheme_headers, scheme_tdict, host_files,
+                                cap_filenames, kinds_file, src_dir,
+                                signature=signature, input_files=input_files,
+                                file_hashes=file_hashes)
+    # end with
+    if run_env.profile:
+        profiler.write_report(run_env.profile_file)
+        profiler.stop()
+    # end if
     if return_db:
         return CCPPDatabaseObj(run_env, host_model=host_model, api=ccpp_api)
     # end if
@@ -509,6 +509,66 @@ def _retrieve_suite_group_names(table, suite_name):
     # end if
     return result
 
+###############################################################################
+def _retrieve_suite_schemes(table):
+###############################################################################
+    """Find and return a dictionary of the scheme names used by each suite
+    in <table>, keyed by the suite's SDF filename.
+    >>> table = ET.fromstring("<ccpp_datatable version='1.0'><api><suites>"\
+                "<suite name='umbrella' filename='umbrella.xml'>"\
+                "<group name='florence'><scheme name='rain' /></group>"\
+                "<group name='edna'><subcycle name='loop'>"\
+                "<scheme name='Wind' /></subcycle></group></suite>"\
+                "</suites></api></ccpp_datatable>")
+    >>> sorted(_retrieve_suite_schemes(table)['umbrella.xml'])
+    ['rain', 'wind']
+    >>> _retrieve_suite_schemes(ET.fromstring("<ccpp_datatable version='1.0'></ccpp_datatable>"))
+    {}
+    """
+    result = {}
+    api_elem = table.find("api")
+    if api_elem is not None:
+        suites_elem = api_elem.find("suites")
+        if suites_elem is not None:
+            for suite in suites_elem:
+                result[suite.get("filename")] = {x.get("name").lower()
+                                                 for x in suite.iter("scheme")}
+            # end for
+        # end if
+    # end if
+    return result
+
+###############################################################################
+def _retrieve_input_files(table):
+###############################################################################
+    """Find and return the capgen signature and the input file entries
+    recorded in <table> (see _add_input_files).
+    The input file entries are returned as a dictionary keyed by filename.
+    If <table> has no input file information, return None and an
+    empty dictionary.
+    >>> table = ET.fromstring("<ccpp_datatable version='1.0'>"\
+                "<input_files signature='abc'>"\
+                "<file type='scheme' hash='123' schemes='foo bar' ddts=''>"\
+                "/path/to/foo.meta</file></input_files></ccpp_datatable>")
+    >>> _retrieve_input_files(table)
+    ('abc', {'/path/to/foo.meta': {'filename': '/path/to/foo.meta', 'type': 'scheme', 'hash': '123', 'schemes': ['foo', 'bar'], 'ddts': []}})
+    >>> _retrieve_input_files(ET.fromstring("<ccpp_datatable version='1.0'></ccpp_datatable>"))
+    (None, {})
+    """
+    input_elem = table.find("input_files")
+    if input_elem is None:
+        return None, {}
+    # end if
+    input_files = {}
+    for entry in input_elem:
+        input_files[entry.text] = {'filename' : entry.text,
+                                   'type' : entry.get("type"),
+                                   'hash' : entry.get("hash"),
+                                   'schemes' : entry.get("schemes", "").split(),
+                                   'ddts' : entry.get("ddts", "").split()}
+    # end for
+    return input_elem.get("signature"), input_files
+
 ###############################################################################
 def _is_variable_protected(table, var_name, var_dict):
 ###############################################################################
@@ -732,6 +792,21 @@ def datatable_report(datatable, action, sep, exclude_protected=False):
     # end if
     return result
 
+###############################################################################
+def retrieve_capgen_inputs(datatable):
+###############################################################################
+    """Read the datatable, <datatable>, written by a previous capgen run
+    and return the information needed to decide what capgen must
+    regenerate as a tuple:
+    - The capgen signature (None if not recorded)
+    - A dictionary of input file entries keyed by filename
+    - A dictionary of the scheme names used by each suite keyed by SDF
+    - A list of the files generated or used by capgen"""
+    table = _read_datatable(datatable)
+    signature, input_files = _retrieve_input_files(table)
+    return (signature, input_files, _retrieve_suite_schemes(table),
+            _retrieve_ccpp_files(table))
+
 ###############################################################################
 def _indent_str(indent):
 ###############################################################################
@@ -1054,33 +1129,104 @@ def _add_dependencies(parent, scheme_depends, host_depends):
     # end for
 
 ###############################################################################
-def _add_generated_files(parent, host_files, suite_files, ccpp_kinds, src_dir):
+def _add_file_entry(section, file_hashes, filename):
+###############################################################################
+    """Add an entry for <filename> to <section>. If <filename> is in
+    <file_hashes>, also record its size, modification time, and hash."""
+    entry = ET.SubElement(section, "file")
+    entry.text = filename
+    if file_hashes and (os.path.abspath(filename) in file_hashes):
+        size, mtime_ns, fhash = file_hashes[os.path.abspath(filename)]
+        entry.set("size", str(size))
+        entry.set("mtime_ns", str(mtime_ns))
+        entry.set("hash", fhash)
+    # end if
+
+###############################################################################
+def _add_generated_files(parent, host_files, suite_files, ccpp_kinds, src_dir,
+                         file_hashes=None, instrument=False):
 ###############################################################################
     """Add a section to <parent> that lists all the files generated
     by <api> in sections for host cap, suite caps, ccpp_kinds, and source files.
     Also add existing utility files which are always needed by the framework.
+    <file_hashes> is an optional dictionary of (size, mtime_ns, hash) for
+    generated files (keyed by absolute pathname), the entries are recorded
+    so that a later run can compare against them without reading the files.
+    The scheme timing module is only listed if <instrument> is True
+    (the capgen --instrument option).
+    >>> parent = ET.fromstring("<ccpp_datatable version='1.0'></ccpp_datatable>")
+    >>> _add_generated_files(parent, ['/path/to/host_cap.F90'], [], '/path/to/ccpp_kinds.F90', '/src', file_hashes={'/path/to/host_cap.F90':(10, 12345, 'abc')})
+    >>> _retrieve_generated_file_hashes(parent)
+    {'/path/to/host_cap.F90': (10, 12345, 'abc')}
     """
     file_entry = ET.SubElement(parent, "ccpp_files")
     utilities = ET.SubElement(file_entry, "utilities")
-    entry = ET.SubElement(utilities, "file")
-    entry.text = ccpp_kinds
-    entry = ET.SubElement(utilities, "file")
-    entry.text = os.path.join(src_dir, "ccpp_constituent_prop_mod.F90")
-    entry = ET.SubElement(utilities, "file")
-    entry.text = os.path.join(src_dir, "ccpp_scheme_utils.F90")
-    entry = ET.SubElement(utilities, "file")
-    entry.text = os.path.join(src_dir, "ccpp_hashable.F90")
-    entry = ET.SubElement(utilities, "file")
-    entry.text = os.path.join(src_dir, "ccpp_hash_table.F90")
+    _add_file_entry(utilities, file_hashes, ccpp_kinds)
+    for ufile in ["ccpp_constituent_prop_mod.F90", "ccpp_scheme_utils.F90",
+                  "ccpp_hashable.F90", "ccpp_hash_table.F90"]:
+        _add_file_entry(utilities, file_hashes, os.path.join(src_dir, ufile))
+    # end for
+    if instrument:
+        _add_file_entry(utilities, file_hashes,
+                        os.path.join(src_dir, "ccpp_timing.F90"))
+    # end if
     host_elem = ET.SubElement(file_entry, "host_files")
     for hfile in host_files:
-        entry = ET.SubElement(host_elem, "file")
-        entry.text = hfile
+        _add_file_entry(host_elem, file_hashes, hfile)
     # end for
     suite_elem = ET.SubElement(file_entry, "suite_files")
     for sfile in suite_files:
-        entry = ET.SubElement(suite_elem, "file")
-        entry.text = sfile
+        _add_file_entry(suite_elem, file_hashes, sfile)
+    # end for
+
+###############################################################################
+def _retrieve_generated_file_hashes(table):
+###############################################################################
+    """Return a dictionary of the (size, mtime_ns, hash) recorded for
+    generated files in <table> (keyed by absolute pathname).
+    Files without a recorded hash are not included."""
+    file_hashes = {}
+    for section in _find_table_section(table, "ccpp_files"):
+        for entry in section:
+            if entry.get("hash"):
+                file_hashes[os.path.abspath(entry.text)] = (
+                    int(entry.get("size")), int(entry.get("mtime_ns")),
+                    entry.get("hash"))
+            # end if
+        # end for
+    # end for
+    return file_hashes
+
+###############################################################################
+def retrieve_generated_file_hashes(datatable):
+###############################################################################
+    """Read the datatable, <datatable>, written by a previous capgen run
+    and return a dictionary of the (size, mtime_ns, hash) recorded for
+    each generated file (keyed by absolute pathname)."""
+    return _retrieve_generated_file_hashes(_read_datatable(datatable))
+
+###############################################################################
+def _add_input_files(parent, signature, input_files):
+###############################################################################
+    """Add a section to <parent> that lists the capgen input files with
+    their content hashes along with the capgen <signature>.
+    <input_files> is a list of dictionaries with the keys, 'filename',
+    'type', 'hash', 'schemes', and 'ddts'.
+    This section is used by incremental capgen runs.
+    >>> parent = ET.fromstring("<ccpp_datafile></ccpp_datafile>")
+    >>> _add_input_files(parent, 'abc', [{'filename':'foo.meta', 'type':'scheme', 'hash':'123', 'schemes':['foo', 'bar'], 'ddts':[]}])
+    >>> _retrieve_input_files(parent)
+    ('abc', {'foo.meta': {'filename': 'foo.meta', 'type': 'scheme', 'hash': '123', 'schemes': ['foo', 'bar'], 'ddts': []}})
+    """
+    file_entry = ET.SubElement(parent, "input_files")
+    file_entry.set("signature", signature)
+    for ifile in input_files:
+        entry = ET.SubElement(file_entry, "file")
+        entry.set("type", ifile['type'])
+        entry.set("hash", ifile['hash'])
+        entry.set("schemes", ' '.join(ifile['schemes']))
+        entry.set("ddts", ' '.join(ifile['ddts']))
+        entry.text = ifile['filename']
     # end for
 
 ###############################################################################
@@ -1107,18 +1253,24 @@ def _add_suite_object(parent, suite_object):
 ###############################################################################
 def generate_ccpp_datatable(run_env, host_model, api, scheme_headers,
                             scheme_tdict, host_files, suite_files,
-                            ccpp_kinds, source_dir):
+                            ccpp_kinds, source_dir, signature=None,
+                            input_files=None, file_hashes=None):
 ###############################################################################
     """Write a CCPP datatable for <api> to <filename>.
     The datatable includes the generated filenames for the host cap,
     the suite caps, the ccpp_kinds module, and source code files.
+    If <input_files> is not None, the capgen input files and <signature>
+    are also recorded (see _add_input_files).
+    <file_hashes> is an optional dictionary of (size, mtime_ns, hash) for
+    the generated files (see _add_generated_files).
     """
     # Define new tree
     datatable = ET.Element("ccpp_datatable")
     datatable.set("version", "1.0")
     # Write out the generated files
     _add_generated_files(datatable, host_files, suite_files,
-                         ccpp_kinds, source_dir)
+                         ccpp_kinds, source_dir, file_hashes=file_hashes,
+                         instrument=run_env.instrument)
     # Write out scheme info
     schemes = ET.SubElement(datatable, "schemes")
     # Create a dictionary of the scheme headers for easy lookup
@@ -1181,10 +1333,27 @@ def generate_ccpp_datatable(run_env, host_model, api, scheme_headers,
         # end for
     # end for
     _add_dependencies(datatable, scheme_depends, host_depends)
+    if input_files is not None:
+        _add_input_files(datatable, signature, input_files)
+    # end if
     # Write tree
     datatable_tree = PrettyElementTree(datatable)
     datatable_tree.write(run_env.datatable_file)
 
+###############################################################################
+def update_capgen_inputs(datatable_file, signature, input_files):
+###############################################################################
+    """Replace the capgen input file section of the datatable in
+    <datatable_file> with <signature> and <input_files>
+    (see _add_input_files)."""
+    datatable = _read_datatable(datatable_file)
+    for input_elem in datatable.findall("input_files"):
+        datatable.remove(input_elem)
+    # end for
+    _add_input_files(datatable, signature, input_files)
+    datatable_tree = PrettyElementTree(datatable)
+    datatable_tree.write(datatable_file)
+
 ###############################################################################
 
 if __name__ == "__main__":
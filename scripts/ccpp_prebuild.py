@@ -3,6 +3,7 @@
 # Standard modules
 import argparse
 import collections
+from concurrent.futures import ProcessPoolExecutor
 import copy
 import filecmp
 import importlib
@@ -10,6 +11,7 @@ import itertools
 import logging
 import os
 import re
+import shutil
 import sys
 
 # CCPP framework imports
@@ -18,13 +20,17 @@ from common import CCPP_STAGES, CCPP_INTERNAL_VARIABLES, CCPP_STATIC_API_MODULE,
 from common import STANDARD_VARIABLE_TYPES, STANDARD_INTEGER_TYPE, CCPP_TYPE
 from common import SUITE_DEFINITION_FILENAME_PATTERN
 from common import split_var_name_and_array_reference
-from metadata_parser import merge_dictionaries, parse_scheme_tables, parse_variable_tables
+from metadata_parser import MetadataIndex, parse_scheme_tables, parse_variable_tables
+from metadata_parser import metadata_cache_dir, set_metadata_cache_dir
 from mkcap import CapsMakefile, CapsCMakefile, CapsSourcefile, \
                   SchemesMakefile, SchemesCMakefile, SchemesSourcefile, \
                   TypedefsMakefile, TypedefsCMakefile, TypedefsSourcefile
 from mkdoc import metadata_to_html, metadata_to_latex
 from mkstatic import API, Suite, Group
 from mkstatic import CCPP_SUITE_VARIABLES
+from metadata_table import find_ddt_names
+from parse_tools import CCPPError, registered_fortran_ddt_names, register_fortran_ddt_name
+from parse_tools import reset_fortran_ddt_names
 
 ###############################################################################
 # Set up the command line argument parser and other global variables          #
@@ -38,10 +44,18 @@ parser.add_argument('--debug',      action='store_true', help='enable debugging
 parser.add_argument('--suites',     action='store', help='suite definition files to use (comma-separated, without path)', default='')
 parser.add_argument('--builddir',   action='store', help='relative path to CCPP build directory', required=False, default=None)
 parser.add_argument('--namespace',  action='store', help='namespace suffix to be added to the name of static api module', required=False, default='')
+parser.add_argument('--jobs',       action='store', help='number of processes to use for parsing metadata tables', type=int, default=1)
+parser.add_argument('--use-parse-cache', action='store_true', help='cache parsed metadata files in the build directory for later runs', default=False)
+parser.add_argument('--persistent-block-buffers', action='store_true', help='share the contiguous arrays for blocked data ' + \
+                    'between init, timestep_init, timestep_finalize and finalize and keep them between calls (private to each thread); ' + \
+                    'blocked data with intent(out) are not copied in, schemes must set all elements of intent(out) variables', default=False)
 
 # BASEDIR is the current directory where this script is executed
 BASEDIR = os.getcwd()
 
+# Directory (in the build directory) for the cache of parsed metadata files
+PARSE_CACHE_DIRNAME = 'ccpp_parse_cache'
+
 ###############################################################################
 # Functions and subroutines                                                   #
 ###############################################################################
@@ -60,7 +74,14 @@ def parse_arguments():
         sdfs = None
     builddir = args.builddir
     namespace = args.namespace
-    return (success, configfile, clean, verbose, debug, sdfs, builddir, namespace)
+    jobs = args.jobs
+    if jobs < 1:
+        logging.error("Number of jobs must be a positive integer, not {0}".format(jobs))
+        success = False
+    use_parse_cache = args.use_parse_cache
+    persistent_block_buffers = args.persistent_block_buffers
+    return (success, configfile, clean, verbose, debug, sdfs, builddir, namespace, jobs, use_parse_cache,
+            persistent_block_buffers)
 
 def import_config(configfile, builddir):
     """Import the configuration from a given configuration file"""
@@ -86,6 +107,7 @@ def import_config(configfile, builddir):
         logging.info('Build directory not specified on command line, ' + \
                      'use "{}" from CCPP prebuild config'.format(ccpp_prebuild_config.DEFAULT_BUILD_DIR))
 
+    config['build_dir']                 = builddir
     # Definitions in host-model dependent CCPP prebuild config script
     config['variable_definition_files'] = ccpp_prebuild_config.VARIABLE_DEFINITION_FILES
     config['typedefs_makefile']         = ccpp_prebuild_config.TYPEDEFS_MAKEFILE.format(build_dir=builddir)
@@ -165,6 +187,15 @@ def clean_files(config, namespace):
         except Exception as e:
             logging.error(f"Error removing {f}: {e}")
             success = False
+    # Remove the cache of parsed metadata files
+    parse_cache_dir = os.path.join(config['build_dir'], PARSE_CACHE_DIRNAME)
+    try:
+        shutil.rmtree(parse_cache_dir)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.error(f"Error removing {parse_cache_dir}: {e}")
+        success = False
     return success
 
 def get_all_suites(suites_dir):
@@ -288,24 +319,69 @@ def convert_local_name_from_new_metadata(metadata, standard_name, typedefs_new_m
 
     return (success, local_name, converted_variables)
 
-def gather_variable_definitions(variable_definition_files, typedefs_new_metadata):
+def metadata_ddt_names(filename):
+    """Return the names of the DDTs defined in the metadata file
+    that belongs to Fortran file filename (if any)"""
+    metadata_filename = os.path.splitext(filename)[0] + '.meta'
+    if os.path.isfile(metadata_filename):
+        return find_ddt_names(metadata_filename)
+    return []
+
+def parse_tables_worker(parse_tables, filename, ddt_names):
+    """Parse the metadata tables of filename with parse_tables in a worker
+    process. The DDTs registered in the worker are reset to ddt_names, the DDTs
+    that would be registered at this point of a serial parse."""
+    reset_fortran_ddt_names(ddt_names)
+    (filepath, filename) = os.path.split(filename)
+    try:
+        return parse_tables(filepath, filename)
+    except CCPPError as cperr:
+        # Not all CCPPError types can be unpickled, pass on the message
+        raise CCPPError(str(cperr)) from None
+
+def parse_metadata_tables(parse_tables, filenames, jobs):
+    """Parse the metadata tables of all files in filenames with parse_tables
+    (parse_variable_tables or parse_scheme_tables) and return the results as
+    a list in the order of filenames. If jobs is greater than one, the files
+    are parsed concurrently by a pool of worker processes; each worker knows
+    the DDTs that would be registered at that point of a serial parse."""
+    filenames = [os.path.abspath(x) for x in filenames]
+    if jobs > 1 and len(filenames) > 1:
+        worker_ddts = []
+        file_ddts = list(registered_fortran_ddt_names())
+        for filename in filenames:
+            worker_ddts.append(list(file_ddts))
+            file_ddts.extend(metadata_ddt_names(filename))
+        num_files = len(filenames)
+        with ProcessPoolExecutor(max_workers=min(jobs, num_files),
+                                 initializer=set_metadata_cache_dir,
+                                 initargs=(metadata_cache_dir(),)) as pool:
+            results = list(pool.map(parse_tables_worker, [parse_tables]*num_files,
+                                    filenames, worker_ddts))
+        # Register the DDTs found by the workers in this process
+        for ddt_name in file_ddts:
+            register_fortran_ddt_name(ddt_name)
+    else:
+        results = [parse_tables(*os.path.split(x)) for x in filenames]
+    return results
+
+def gather_variable_definitions(variable_definition_files, typedefs_new_metadata, jobs=1):
     """Scan all Fortran source files with variable definitions on the host model side.
     If typedefs_new_metadata is not None, search all metadata entries and convert new metadata
-    (local names) into old metadata by prepending the DDT references."""
+    (local names) into old metadata by prepending the DDT references.
+    If jobs is greater than one, the files are parsed concurrently."""
     #
     logging.info('Parsing metadata tables for variables provided by host model ...')
     success = True
-    metadata_define = collections.OrderedDict()
+    # Merge metadata from all files in one index to report all incompatible entries at once
+    index = MetadataIndex()
     dependencies_define = collections.OrderedDict()
-    for variable_definition_file in variable_definition_files:
-        (filedir, filename) = os.path.split(os.path.abspath(variable_definition_file))
-        # Change to directory of variable_definition_file and parse it
-        os.chdir(os.path.join(BASEDIR,filedir))
-        (metadata, dependencies) = parse_variable_tables(filedir, filename)
-        metadata_define = merge_dictionaries(metadata_define, metadata)
+    for (metadata, dependencies) in parse_metadata_tables(parse_variable_tables,
+                                                          variable_definition_files, jobs):
+        index.update(metadata)
         dependencies_define.update(dependencies)
-        # Return to BASEDIR
-        os.chdir(BASEDIR)
+    index.check()
+    metadata_define = index.metadata()
     #
     if typedefs_new_metadata:
         logging.info('Convert local names from new metadata format into old metadata format ...')
@@ -330,31 +406,29 @@ def gather_variable_definitions(variable_definition_files, typedefs_new_metadata
     #
     return (success, metadata_define, dependencies_define)
 
-def collect_physics_subroutines(scheme_files):
-    """Scan all Fortran source files in scheme_files for subroutines with argument tables."""
+def collect_physics_subroutines(scheme_files, jobs=1):
+    """Scan all Fortran source files in scheme_files for subroutines with argument tables.
+    If jobs is greater than one, the files are parsed concurrently."""
     logging.info('Parsing metadata tables in physics scheme files ...')
     success = True
     # Parse all scheme files: record metadata, argument list, dependencies, and which scheme is in which file
-    metadata_request = collections.OrderedDict()
+    index = MetadataIndex()
     arguments_request = collections.OrderedDict()
     dependencies_request = collections.OrderedDict()
     schemes_in_files = collections.OrderedDict()
-    for scheme_file in scheme_files:
+    results = parse_metadata_tables(parse_scheme_tables, scheme_files, jobs)
+    for (scheme_file, (metadata, arguments, dependencies)) in zip(scheme_files, results):
         scheme_file_with_abs_path = os.path.abspath(scheme_file)
-        (scheme_filepath, scheme_filename) = os.path.split(scheme_file_with_abs_path)
-        # Change to directory where scheme_file lives
-        os.chdir(scheme_filepath)
-        (metadata, arguments, dependencies) = parse_scheme_tables(scheme_filepath, scheme_filename)
         # Record which scheme is in which file
         for scheme in arguments.keys():
             schemes_in_files[scheme] = scheme_file_with_abs_path
         # Merge metadata, append to arguments and dependencies
-        metadata_request = merge_dictionaries(metadata_request, metadata)
+        index.update(metadata)
         arguments_request.update(arguments)
         dependencies_request.update(dependencies)
-        os.chdir(BASEDIR)
-    # Return to BASEDIR
-    os.chdir(BASEDIR)
+    # Report all incompatible entries at once
+    index.check()
+    metadata_request = index.metadata()
     return (success, metadata_request, arguments_request, dependencies_request, schemes_in_files)
 
 def check_schemes_in_suites(arguments, suites):
@@ -448,7 +522,7 @@ def compare_metadata(metadata_define, metadata_request):
     metadata = collections.OrderedDict()
     for var_name in sorted(metadata_request.keys()):
         # Check that variable is provided by the model
-        if not var_name in metadata_define.keys():
+        if not var_name in metadata_define:
             requested_by = ' & '.join(var.container for var in metadata_request[var_name])
             success = False
             logging.error('Variable {0} requested by {1} not provided by the model'.format(var_name, requested_by))
@@ -463,13 +537,17 @@ def compare_metadata(metadata_define, metadata_request):
             logging.error(error_message)
             continue
         # Check that the variable properties are compatible between the model and the schemes;
-        # because we know that all variables in the metadata_request[var_name] list are compatible,
-        # it is sufficient to test the first entry against (the unique) metadata_define[var_name][0].
-        if not metadata_request[var_name][0].compatible(metadata_define[var_name][0]):
+        # because we know that all variables in the metadata_request[var_name] list have the same
+        # signature, it is sufficient to test one entry per kind against (the unique) metadata_define[var_name][0].
+        requested_kinds = collections.OrderedDict()
+        for var in metadata_request[var_name]:
+            requested_kinds.setdefault(var.kind, var)
+        incompatible = [var for var in requested_kinds.values() if not var.compatible(metadata_define[var_name][0])]
+        if incompatible:
             success = False
             error_message = '  incompatible entries in metadata for variable {0}:\n'.format(var_name) +\
                             '    provided:  {0}\n'.format(metadata_define[var_name][0].print_debug()) +\
-                            '    requested: {0}'.format(metadata_request[var_name][0].print_debug())
+                            '    requested: {0}'.format(incompatible[0].print_debug())
             logging.error(error_message)
             continue
         # Check for and register unit conversions if necessary. This must be done for each registered
@@ -541,7 +619,8 @@ def compare_metadata(metadata_define, metadata_request):
     modules = sorted(list(set(modules)))
     return (success, modules, metadata)
 
-def generate_suite_and_group_caps(suites, metadata_request, metadata_define, arguments, caps_dir, debug):
+def generate_suite_and_group_caps(suites, metadata_request, metadata_define, arguments, caps_dir, debug,
+                                  persistent_block_buffers=False):
     """Generate for the suite and for all groups parsed."""
     logging.info("Generating suite and group caps ...")
     suite_and_group_caps = []
@@ -550,7 +629,7 @@ def generate_suite_and_group_caps(suites, metadata_request, metadata_define, arg
     for suite in suites:
         logging.debug("Generating suite and group caps for suite {0}...".format(suite.name))
         # Write caps for suite and groups in suite
-        suite.write(metadata_request, metadata_define, arguments, debug)
+        suite.write(metadata_request, metadata_define, arguments, debug, persistent_block_buffers)
         suite_and_group_caps += suite.caps
     os.chdir(BASEDIR)
     if suite_and_group_caps:
@@ -731,7 +810,8 @@ def generate_caps_makefile(caps, caps_makefile, caps_cmakefile, caps_sourcefile,
 def main():
     """Main routine that handles the CCPP prebuild for different host models."""
     # Parse command line arguments
-    (success, configfile, clean, verbose, debug, sdfs, builddir, namespace) = parse_arguments()
+    (success, configfile, clean, verbose, debug, sdfs, builddir, namespace, jobs, use_parse_cache,
+     persistent_block_buffers) = parse_arguments()
     if not success:
         raise Exception('Call to parse_arguments failed.')
 
@@ -760,8 +840,12 @@ def main():
     if not success:
         raise Exception('Parsing suite definition files failed.')
 
+    # Reuse the parsed metadata files of earlier runs
+    if use_parse_cache:
+        set_metadata_cache_dir(os.path.join(config['build_dir'], PARSE_CACHE_DIRNAME))
+
     # Variables defined by the host model
-    (success, metadata_define, dependencies_define) = gather_variable_definitions(config['variable_definition_files'], config['typedefs_new_metadata'])
+    (success, metadata_define, dependencies_define) = gather_variable_definitions(config['variable_definition_files'], config['typedefs_new_metadata'], jobs)
     if not success:
         raise Exception('Call to gather_variable_definitions failed.')
 
@@ -771,7 +855,7 @@ def main():
         raise Exception('Call to metadata_to_html failed.')
 
     # Variables requested by the CCPP physics schemes
-    (success, metadata_request, arguments_request, dependencies_request, schemes_in_files) = collect_physics_subroutines(config['scheme_files'])
+    (success, metadata_request, arguments_request, dependencies_request, schemes_in_files) = collect_physics_subroutines(config['scheme_files'], jobs)
     if not success:
         raise Exception('Call to collect_physics_subroutines failed.')
 
@@ -821,7 +905,8 @@ def main():
 
     # Static build: generate caps for entire suite and groups in the specified suite; generate API
     (success, suite_and_group_caps) = generate_suite_and_group_caps(suites, metadata_request, metadata_define,
-                                                                    arguments_request, config['caps_dir'], debug)
+                                                                    arguments_request, config['caps_dir'], debug,
+                                                                    persistent_block_buffers)
     if not success:
         raise Exception('Call to generate_suite_and_group_caps failed.')
 
@@ -102,6 +102,10 @@ character(len=16) :: {css_var_name} = '{state}'
         self.__full_groups = {}
         self._full_phases = {}
         self.__gvar_stdnames = {} # Standard names of group-created vars
+        self.__work_arrays = list() # Run phase work arrays kept per thread
+        self.__thread_copy_vars = list() # Suite vars with a copy per thread
+        # Host model variables requested while parsing and analyzing
+        self.__host_variable_record = (set(), set())
         # Initialize our dictionary
         # Create a 'parent' to hold the constituent variables
         # The parent for the constituent dictionary is the API.
@@ -126,6 +130,17 @@ character(len=16) :: {css_var_name} = '{state}'
         """Get the name of the suite definition file."""
         return self.__sdf_name
 
+    @property
+    def host_variable_record(self):
+        """Get the record of host model variables requested by this suite
+        (see HostModel.swap_used_variable_record)."""
+        return self.__host_variable_record
+
+    @host_variable_record.setter
+    def host_variable_record(self, record):
+        """Set the record of host model variables requested by this suite"""
+        self.__host_variable_record = record
+
     @classmethod
     def check_suite_state(cls, stage):
         """Return a list of CCPP state check statements for <stage>"""
@@ -195,8 +210,11 @@ character(len=16) :: {css_var_name} = '{state}'
         self.__context = ParseContext(filename=self.__sdf_name)
         # Validate the XML file
         version = find_schema_version(suite_xml)
-        res = validate_xml_file(self.__sdf_name, 'suite', version,
-                                run_env.logger)
+        with run_env.profiler.phase('validate_xml_file'):
+            res = validate_xml_file(self.__sdf_name, 'suite', version,
+                                    run_env.logger,
+                                    cache_dir=run_env.parse_cache_dir)
+        # end with
         if not res:
             emsg = "Invalid suite definition file, '{}'"
             raise CCPPError(emsg.format(self.__sdf_name))
@@ -269,6 +287,106 @@ character(len=16) :: {css_var_name} = '{state}'
         """Get the list of groups in this suite."""
         return self.__groups
 
+    @property
+    def work_arrays(self):
+        """Get the list of run phase work arrays declared in the suite module
+        (--persistent-work-arrays)."""
+        return self.__work_arrays
+
+    @property
+    def thread_copy_vars(self):
+        """Get the list of suite variables which have a copy for each
+        thread (--threaded-run)."""
+        return self.__thread_copy_vars
+
+    def __find_thread_copy_vars(self):
+        """With --threaded-run, find the suite variables which need a copy
+        for each thread. These are the intrinsic type variables modified by
+        a run phase scheme which do not have a horizontal dimension.
+        Horizontal variables are referenced by column chunk so threads do
+        not share elements. DDT variables are shared as their components
+        may be column data (which schemes index by chunk)."""
+        self.__thread_copy_vars = list()
+        if not self.__run_env.threaded_run:
+            return
+        # end if
+        copy_stdnames = set()
+        for group in self.__groups:
+            if not self.is_run_group(group):
+                continue
+            # end if
+            for scheme in group.schemes():
+                for var in scheme.call_list.variable_list():
+                    stdname = var.get_prop_value('standard_name')
+                    if (var.get_prop_value('intent') != 'in') and \
+                       (stdname in self):
+                        copy_stdnames.add(stdname)
+                    # end if
+                # end for
+            # end for
+        # end for
+        for stdname in self.keys():
+            svar = self[stdname]
+            if (stdname in copy_stdnames) and (not svar.is_ddt()) and \
+               (not svar.has_horizontal_dimension()):
+                self.__thread_copy_vars.append(svar)
+            # end if
+        # end for
+
+    def __declare_thread_copies(self, outfile, indent):
+        """Declare the arrays which hold the thread copies of suite
+        variables. Each array has an extra (last) dimension for the thread
+        number, its elements are referenced through a pointer (with the
+        variable's name) by each group."""
+        if self.__thread_copy_vars:
+            outfile.write('\n! Thread copies of suite variables', indent)
+        # end if
+        for svar in self.__thread_copy_vars:
+            rank = len(svar.get_dimensions()) + 1
+            dimstr = '(:' + ',:'*(rank - 1) + ')'
+            outfile.write(f"{Group.thread_copy_type(svar)}, allocatable, " +
+                          f"target :: {Group.thread_copies_name(svar)}{dimstr}",
+                          indent)
+        # end for
+
+    def __declare_work_arrays(self, outfile, indent):
+        """Declare the run phase work arrays which are kept (per thread)
+        between calls in the suite module. Groups with an identically
+        declared array share it. An array which clashes with a suite
+        variable or a different array of another group stays local to its
+        group (and is allocated on every call)."""
+        work_arrays = {}
+        for group in self.__groups:
+            kept = list()
+            for lname, var, target in group.work_arrays():
+                if self.find_local_name(lname) is not None:
+                    continue
+                # end if
+                decl = (var.get_prop_value('type'), var.get_prop_value('kind'),
+                        len(var.get_dimensions()))
+                if lname not in work_arrays:
+                    work_arrays[lname] = [var, group, target, decl]
+                elif work_arrays[lname][3] != decl:
+                    continue
+                else:
+                    work_arrays[lname][2] = work_arrays[lname][2] or target
+                # end if
+                kept.append(lname)
+            # end for
+            group.keep_work_arrays(kept)
+        # end for
+        self.__work_arrays = sorted(work_arrays)
+        if work_arrays:
+            outfile.write('\n! Run phase work arrays (kept by each thread)',
+                          indent)
+        # end if
+        for lname in self.__work_arrays:
+            var, group, target, _ = work_arrays[lname]
+            var.write_def(outfile, indent, group, allocatable=True,
+                          target=target)
+            outfile.write(f"!$omp threadprivate({lname})", indent)
+        # end for
+
     def find_variable(self, standard_name=None, source_var=None,
                       any_scope=True, clone=None,
                       search_call_list=False, loop_subst=False):
@@ -468,9 +586,11 @@ character(len=16) :: {css_var_name} = '{state}'
                 run_env.logger.debug(lmsg.format(item.name,
                                                  [x.name
                                                   for x in item.schemes()]))
-            item.analyze(phase, self, scheme_library, ddt_library,
-                         self.check_suite_state(phase),
-                         self.set_suite_state(phase))
+            with run_env.profiler.phase('group_analyze', item=item.name):
+                item.analyze(phase, self, scheme_library, ddt_library,
+                             self.check_suite_state(phase),
+                             self.set_suite_state(phase))
+            # end with
             # Look for group variables that need to be promoted to the suite
             # We need to promote any variable used later to the suite, however,
             # we do not yet know if it will be used.
@@ -522,21 +642,26 @@ character(len=16) :: {css_var_name} = '{state}'
         """Return the constituent dictionary for this suite"""
         return self.parent
 
+    def cap_filename(self, output_dir):
+        """Return the pathname of this suite's cap file in <output_dir>"""
+        return os.path.join(output_dir,
+                            '{module_name}.F90'.format(module_name=self.module))
+
     def write(self, output_dir, run_env):
         """Create caps for all groups in the suite and for the entire suite
         (calling the group caps one after another)"""
         # Set name of module and filename of cap
-        filename = '{module_name}.F90'.format(module_name=self.module)
+        output_file_name = self.cap_filename(output_dir)
+        filename = os.path.basename(output_file_name)
         if run_env.verbose:
             run_env.logger.debug('Writing CCPP suite file, {}'.format(filename))
         # end if
         # Retrieve the name of the constituent module for Group use statements
         const_mod = self.parent.constituent_module_name()
         # Init
-        output_file_name = os.path.join(output_dir, filename)
         with FortranWriter(output_file_name, 'w',
                            "CCPP Suite Cap for {}".format(self.name),
-                           self.module) as outfile:
+                           self.module, buffered=True) as outfile:
             # Write module 'use' statements here
             outfile.write('use {}'.format(KINDS_MODULE), 1)
             # Look for any DDT types
@@ -545,6 +670,18 @@ character(len=16) :: {css_var_name} = '{state}'
             # Write out constituent module use statement(s)
             const_dict = self.constituent_dictionary()
             const_dict.write_suite_use(outfile, 1)
+            # The threaded region checks and the thread copies of suite
+            #    variables (--threaded-run) use the OpenMP thread number
+            self.__find_thread_copy_vars()
+            if run_env.threaded_run:
+                omp_funcs = 'omp_get_thread_num'
+                if self.__thread_copy_vars:
+                    omp_funcs += ', omp_get_max_threads'
+                # end if
+                outfile.write('#ifdef _OPENMP', 0)
+                outfile.write(f"use omp_lib, only: {omp_funcs}", 1)
+                outfile.write('#endif', 0)
+            # end if
             outfile.write_preamble()
             outfile.write('! Suite interfaces', 1)
             line = Suite.__state_machine_init
@@ -561,8 +698,15 @@ character(len=16) :: {css_var_name} = '{state}'
             const_dict.declare_private_data(outfile, 1)
             outfile.write('\n! Private suite variables', 1)
             for svar in self.keys():
-                self[svar].write_def(outfile, 1, self, allocatable=True)
+                if self[svar] not in self.__thread_copy_vars:
+                    self[svar].write_def(outfile, 1, self, allocatable=True)
+                # end if
+            # end for
+            self.__declare_thread_copies(outfile, 1)
+            for group in self.__groups:
+                group.write_debug_check_data(outfile, 1)
             # end for
+            self.__declare_work_arrays(outfile, 1)
             outfile.end_module_header()
             for group in self.__groups:
                 if group.name in self._beg_groups:
@@ -599,6 +743,8 @@ class API(VarDictionary):
     __part_fname = 'ccpp_physics_suite_part_list'
     __vars_fname = 'ccpp_physics_suite_variables'
     __schemes_fname = 'ccpp_physics_suite_schemes'
+    __handle_fname = 'ccpp_physics_suite_handle'
+    __part_handle_fname = 'ccpp_physics_suite_part_handle'
 
     __file_desc = "API for {host_model} calls to CCPP suites"
 
@@ -626,7 +772,8 @@ class API(VarDictionary):
                         'kind':'len=*', 'units':'',
                         'dimensions':'()'}, _API_SOURCE, _API_DUMMY_RUN_ENV)
 
-    def __init__(self, sdfs, host_model, scheme_headers, run_env):
+    def __init__(self, sdfs, host_model, scheme_headers, run_env,
+                 analyzed_suites=None):
         """Initialize this API.
         <sdfs> is the list of Suite Definition Files to be parsed for
             data needed by the CCPP cap.
@@ -636,6 +783,9 @@ class API(VarDictionary):
             Every scheme referenced by an SDF in <sdfs> MUST be in this list,
             however, unused schemes are allowed.
         <run_env> is the CCPPFrameworkEnv object for this framework run.
+        <analyzed_suites> is an optional dictionary of Suite objects, keyed
+            by SDF, from a previous analysis of unchanged inputs. These
+            suites are used as is instead of parsing and analyzing their SDF.
         """
         self.__module = 'ccpp_physics_api'
         self.__host = host_model
@@ -680,10 +830,36 @@ class API(VarDictionary):
             # end if
         # end for
         # Turn the SDF files into Suites
+        profiler = run_env.profiler
         for sdf in sdfs:
-            suite = Suite(sdf, self, run_env)
-            suite.analyze(self.host_model, scheme_library,
-                          self.__ddt_lib, run_env)
+            if analyzed_suites and (sdf in analyzed_suites):
+                suite = analyzed_suites[sdf]
+                # The suite's constituent dictionary is parented by the API
+                suite.constituent_dictionary().parent = self
+                self.host_model.add_used_variable_record(
+                    suite.host_variable_record)
+                if run_env.verbose:
+                    lmsg = 'Using previous analysis of CCPP suite, {}'
+                    run_env.logger.debug(lmsg.format(suite.name))
+                # end if
+                self.__suites.append(suite)
+                continue
+            # end if
+            # Record the host model variables requested by this suite
+            #    so that its analysis can be reused by a later run
+            host_record = self.host_model.swap_used_variable_record((set(),
+                                                                     set()))
+            with profiler.phase('suite_parse', item=sdf):
+                suite = Suite(sdf, self, run_env)
+            # end with
+            with profiler.phase('suite_analyze', item=suite.name):
+                suite.analyze(self.host_model, scheme_library,
+                              self.__ddt_lib, run_env)
+            # end with
+            suite.host_variable_record =                                      \
+                self.host_model.swap_used_variable_record(host_record)
+            self.host_model.add_used_variable_record(
+                suite.host_variable_record)
             self.__suites.append(suite)
         # end for
         # We will need the correct names for errmsg and errcode
@@ -731,15 +907,27 @@ class API(VarDictionary):
         # end if
         raise ParseInternalError("Illegal phase, '{}'".format(phase))
 
-    def write(self, output_dir, run_env):
-        """Write CCPP API module"""
+    def write(self, output_dir, run_env, keep_suites=None, keep_dir=None):
+        """Write CCPP API module.
+        Suites whose SDF is in <keep_suites> are not written, their existing
+        cap file in <keep_dir> is used instead."""
         if not self.suites:
             raise CCPPError("No suite specified for generating API")
         # end if
         api_filenames = list()
         # Write out the suite files
         for suite in self.suites:
-            out_file_name = suite.write(output_dir, run_env)
+            if keep_suites and (suite.sdf_name in keep_suites):
+                out_file_name = suite.cap_filename(keep_dir)
+                if run_env.verbose:
+                    lmsg = 'Keeping unmodified CCPP suite file, {}'
+                    run_env.logger.debug(lmsg.format(out_file_name))
+                # end if
+            else:
+                with run_env.profiler.phase('suite_write', item=suite.name):
+                    out_file_name = suite.write(output_dir, run_env)
+                # end with
+            # end if
             api_filenames.append(out_file_name)
         # end for
         return api_filenames
@@ -751,6 +939,24 @@ class API(VarDictionary):
         ofile.write(f"public :: {API.__part_fname}", 1)
         ofile.write(f"public :: {API.__vars_fname}", 1)
         ofile.write(f"public :: {API.__schemes_fname}", 1)
+        ofile.write(f"public :: {API.__handle_fname}", 1)
+        ofile.write(f"public :: {API.__part_handle_fname}", 1)
+
+    @classmethod
+    def suite_handle_funcname(cls):
+        """Return the name of the function which returns a suite handle"""
+        return API.__handle_fname
+
+    @classmethod
+    def part_handle_funcname(cls):
+        """Return the name of the function which returns a suite part
+        handle"""
+        return API.__part_handle_fname
+
+    def suite_handles(self):
+        """Return a list of (handle, suite) pairs for the suites in this API.
+        A handle is a positive integer, zero is never a valid handle."""
+        return list(enumerate(self.suites, 1))
 
     def get_errinfo_names(self, base_only=False):
         """Return a tuple of error output local names.
@@ -1175,6 +1381,44 @@ class API(VarDictionary):
         ofile.write("end if", 2)
         ofile.write("end subroutine {}".format(API.__schemes_fname), 1)
 
+    def write_handle_funcs(self, ofile):
+        """Write the functions which return the integer handle of a suite
+        or of a run suite part. Unknown names have a handle of zero.
+        The handle of a suite part is its position in the suite's part list"""
+        fname = API.__handle_fname
+        ofile.write(f"integer function {fname}(suite_name)", 1)
+        oline = "character(len=*), intent(in) :: suite_name"
+        ofile.write(oline, 2)
+        ofile.blank_line()
+        ofile.write("select case (trim(suite_name))", 2)
+        for handle, suite in self.suite_handles():
+            ofile.write(f"case ('{suite.name}')", 2)
+            ofile.write(f"{fname} = {handle}", 3)
+        # end for
+        ofile.write("case default", 2)
+        ofile.write(f"{fname} = 0", 3)
+        ofile.write("end select", 2)
+        ofile.write(f"end function {fname}", 1)
+        ofile.blank_line()
+        fname = API.__part_handle_fname
+        ofile.write(f"integer function {fname}(suite_handle, suite_part)", 1)
+        ofile.write("integer,          intent(in) :: suite_handle", 2)
+        ofile.write("character(len=*), intent(in) :: suite_part", 2)
+        ofile.blank_line()
+        ofile.write(f"{fname} = 0", 2)
+        ofile.write("select case (suite_handle)", 2)
+        for handle, suite in self.suite_handles():
+            ofile.write(f"case ({handle})", 2)
+            ofile.write("select case (trim(suite_part))", 3)
+            for phandle, part in enumerate(suite.part_list(), 1):
+                ofile.write(f"case ('{part}')", 3)
+                ofile.write(f"{fname} = {phandle}", 4)
+            # end for
+            ofile.write("end select", 3)
+        # end for
+        ofile.write("end select", 2)
+        ofile.write(f"end function {fname}", 1)
+
     def write_inspection_routines(self, ofile):
         """Write the list_suites and list_suite_parts subroutines"""
         errmsg_name, errcode_name = self.get_errinfo_names(base_only=True)
@@ -1194,6 +1438,9 @@ class API(VarDictionary):
         self.write_req_vars_sub(ofile, errmsg_name, errcode_name)
         # Write out the suite scheme list subroutine
         self.write_suite_schemes_sub(ofile, errmsg_name, errcode_name)
+        ofile.blank_line()
+        # Write out the suite and suite part handle functions
+        self.write_handle_funcs(ofile)
 
     @property
     def module(self):
@@ -71,6 +71,9 @@ STANDARD_VARIABLE_TYPES = [ STANDARD_CHARACTER_TYPE, STANDARD_INTEGER_TYPE, 'log
 # For static build
 CCPP_STATIC_API_MODULE = 'ccpp_static_api'
 CCPP_STATIC_SUBROUTINE_NAME = 'ccpp_physics_{stage}'
+CCPP_STATIC_HANDLE_SUBROUTINE_NAME = 'ccpp_physics_{stage}_by_handle'
+CCPP_STATIC_SUITE_HANDLE_FUNCTION = 'ccpp_physics_suite_handle'
+CCPP_STATIC_GROUP_HANDLE_FUNCTION = 'ccpp_physics_group_handle'
 
 # Filename pattern for suite definition files
 SUITE_DEFINITION_FILENAME_PATTERN = re.compile('^(.*)\.xml$')
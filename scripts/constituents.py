@@ -605,8 +605,12 @@ class ConstituentVarDict(VarDictionary):
         # Write constituent_init routine
         substmt = f"subroutine {init_funcname}"
         cap.blank_line()
-        cap.write(f"{substmt}(ncols, num_layers, {err_dummy_str})", 1)
+        cap.write(f"{substmt}(ncols, num_layers, {err_dummy_str}, const_data)", 1)
         cap.comment("Initialize constituent data", 2)
+        cap.comment("If <const_data> is present, the host model's constituent array is", 2)
+        cap.comment("   used (without copying) as the constituent data, and every", 2)
+        cap.comment("   constituent field in it is set to its default value", 2)
+        cap.comment("   (overwriting any data already stored there)", 2)
         cap.blank_line()
         cap.write("use ccpp_scheme_utils, only: ccpp_initialize_constituent_ptr", 2)
         cap.blank_line()
@@ -616,15 +620,17 @@ class ConstituentVarDict(VarDictionary):
         for evar in err_vars:
             evar.write_def(cap, 2, host, dummy=True, add_intent="out")
         # end for evar
+        cap.write("real(kind_phys), optional, pointer, contiguous, intent(in) :: const_data(:,:,:)", 2)
         cap.blank_line()
-        call_str = f"call {const_obj_name}%lock_data(ncols, num_layers, {obj_err_callstr})"
+        call_str = f"call {const_obj_name}%lock_data(ncols, num_layers, {obj_err_callstr}, const_data=const_data)"
         cap.write(call_str, 2)
         cap.write(f"call ccpp_initialize_constituent_ptr({const_obj_name})", 2)
         cap.write(f"end {substmt}", 1)
         # Write num_consts routine
         substmt = f"subroutine {num_const_funcname}"
         cap.blank_line()
-        cap.write(f"{substmt}(num_flds, advected, {err_dummy_str})", 1)
+        cap.write(f"{substmt}(num_flds, advected, {err_dummy_str}, " +
+                  "thermo_active, water_species)", 1)
         cap.comment("Return the number of constituent fields for this run", 2)
         cap.blank_line()
         cap.comment("Dummy arguments", 2)
@@ -633,8 +639,11 @@ class ConstituentVarDict(VarDictionary):
         for evar in err_vars:
             evar.write_def(cap, 2, host, dummy=True, add_intent="out")
         # end for
+        cap.write("logical, optional,  intent(in)    :: thermo_active", 2)
+        cap.write("logical, optional,  intent(in)    :: water_species", 2)
         cap.blank_line()
-        call_str = f"call {const_obj_name}%num_constituents(num_flds, advected=advected, {obj_err_callstr})"
+        call_str = f"call {const_obj_name}%num_constituents(num_flds, advected=advected, " + \
+                   f"thermo_active=thermo_active, water_species=water_species, {obj_err_callstr})"
         cap.write(call_str, 2)
         cap.write(f"end {substmt}", 1)
         # Write query_consts routine
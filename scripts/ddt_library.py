@@ -21,6 +21,8 @@ class VarDDT(Var):
     DDT nesting level).
     """
 
+    __slots__ = ('__field',)
+
     def __init__(self, new_field, var_ref, run_env, recur=False):
         """Initialize a new VarDDT object.
         <new_field> is the DDT component.
@@ -10,6 +10,7 @@ from __future__ import unicode_literals
 
 import filecmp
 import glob
+import hashlib
 import os
 # CCPP framework imports
 from parse_tools import CCPPError, ParseInternalError
@@ -262,13 +263,46 @@ def remove_dir(src_dir, force=False):
     os.chdir(currdir)
 
 ###############################################################################
-def move_modified_files(src_dir, dest_dir, overwrite=False, remove_src=False):
+def _same_content(size, digest, filename, recorded=None):
+###############################################################################
+    """Return True if <filename> has <size> bytes with a hash of <digest>.
+    <recorded> is an optional (size, mtime_ns, hash) tuple recorded for
+    <filename> by a previous run. If <filename> still has that size and
+    modification time, the recorded hash is used instead of reading
+    <filename>."""
+    fstat = os.stat(filename)
+    if fstat.st_size != size:
+        return False
+    # end if
+    if recorded and (recorded[0:2] == (fstat.st_size, fstat.st_mtime_ns)):
+        return recorded[2] == digest
+    # end if
+    with open(filename, 'rb') as infile:
+        return hashlib.sha256(infile.read()).hexdigest() == digest
+    # end with
+
+###############################################################################
+def move_modified_files(src_dir, dest_dir, overwrite=False, remove_src=False,
+                        src_hashes=None, dest_hashes=None):
 ###############################################################################
     """For each file in <src_dir>, move it to <dest_dir> if that file is
     different in the two locations.
     if <overwrite> is True, move all files to <dest_dir>, even if unchanged.
-    If <remove_src> is True, remove <src_dir> when complete."""
+    If <remove_src> is True, remove <src_dir> when complete.
+    <src_hashes> is an optional dictionary of (size, hash) for files in
+    <src_dir> (keyed by absolute pathname). The files in <src_hashes> are
+    compared by hash so they do not need to be read again.
+    <dest_hashes> is an optional dictionary of (size, mtime_ns, hash) for
+    files in <dest_dir> (keyed by absolute pathname) as returned by a
+    previous call. Destination files which have not been modified since
+    are compared using this hash so they do not need to be read.
+    Return a dictionary of (size, mtime_ns, hash) for each file in
+    <dest_dir> whose hash is known (keyed by absolute pathname)."""
     src_files = {} # All files in <src_dir>
+    final_hashes = {}
+    if not dest_hashes:
+        dest_hashes = {}
+    # end if
     if os.path.normpath(src_dir) != os.path.normpath(dest_dir):
         for root, _, files in os.walk(src_dir):
             for file in files:
@@ -285,11 +319,22 @@ def move_modified_files(src_dir, dest_dir, overwrite=False, remove_src=False):
             src_path = src_files[file]
             src_file = os.path.relpath(src_path, start=src_dir)
             dest_path = os.path.join(dest_dir, src_file)
+            src_abspath = os.path.abspath(src_path)
+            dest_abspath = os.path.abspath(dest_path)
+            if src_hashes and (src_abspath in src_hashes):
+                src_hash = src_hashes[src_abspath]
+            else:
+                src_hash = None
+            # end if
             if os.path.exists(dest_path):
                 if overwrite:
                     fmove = True
+                elif src_hash:
+                    fmove = not _same_content(*src_hash, dest_path,
+                                              dest_hashes.get(dest_abspath))
                 else:
-                    fmove = filecmp.cmp(src_path, dest_path, shallow=False)
+                    fmove = not filecmp.cmp(src_path, dest_path,
+                                            shallow=False)
                 # end if
             else:
                 fmove = True
@@ -299,8 +344,24 @@ def move_modified_files(src_dir, dest_dir, overwrite=False, remove_src=False):
             else:
                 os.remove(src_path)
             # end if
+            if src_hash:
+                fstat = os.stat(dest_path)
+                final_hashes[dest_abspath] = (fstat.st_size, fstat.st_mtime_ns,
+                                              src_hash[1])
+            # end if
         # end for
         if remove_src:
             remove_dir(src_dir, force=True)
         # end if
-    # end if (no else, take no action if the directories are identical)
+    elif src_hashes:
+        # The files are already in place, just report their hashes
+        dest_root = os.path.join(os.path.abspath(dest_dir), '')
+        for dest_abspath, (_, digest) in src_hashes.items():
+            if dest_abspath.startswith(dest_root):
+                fstat = os.stat(dest_abspath)
+                final_hashes[dest_abspath] = (fstat.st_size, fstat.st_mtime_ns,
+                                              digest)
+            # end if
+        # end for
+    # end if
+    return final_hashes
@@ -4,10 +4,16 @@
 """Code to write Fortran code
 """
 
+import hashlib
+import io
 import math
+import os
 
 class FortranWriter:
     """Class to turn output into properly continued and indented Fortran code
+    A buffered FortranWriter builds the file contents in memory and writes
+    the file once, when it is closed. The content hash of a file written
+    by a buffered FortranWriter is available from <content_hashes>.
     >>> FortranWriter("foo.F90", 'r', 'test', 'mod_name') #doctest: +IGNORE_EXCEPTION_DETAIL
     Traceback (most recent call last):
     ValueError: Read mode not allowed in FortranWriter object
@@ -57,6 +63,11 @@ CONTAINS'''
     __MOD_FOOTER = '''
 end module {module}'''
 
+    # (size, hash) of files written by buffered FortranWriter objects
+    #    along with the modification time used to check that the entry
+    #    still describes the file
+    __content_hashes = {}
+
     ###########################################################################
 
     def indent(self, level=0, continue_line=False):
@@ -252,9 +263,11 @@ end module {module}'''
 
     def __init__(self, filename, mode, file_description, module_name,
                  indent=None, continue_indent=None,
-                 line_fill=None, line_max=None):
+                 line_fill=None, line_max=None, buffered=False):
         """Initialize thie FortranWriter object.
-        Some boilerplate is written automatically."""
+        Some boilerplate is written automatically.
+        If <buffered> is True, <filename> is only written when this
+        FortranWriter is closed."""
         self.__file_desc = file_description.replace('\n', '\n!! ')
         self.__module = module_name
         # We only handle writing situations (for now) and only text
@@ -264,7 +277,15 @@ end module {module}'''
         if 'b' in mode:
             raise ValueError('Binary mode not allowed in FortranWriter object')
         # End if
-        self.__file = open(filename, mode)
+        self.__filename = os.path.abspath(filename)
+        self.__mode = mode
+        FortranWriter.__content_hashes.pop(self.__filename, None)
+        if buffered:
+            self.__file = io.StringIO()
+        else:
+            self.__file = open(filename, mode)
+        # End if
+        self.__buffered = buffered
         if indent is None:
             self.__indent = FortranWriter.__INDENT
         else:
@@ -315,11 +336,56 @@ end module {module}'''
 
     def __exit__(self, *args):
         self.write(FortranWriter.__MOD_FOOTER.format(module=self.__module), 0)
-        self.__file.close()
+        self.close()
         return False
 
     ###########################################################################
 
+    def close(self):
+        """Close this FortranWriter's file. For a buffered FortranWriter,
+        this is when the file is written."""
+        if self.__buffered:
+            contents = self.__file.getvalue()
+            with open(self.__filename, self.__mode) as outfile:
+                outfile.write(contents)
+                encoding = outfile.encoding
+            # end with
+            if 'w' in self.__mode:
+                # Record the hash of the bytes written to the file
+                data = contents.replace('\n', os.linesep).encode(encoding)
+                fstat = os.stat(self.__filename)
+                FortranWriter.__content_hashes[self.__filename] = (
+                    fstat.st_mtime_ns, fstat.st_size,
+                    hashlib.sha256(data).hexdigest())
+            # end if
+        # end if
+        self.__file.close()
+
+    ###########################################################################
+
+    @classmethod
+    def content_hashes(cls):
+        """Return a dictionary of (size, hash) for each file written by a
+        buffered FortranWriter which has not been modified since.
+        Files are keyed by absolute pathname."""
+        hashes = {}
+        for filename, (mtime, size, digest) in list(cls.__content_hashes.items()):
+            try:
+                fstat = os.stat(filename)
+            except OSError:
+                fstat = None
+            # end try
+            if fstat and (fstat.st_mtime_ns == mtime) and (fstat.st_size == size):
+                hashes[filename] = (size, digest)
+            else:
+                # The file has been moved or modified
+                del cls.__content_hashes[filename]
+            # end if
+        # end for
+        return hashes
+
+    ###########################################################################
+
     def module_header(self):
         """Return the standard Fortran module header for <filename> and
         <module>"""
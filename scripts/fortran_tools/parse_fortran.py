@@ -76,10 +76,10 @@ class Ftype(object):
     __itype_re = re.compile(r"(?i)({})\s*(\([A-Za-z0-9,=_\s]+\))?".format(r"|".join(__intrinsic_types__)))
     __kind_re = re.compile(r"(?i)kind\s*(\()?\s*([\'\"])?(.+?)([\'\"])?\s*(\))?")
 
-    __attr_spec = ['allocatable', 'asynchronous', 'dimension', 'external',
-                   'intent', 'intrinsic', 'bind', 'optional', 'parameter',
-                   'pointer', 'private', 'protected', 'public', 'save',
-                   'target', 'value', 'volatile']
+    __attr_spec = ['allocatable', 'asynchronous', 'contiguous', 'dimension',
+                   'external', 'intent', 'intrinsic', 'bind', 'optional',
+                   'parameter', 'pointer', 'private', 'protected', 'public',
+                   'save', 'target', 'value', 'volatile']
 
     def __init__(self, typestr_in=None, kind_in=None, match_len_in=None,
                  line_in=None, context=None):
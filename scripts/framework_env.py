@@ -11,10 +11,14 @@ Framework runtime information and parameter values.
 import argparse
 import os
 from parse_tools import verbose
+from profile_utils import PhaseProfiler
 
 _EPILOG = '''
 '''
 
+## Subdirectory of the output directory used for the parse cache
+_PARSE_CACHE_DIRNAME = 'ccpp_parse_cache'
+
 ###############################################################################
 class CCPPFrameworkEnv:
 ###############################################################################
@@ -26,7 +30,11 @@ class CCPPFrameworkEnv:
                  preproc_directives=[], generate_docfiles=False, host_name='',
                  kind_types=[], use_error_obj=False, force_overwrite=False,
                  output_root=os.getcwd(), ccpp_datafile="datatable.xml",
-                 debug=False):
+                 debug=False, debug_check_interval=1,
+                 persistent_work_arrays=False, threaded_run=False,
+                 instrument=False, jobs=1,
+                 use_parse_cache=False,
+                 incremental=False, profile=False):
         """Initialize a new CCPPFrameworkEnv object from the input arguments.
         <ndict> is a dict with the parsed command-line arguments (or a
            dictionary created with the necessary arguments).
@@ -206,6 +214,71 @@ class CCPPFrameworkEnv:
         else:
             self.__debug = debug
         # end if
+        # How often (in calls to a group) to run the variable checks
+        if ndict and ('debug_check_interval' in ndict):
+            debug_check_interval = ndict['debug_check_interval']
+            del ndict['debug_check_interval']
+        # end if
+        if isinstance(debug_check_interval, int) and (debug_check_interval >= 0):
+            self.__debug_check_interval = debug_check_interval
+        else:
+            emsg += esep + "Error: 'debug_check_interval' must be a "
+            emsg += "non-negative integer, not '{}'".format(debug_check_interval)
+            esep = '\n'
+        # end if
+        # Keep run phase work arrays allocated between calls
+        if ndict and ('persistent_work_arrays' in ndict):
+            self.__persistent_work_arrays = ndict['persistent_work_arrays']
+            del ndict['persistent_work_arrays']
+        else:
+            self.__persistent_work_arrays = persistent_work_arrays
+        # end if
+        # Generate an OpenMP threaded run interface in the host cap
+        if ndict and ('threaded_run' in ndict):
+            self.__threaded_run = ndict['threaded_run']
+            del ndict['threaded_run']
+        else:
+            self.__threaded_run = threaded_run
+        # end if
+        # Time each scheme call in the generated caps
+        if ndict and ('instrument' in ndict):
+            self.__instrument = ndict['instrument']
+            del ndict['instrument']
+        else:
+            self.__instrument = instrument
+        # end if
+        # Number of processes to use for parsing metadata and Fortran files
+        if ndict and ('jobs' in ndict):
+            jobs = ndict['jobs']
+            del ndict['jobs']
+        # end if
+        if isinstance(jobs, int) and (jobs > 0):
+            self.__jobs = jobs
+        else:
+            emsg += esep + "Error: 'jobs' must be a positive integer, "
+            emsg += "not '{}'".format(jobs)
+            esep = '\n'
+        # end if
+        # Enable or disable the on-disk cache of parsed metadata and Fortran
+        if ndict and ('use_parse_cache' in ndict):
+            self.__use_parse_cache = ndict['use_parse_cache']
+            del ndict['use_parse_cache']
+        else:
+            self.__use_parse_cache = use_parse_cache
+        # end if
+        # Enable or disable regenerating only caps with modified inputs
+        if ndict and ('incremental' in ndict):
+            self.__incremental = ndict['incremental']
+            del ndict['incremental']
+        else:
+            self.__incremental = incremental
+        # end if
+        # Enable or disable profiling of this run
+        if ndict and ('profile' in ndict):
+            profile = ndict['profile']
+            del ndict['profile']
+        # end if
+        self.__profiler = PhaseProfiler(enabled=profile)
         self.__logger = logger
         ## Check to see if anything is left in dictionary
         if ndict:
@@ -325,6 +398,87 @@ CCPPFrameworkEnv object."""
         CCPPFrameworkEnv object."""
         return self.__debug
 
+    @property
+    def debug_check_interval(self):
+        """Return the <debug_check_interval> property for this
+        CCPPFrameworkEnv object. The variable checks added with <debug> run
+        on the first call of each group and then on every
+        <debug_check_interval> calls. Zero means only run on the first call
+        (until the checks pass), one means run on every call."""
+        return self.__debug_check_interval
+
+    @property
+    def persistent_work_arrays(self):
+        """Return the <persistent_work_arrays> property for this
+        CCPPFrameworkEnv object."""
+        return self.__persistent_work_arrays
+
+    @property
+    def threaded_run(self):
+        """Return the <threaded_run> property for this
+        CCPPFrameworkEnv object."""
+        return self.__threaded_run
+
+    @property
+    def instrument(self):
+        """Return the <instrument> property for this
+        CCPPFrameworkEnv object."""
+        return self.__instrument
+
+    @property
+    def jobs(self):
+        """Return the <jobs> property for this
+        CCPPFrameworkEnv object."""
+        return self.__jobs
+
+    @property
+    def use_parse_cache(self):
+        """Return the <use_parse_cache> property for this
+        CCPPFrameworkEnv object."""
+        return self.__use_parse_cache
+
+    @property
+    def parse_cache_dir(self):
+        """Return the directory used to cache parsed metadata and Fortran
+        files or None if the parse cache is not in use."""
+        if self.use_parse_cache:
+            return os.path.join(self.output_dir, _PARSE_CACHE_DIRNAME)
+        # end if
+        return None
+
+    @property
+    def incremental(self):
+        """Return the <incremental> property for this
+        CCPPFrameworkEnv object."""
+        return self.__incremental
+
+    @property
+    def suite_cache_dir(self):
+        """Return the directory used to cache analyzed suites between
+        incremental runs or None if capgen is not run in incremental mode."""
+        if self.incremental:
+            return os.path.join(self.output_dir, _PARSE_CACHE_DIRNAME)
+        # end if
+        return None
+
+    @property
+    def profile(self):
+        """Return the <profile> property for this
+        CCPPFrameworkEnv object."""
+        return self.__profiler.enabled
+
+    @property
+    def profiler(self):
+        """Return the PhaseProfiler for this CCPPFrameworkEnv object
+        (phases are only recorded if <profile> is True)."""
+        return self.__profiler
+
+    @property
+    def profile_file(self):
+        """Return the filename for the profile report, it is written
+        next to the datatable."""
+        return os.path.splitext(self.datatable_file)[0] + '_profile.json'
+
     @property
     def logger(self):
         """Return the <logger> property for this CCPPFrameworkEnv object."""
@@ -403,6 +557,55 @@ if unmodified""")
     parser.add_argument("--debug", action='store_true', default=False,
                         help="Add variable allocation checks to assist debugging")
 
+    parser.add_argument("--debug-check-interval", type=int, default=1,
+                        metavar='N',
+                        help="""Run the --debug variable checks on the first
+call of each group and then on every N calls (default is 1, every call).
+With N=0, the checks run only until they pass once.""")
+
+    parser.add_argument("--persistent-work-arrays", action='store_true',
+                        default=False,
+                        help="""Keep the local work arrays of run phase groups
+allocated (per thread, in the suite module) between calls, they are only
+reallocated when their extents change. The arrays are released by the suite
+finalize call (which must use the same number of OpenMP threads as the run
+phase calls)""")
+
+    parser.add_argument("--threaded-run", action='store_true',
+                        default=False,
+                        help="""Add a run interface to the host cap which
+divides the horizontal loop into chunks and runs them in an OpenMP parallel
+loop. Suite variables of intrinsic type without a horizontal dimension which
+are modified in the run phase get a copy for each thread. The interface is skipped (with a
+warning) if the loop bounds and error variables are not arguments of the host
+run phase interface.""")
+
+    parser.add_argument("--instrument", action='store_true', default=False,
+                        help="""Time each scheme call in the generated caps
+(wall time and call count for each suite, group, scheme, and phase) and add
+routines to the host cap to report and reset the timers (the timing module,
+ccpp_timing.F90, is then listed with the utility files)""")
+
+    parser.add_argument("--jobs", type=int, default=1, metavar='N',
+                        help="""Number of processes to use for parsing
+metadata and Fortran files (default is 1, serial parsing)""")
+
+    parser.add_argument("--use-parse-cache", action='store_true', default=False,
+                        help="""Cache parsed metadata and Fortran files in
+<output_root>/{} and reuse them for unchanged input files""".format(_PARSE_CACHE_DIRNAME))
+
+    parser.add_argument("--incremental", action='store_true', default=False,
+                        help="""Use the datatable from the previous run to skip
+capgen entirely if no input file has changed. Otherwise, only the suites whose
+input files have changed are analyzed and rewritten, the analysis of the other
+suites is loaded from <output_root>/{} (all input files are still parsed, use
+--use-parse-cache to skip parsing unchanged files)""".format(_PARSE_CACHE_DIRNAME))
+
+    parser.add_argument("--profile", action='store_true', default=False,
+                        help="""Record the wall time, call count, and Python memory
+use (traced with tracemalloc) of each capgen phase in a JSON file next to the
+datatable""")
+
     parser.add_argument("--verbose", action='count', default=0,
                         help="Log more activity, repeat for increased output")
 
@@ -26,11 +26,11 @@ from parse_tools import ParseObject, ParseSource, ParseContext, ParseSyntaxError
 _HEADER = "cap for {host_model} calls to CCPP API"
 
 _SUBHEAD = '''
-   subroutine {host_model}_ccpp_physics_{stage}({api_vars})
+   subroutine {subname}({api_vars})
 '''
 
 _SUBFOOT = '''
-   end subroutine {host_model}_ccpp_physics_{stage}
+   end subroutine {subname}
 '''
 
 _API_SOURCE = ParseSource(API_SOURCE_NAME, "MODULE",
@@ -52,6 +52,42 @@ _SUITE_PART_VAR = Var({'local_name':'suite_part',
                        'kind':'len=*', 'units':'', 'protected':'True',
                        'dimensions':'()'}, _API_SOURCE, _API_DUMMY_RUN_ENV)
 
+_SUITE_HANDLE_VAR = Var({'local_name':'suite_handle',
+                         'standard_name':'suite_handle',
+                         'intent':'in', 'type':'integer',
+                         'units':'', 'protected':'True',
+                         'dimensions':'()'}, _API_SOURCE, _API_DUMMY_RUN_ENV)
+
+_PART_HANDLE_VAR = Var({'local_name':'part_handle',
+                        'standard_name':'suite_part_handle',
+                        'intent':'in', 'type':'integer',
+                        'units':'', 'protected':'True',
+                        'dimensions':'()'}, _API_SOURCE, _API_DUMMY_RUN_ENV)
+
+_CHUNK_SIZE_VAR = Var({'local_name':'chunk_size',
+                       'standard_name':'horizontal_chunk_size',
+                       'intent':'in', 'type':'integer',
+                       'units':'count', 'protected':'True',
+                       'dimensions':'()'}, _API_SOURCE, _API_DUMMY_RUN_ENV)
+
+_CHUNK_START_VAR = Var({'local_name':'chunk_start',
+                        'standard_name':'horizontal_chunk_begin',
+                        'type':'integer', 'units':'count',
+                        'dimensions':'()'}, _API_SOURCE, _API_DUMMY_RUN_ENV)
+
+_CHUNK_END_VAR = Var({'local_name':'chunk_end',
+                      'standard_name':'horizontal_chunk_end',
+                      'type':'integer', 'units':'count',
+                      'dimensions':'()'}, _API_SOURCE, _API_DUMMY_RUN_ENV)
+
+# Standard names of the thread variables supplied by the threaded run API
+_THREAD_NUMBER_STDNAME = 'ccpp_thread_number'
+_THREAD_COUNT_STDNAME = 'ccpp_thread_count'
+# Standard names which must be arguments of the host run phase interface
+#    for the threaded run API
+_THREADED_RUN_STDNAMES = ('horizontal_loop_begin', 'horizontal_loop_end',
+                          'ccpp_error_message', 'ccpp_error_code')
+
 ###############################################################################
 # Used for creating blank dictionary
 _MVAR_DUMMY_RUN_ENV = CCPPFrameworkEnv(None, ndict={'host_files':'',
@@ -78,6 +114,46 @@ def suite_part_list(suite, stage):
     # End if
     return spart_list
 
+###############################################################################
+def api_subname(host_model, stage):
+###############################################################################
+    """Return the name of the API subroutine for <stage> which selects the
+    suite (and suite part) by name.
+    Because this is a user interface API function, the name is fixed."""
+    return f"{host_model.name}_ccpp_physics_{stage}"
+
+###############################################################################
+def api_handle_subname(host_model, stage):
+###############################################################################
+    """Return the name of the API subroutine for <stage> which selects the
+    suite (and suite part) by integer handle.
+    Because this is a user interface API function, the name is fixed."""
+    return f"{host_model.name}_ccpp_physics_{stage}_by_handle"
+
+###############################################################################
+def api_threaded_subname(host_model):
+###############################################################################
+    """Return the name of the API subroutine which runs a suite part over
+    the horizontal loop in OpenMP threaded chunks.
+    Because this is a user interface API function, the name is fixed."""
+    return f"{host_model.name}_ccpp_physics_run_threaded"
+
+###############################################################################
+def api_timing_report_subname(host_model):
+###############################################################################
+    """Return the name of the API subroutine which writes the scheme
+    timing table (--instrument).
+    Because this is a user interface API function, the name is fixed."""
+    return f"{host_model.name}_ccpp_timing_report"
+
+###############################################################################
+def api_timing_reset_subname(host_model):
+###############################################################################
+    """Return the name of the API subroutine which resets the scheme
+    timers (--instrument).
+    Because this is a user interface API function, the name is fixed."""
+    return f"{host_model.name}_ccpp_timing_reset"
+
 ###############################################################################
 def constituent_num_suite_subname(host_model):
 ###############################################################################
@@ -517,6 +593,158 @@ def suite_part_call_list(host_model, const_dict, suite_part, subst_loop_vars,
     # End for
     return ', '.join(hmvars)
 
+###############################################################################
+def threaded_run_missing_args(host_model):
+###############################################################################
+    """Return the list of standard names required by the threaded run
+    interface which are not arguments of the <host_model> run phase
+    interface (e.g., because the host passes them in a DDT)."""
+    run_stdnames = [x.get_prop_value('standard_name')
+                    for x in host_model.call_list('run')]
+    return [x for x in _THREADED_RUN_STDNAMES if x not in run_stdnames]
+
+###############################################################################
+def write_threaded_run_sub(cap, host_model, api, hdvars):
+###############################################################################
+    """Write an API subroutine which divides the horizontal loop into chunks
+    of <chunk_size> columns and calls the handle-based run interface for
+    each chunk in an OpenMP parallel loop.
+    Each chunk has its own error variables, the first error is returned.
+    The thread number and thread count, if used by the suites, are supplied
+    by this routine rather than by the caller."""
+    host_vars = {x.get_prop_value('standard_name') : x for x in hdvars}
+    for stdname in _THREADED_RUN_STDNAMES:
+        if stdname not in host_vars:
+            emsg = f"Threaded run interface requires '{stdname}' as an "
+            emsg += f"argument of the {host_model.name} run phase interface"
+            raise CCPPError(emsg)
+        # end if
+    # end for
+    subname = api_threaded_subname(host_model)
+    col_start = host_vars['horizontal_loop_begin'].get_prop_value('local_name')
+    col_end = host_vars['horizontal_loop_end'].get_prop_value('local_name')
+    errmsg_var = host_vars['ccpp_error_message']
+    errflg_var = host_vars['ccpp_error_code']
+    errmsg_name = errmsg_var.get_prop_value('local_name')
+    errflg_name = errflg_var.get_prop_value('local_name')
+    chunk_errmsg = errmsg_var.clone(unique_local_name('chunk_errmsg',
+                                                      host_model),
+                                    remove_intent=True)
+    chunk_errflg = errflg_var.clone(unique_local_name('chunk_errflg',
+                                                      host_model),
+                                    remove_intent=True)
+    thread_num = host_vars.get(_THREAD_NUMBER_STDNAME, None)
+    thread_cnt = host_vars.get(_THREAD_COUNT_STDNAME, None)
+    dummy_vars = [x for x in hdvars if x not in (thread_num, thread_cnt)]
+    local_vars = [_CHUNK_START_VAR, _CHUNK_END_VAR, chunk_errmsg, chunk_errflg]
+    local_vars.extend([x for x in (thread_num, thread_cnt) if x is not None])
+    # The call to the handle-based interface uses the chunk variables
+    call_subst = {col_start : _CHUNK_START_VAR.get_prop_value('local_name'),
+                  col_end : _CHUNK_END_VAR.get_prop_value('local_name'),
+                  errmsg_name : chunk_errmsg.get_prop_value('local_name'),
+                  errflg_name : chunk_errflg.get_prop_value('local_name')}
+    handle_lnames = [x.get_prop_value('local_name')
+                     for x in (_SUITE_HANDLE_VAR, _PART_HANDLE_VAR)]
+    hd_lnames = [x.get_prop_value('local_name') for x in hdvars]
+    call_lnames = handle_lnames + [call_subst.get(x, x) for x in hd_lnames]
+    dummy_lnames = [x.get_prop_value('local_name') for x in dummy_vars]
+    api_vlist = ", ".join(handle_lnames +
+                          [_CHUNK_SIZE_VAR.get_prop_value('local_name')] +
+                          dummy_lnames)
+    private_lnames = [x.get_prop_value('local_name') for x in local_vars
+                      if x is not thread_cnt]
+    cap.write(_SUBHEAD.format(api_vars=api_vlist, subname=subname), 1)
+    omp_funcs = list()
+    if thread_num is not None:
+        omp_funcs.append('omp_get_thread_num')
+    # end if
+    if thread_cnt is not None:
+        omp_funcs.append('omp_get_max_threads')
+    # end if
+    if omp_funcs:
+        cap.write(f"!$ use omp_lib, only: {', '.join(omp_funcs)}", 2)
+    # end if
+    # Write out any host model DDT input var use statements
+    host_model.ddt_lib.write_ddt_use_statements(dummy_vars, cap, 2)
+    cap.write("", 1)
+    # Write out dummy argument definitions
+    for var in (_SUITE_HANDLE_VAR, _PART_HANDLE_VAR, _CHUNK_SIZE_VAR):
+        var.write_def(cap, 2, host_model, dummy=True)
+    # End for
+    for var in dummy_vars:
+        var.write_def(cap, 2, host_model, dummy=True)
+    # End for
+    for var in local_vars:
+        var.write_def(cap, 2, host_model)
+    # End for
+    cap.write('', 0)
+    cap.write(f'{errflg_name} = 0', 2)
+    cap.write(f'{errmsg_name} = ""', 2)
+    chunk_size = _CHUNK_SIZE_VAR.get_prop_value('local_name')
+    cap.write(f"if ({chunk_size} < 1) then", 2)
+    emsg = f"write({errmsg_name}, '(a,i0)') "
+    emsg += f'"Invalid chunk size, ", {chunk_size}'
+    cap.write(emsg, 3)
+    cap.write(f"{errflg_name} = 1", 3)
+    cap.write("return", 3)
+    cap.write("end if", 2)
+    if thread_cnt is not None:
+        cnt_name = thread_cnt.get_prop_value('local_name')
+        cap.write(f"{cnt_name} = 1", 2)
+        cap.write(f"!$ {cnt_name} = omp_get_max_threads()", 2)
+    # end if
+    chunk_start = _CHUNK_START_VAR.get_prop_value('local_name')
+    chunk_end = _CHUNK_END_VAR.get_prop_value('local_name')
+    cap.write("!$omp parallel do default(shared) schedule(dynamic) &", 2)
+    cap.write(f"!$omp private({', '.join(private_lnames)})", 2)
+    stmt = f"do {chunk_start} = {col_start}, {col_end}, {chunk_size}"
+    cap.write(stmt, 2)
+    stmt = f"{chunk_end} = min({chunk_start} + {chunk_size} - 1, {col_end})"
+    cap.write(stmt, 3)
+    if thread_num is not None:
+        num_name = thread_num.get_prop_value('local_name')
+        cap.write(f"{num_name} = 1", 3)
+        cap.write(f"!$ {num_name} = omp_get_thread_num() + 1", 3)
+    # end if
+    call_str = ", ".join(call_lnames)
+    cap.write(f"call {api_handle_subname(host_model, 'run')}({call_str})", 3)
+    cap.write(f"if ({chunk_errflg.get_prop_value('local_name')} /= 0) then",
+              3)
+    cap.write(f"!$omp critical ({subname})", 4)
+    cap.write(f"if ({errflg_name} == 0) then", 4)
+    cap.write(f"{errflg_name} = {chunk_errflg.get_prop_value('local_name')}",
+              5)
+    cap.write(f"{errmsg_name} = {chunk_errmsg.get_prop_value('local_name')}",
+              5)
+    cap.write("end if", 4)
+    cap.write(f"!$omp end critical ({subname})", 4)
+    cap.write("end if", 3)
+    cap.write("end do", 2)
+    cap.write("!$omp end parallel do", 2)
+    cap.write(_SUBFOOT.format(subname=subname), 1)
+
+###############################################################################
+def write_timing_subs(cap, host_model):
+###############################################################################
+    """Write the API subroutines which write and reset the table of
+    scheme call timers (wall time and call count for each suite, group,
+    scheme, and phase)"""
+    subname = api_timing_report_subname(host_model)
+    cap.write(_SUBHEAD.format(api_vars="unit", subname=subname), 1)
+    cap.write("use ccpp_timing, only: ccpp_timing_report", 2)
+    cap.write("", 0)
+    cap.comment("Dummy argument (default output unit is 6)", 2)
+    cap.write("integer, optional, intent(in) :: unit", 2)
+    cap.write("", 0)
+    cap.write("call ccpp_timing_report(unit)", 2)
+    cap.write(_SUBFOOT.format(subname=subname), 1)
+    subname = api_timing_reset_subname(host_model)
+    cap.write(_SUBHEAD.format(api_vars="", subname=subname), 1)
+    cap.write("use ccpp_timing, only: ccpp_timing_reset", 2)
+    cap.write("", 0)
+    cap.write("call ccpp_timing_reset()", 2)
+    cap.write(_SUBFOOT.format(subname=subname), 1)
+
 ###############################################################################
 def write_host_cap(host_model, api, module_name, output_dir, run_env):
 ###############################################################################
@@ -526,8 +754,25 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
         msg = 'Writing CCPP Host Model Cap for {} to {}'
         run_env.logger.info(msg.format(host_model.name, cap_filename))
     # End if
+    # The threaded run API is skipped (with a warning) for hosts which do
+    #    not pass the loop bounds and error variables as arguments
+    threaded_run = run_env.threaded_run
+    if threaded_run:
+        missing = threaded_run_missing_args(host_model)
+        if missing:
+            threaded_run = False
+            if run_env.logger is not None:
+                msg = "Not writing {}: {} must be arguments of the {} "
+                msg += "run phase interface"
+                run_env.logger.warning(msg.format(
+                    api_threaded_subname(host_model),
+                    ", ".join(f"'{x}'" for x in missing), host_model.name))
+            # End if
+        # End if
+    # End if
     header = _HEADER.format(host_model=host_model.name)
-    with FortranWriter(cap_filename, 'w', header, module_name) as cap:
+    with FortranWriter(cap_filename, 'w', header, module_name,
+                       buffered=True) as cap:
         # Write module use statements
         maxmod = len(KINDS_MODULE)
         cap.write('   use {kinds}'.format(kinds=KINDS_MODULE), 1)
@@ -554,9 +799,16 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
         cap.comment("Public Interfaces", 1)
         # CCPP_STATE_MACH.transitions represents the host CCPP interface
         for stage in CCPP_STATE_MACH.transitions():
-            stmt = "public :: {host_model}_ccpp_physics_{stage}"
-            cap.write(stmt.format(host_model=host_model.name, stage=stage), 1)
+            cap.write(f"public :: {api_subname(host_model, stage)}", 1)
+            cap.write(f"public :: {api_handle_subname(host_model, stage)}", 1)
         # End for
+        if threaded_run:
+            cap.write(f"public :: {api_threaded_subname(host_model)}", 1)
+        # End if
+        if run_env.instrument:
+            cap.write(f"public :: {api_timing_report_subname(host_model)}", 1)
+            cap.write(f"public :: {api_timing_reset_subname(host_model)}", 1)
+        # End if
         API.declare_inspection_interfaces(cap)
         # Write the host-model interfaces for constituents
         reg_name = constituent_register_subname(host_model)
@@ -662,11 +914,19 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
                 hdvars.append(hvar.clone(subst_dict,
                                          source_name=API_SOURCE_NAME))
             # End for
-            lnames = [x.get_prop_value('local_name') for x in apivars + hdvars]
-            api_vlist = ", ".join(lnames)
+            # The handle-based interface selects the suite (and suite part)
+            # with integer handles
+            handle_vars = [_SUITE_HANDLE_VAR]
+            if run_stage:
+                handle_vars.append(_PART_HANDLE_VAR)
+            # End if
+            hd_lnames = [x.get_prop_value('local_name') for x in hdvars]
+            handle_lnames = [x.get_prop_value('local_name')
+                             for x in handle_vars]
+            api_vlist = ", ".join(handle_lnames + hd_lnames)
+            handle_subname = api_handle_subname(host_model, stage)
             cap.write(_SUBHEAD.format(api_vars=api_vlist,
-                                      host_model=host_model.name,
-                                      stage=stage), 1)
+                                      subname=handle_subname), 1)
             # Write out any suite part use statements
             for suite in api.suites:
                 mspc = (max_suite_len - len(suite.module))*' '
@@ -682,7 +942,7 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
 
             cap.write("", 1)
             # Write out dummy argument definitions
-            for var in apivars:
+            for var in handle_vars:
                 var.write_def(cap, 2, host_model, dummy=True)
             # End for
             for var in hdvars:
@@ -698,30 +958,26 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
             # Initialize err variables
             cap.write('{errflg} = 0'.format(errflg=errflg_name), 2)
             cap.write('{errmsg} = ""'.format(errmsg=errmsg_name), 2)
-            else_str = ''
-            for suite in api.suites:
-                stmt = "{}if (trim(suite_name) == '{}') then"
-                cap.write(stmt.format(else_str, suite.name), 2)
+            cap.write("select case (suite_handle)", 2)
+            for handle, suite in api.suite_handles():
+                cap.write(f"case ({handle})", 2)
                 if stage == 'run':
-                    el2_str = ''
+                    cap.write("select case (part_handle)", 3)
                     spart_list = suite_part_list(suite, stage)
-                    for spart in spart_list:
-                        pname = spart.name[len(suite.name)+1:]
-                        stmt = "{}if (trim(suite_part) == '{}') then"
-                        cap.write(stmt.format(el2_str, pname), 3)
+                    for phandle, spart in enumerate(spart_list, 1):
+                        cap.write(f"case ({phandle})", 3)
                         call_str = suite_part_call_list(host_model, const_dict,
                                                         spart, True)
                         cap.write("call {}({})".format(spart.name, call_str), 4)
-                        el2_str = 'else '
                     # End for
-                    cap.write("else", 3)
-                    emsg = "write({errmsg}, '(3a)')".format(errmsg=errmsg_name)
-                    emsg += '"No suite part named ", '
-                    emsg += 'trim(suite_part), '
+                    cap.write("case default", 3)
+                    emsg = "write({errmsg}, '(a,i0,a)')".format(errmsg=errmsg_name)
+                    emsg += '"No suite part with handle ", '
+                    emsg += 'part_handle, '
                     emsg += '" found in suite {sname}"'.format(sname=suite.name)
                     cap.write(emsg, 4)
                     cap.write("{errflg} = 1".format(errflg=errflg_name), 4)
-                    cap.write("end if", 3)
+                    cap.write("end select", 3)
                 elif stage == 'register':
                     spart = suite.phase_group(stage)
                     dyn_const_array = suite_dynamic_constituent_array_name(host_model, suite.name)
@@ -767,18 +1023,72 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
                     stmt = "call {}_{}({})"
                     cap.write(stmt.format(suite.name, stage, call_str), 3)
                 # End if
-                else_str = 'else '
             # End for
-            cap.write("else", 2)
+            cap.write("case default", 2)
+            emsg = "write({errmsg}, '(a,i0,a)')".format(errmsg=errmsg_name)
+            emsg += '"No suite with handle ", '
+            emsg += 'suite_handle, " found"'
+            cap.write(emsg, 3)
+            cap.write("{errflg} = 1".format(errflg=errflg_name), 3)
+            cap.write("end select", 2)
+            cap.write(_SUBFOOT.format(subname=handle_subname), 1)
+            # The name-based interface looks up the handles and calls the
+            # handle-based interface
+            lnames = [x.get_prop_value('local_name') for x in apivars]
+            api_vlist = ", ".join(lnames + hd_lnames)
+            subname = api_subname(host_model, stage)
+            cap.write(_SUBHEAD.format(api_vars=api_vlist, subname=subname), 1)
+            # Write out any host model DDT input var use statements
+            host_model.ddt_lib.write_ddt_use_statements(hdvars, cap, 2,
+                                                        pad=max_suite_len)
+            cap.write("", 1)
+            # Write out dummy argument definitions
+            for var in apivars:
+                var.write_def(cap, 2, host_model, dummy=True)
+            # End for
+            for var in hdvars:
+                var.write_def(cap, 2, host_model, dummy=True)
+            # End for
+            for var in handle_vars:
+                var.write_def(cap, 2, host_model)
+            # End for
+            cap.write('', 0)
+            cap.write('{errflg} = 0'.format(errflg=errflg_name), 2)
+            cap.write('{errmsg} = ""'.format(errmsg=errmsg_name), 2)
+            stmt = f"suite_handle = {API.suite_handle_funcname()}(suite_name)"
+            cap.write(stmt, 2)
+            cap.write("if (suite_handle == 0) then", 2)
             emsg = "write({errmsg}, '(3a)')".format(errmsg=errmsg_name)
             emsg += '"No suite named ", '
             emsg += 'trim(suite_name), "found"'
             cap.write(emsg, 3)
             cap.write("{errflg} = 1".format(errflg=errflg_name), 3)
+            cap.write("return", 3)
             cap.write("end if", 2)
-            cap.write(_SUBFOOT.format(host_model=host_model.name,
-                                      stage=stage), 1)
+            if run_stage:
+                stmt = f"part_handle = {API.part_handle_funcname()}"
+                stmt += "(suite_handle, suite_part)"
+                cap.write(stmt, 2)
+                cap.write("if (part_handle == 0) then", 2)
+                emsg = "write({errmsg}, '(4a)')".format(errmsg=errmsg_name)
+                emsg += '"No suite part named ", '
+                emsg += 'trim(suite_part), '
+                emsg += '" found in suite ", trim(suite_name)'
+                cap.write(emsg, 3)
+                cap.write("{errflg} = 1".format(errflg=errflg_name), 3)
+                cap.write("return", 3)
+                cap.write("end if", 2)
+            # End if
+            call_str = ", ".join(handle_lnames + hd_lnames)
+            cap.write(f"call {handle_subname}({call_str})", 2)
+            cap.write(_SUBFOOT.format(subname=subname), 1)
+            if run_stage and threaded_run:
+                write_threaded_run_sub(cap, host_model, api, hdvars)
+            # End if
         # End for
+        if run_env.instrument:
+            write_timing_subs(cap, host_model)
+        # End if
         # Write the API inspection routines (e.g., list of suites)
         api.write_inspection_routines(cap)
         # Write the constituent initialization interfaces
@@ -201,6 +201,23 @@ class HostModel(VarDictionary):
         # End for
         return varset
 
+    def swap_used_variable_record(self, record):
+        """Replace the record of requested host model variables with
+        <record> and return the previous record. A record is a tuple of the
+        set of local names found and the set of standard names not found
+        (deferred finds)."""
+        prev_record = (self.__used_variables, self.__deferred_finds)
+        self.__used_variables, self.__deferred_finds = record
+        return prev_record
+
+    def add_used_variable_record(self, record):
+        """Add the requested host model variables in <record> (see
+        swap_used_variable_record) to the current record, e.g., the
+        variables requested by a previous analysis of a suite."""
+        used_variables, deferred_finds = record
+        self.__used_variables.update(used_variables)
+        self.__deferred_finds.update(deferred_finds)
+
     def find_variable(self, standard_name=None, source_var=None,
                       any_scope=False, clone=None,
                       search_call_list=False, loop_subst=False):
@@ -15,8 +15,8 @@ from mkcap import Var
 
 sys.path.append(os.path.join(os.path.split(__file__)[0], 'fortran_tools'))
 from parse_fortran import FtypeTypeDecl
-from parse_checkers import registered_fortran_ddt_names
-from parse_tools import init_log
+from parse_checkers import registered_fortran_ddt_names, register_fortran_ddt_name
+from parse_tools import init_log, ParseCache, file_hash
 from metadata_table import MetadataTable, parse_metadata_file
 from framework_env import CCPPFrameworkEnv
 
@@ -67,39 +67,141 @@ CCPP_MANDATORY_VARIABLES = {
 # Save metadata to avoid repeated parsing of type/variable definition files
 NEW_METADATA_SAVE = {}
 
+# Optional on-disk cache of parsed metadata files, shared by prebuild runs
+_METADATA_CACHE = None
+
 ###############################################################################
 
+def set_metadata_cache_dir(cache_dir):
+    """Use the on-disk cache in cache_dir to store and retrieve parsed metadata
+    files, so that unchanged files are not parsed again by later runs. Entries
+    are keyed by the file path and contents and by the framework version.
+    If cache_dir is None, no on-disk cache is used."""
+    global _METADATA_CACHE
+    if cache_dir:
+        _METADATA_CACHE = ParseCache(cache_dir, _DUMMY_RUN_ENV)
+    else:
+        _METADATA_CACHE = None
+
+def metadata_cache_dir():
+    """Return the directory of the on-disk metadata cache or None if
+    no on-disk cache is used"""
+    if _METADATA_CACHE:
+        return _METADATA_CACHE.cache_dir
+    return None
+
+def register_metadata_ddts(new_metadata_headers):
+    """Register the DDTs defined in new_metadata_headers, as happens
+    when the metadata file is parsed"""
+    for new_metadata_header in new_metadata_headers:
+        if new_metadata_header.table_type == 'ddt':
+            register_fortran_ddt_name(new_metadata_header.table_name)
+        for metadata_section in new_metadata_header.sections():
+            if metadata_section.header_type == 'ddt':
+                register_fortran_ddt_name(metadata_section.title)
+
+def parse_new_metadata_file(filename):
+    """Parse metadata file filename in new format, or retrieve the result
+    from the on-disk metadata cache if the file has not changed"""
+    if not _METADATA_CACHE:
+        return parse_metadata_file(filename, known_ddts=registered_fortran_ddt_names(),
+                                   run_env=_DUMMY_RUN_ENV)
+    cache_key = _METADATA_CACHE.key(os.path.abspath(filename), file_hash(filename))
+    # Registering more DDTs cannot change a successful parse, a cache entry
+    # is valid if the DDTs registered when it was stored still are
+    registered_ddts = set(registered_fortran_ddt_names())
+    entry = _METADATA_CACHE.load(cache_key)
+    if entry is not None and entry[0] <= registered_ddts:
+        logging.debug("Using cached metadata for {0}".format(filename))
+        register_metadata_ddts(entry[1])
+        return entry[1]
+    new_metadata_headers = parse_metadata_file(filename, known_ddts=registered_fortran_ddt_names(),
+                                               run_env=_DUMMY_RUN_ENV)
+    _METADATA_CACHE.store(cache_key, (registered_ddts, new_metadata_headers))
+    return new_metadata_headers
+
+
+class MetadataIndex(object):
+    """Index of metadata variables (class Var in mkcap.py) by standard_name.
+    For each standard_name, the index keeps the compatibility signature of the
+    variables and one variable per kind, so that testing a new variable against
+    all existing entries takes constant time. Incompatible variables are not
+    added to the index; instead, an error message is recorded for each of them,
+    which allows reporting all mismatches at once."""
+
+    def __init__(self):
+        self._records = {}
+        self._errors = []
+
+    def add(self, standard_name, var):
+        """Add var to the index. Return None if var is compatible with all
+        existing entries for standard_name, otherwise return the first
+        incompatible existing entry (var is not added in this case)."""
+        if not standard_name in self._records:
+            self._records[standard_name] = (var.signature, {var.kind : var}, [var])
+            return None
+        (signature, kinds, variables) = self._records[standard_name]
+        if not var.signature == signature:
+            return variables[0]
+        if not var.kind in kinds:
+            for (kind, existing_var) in kinds.items():
+                if not Var.kind_compatible(kind, var.kind):
+                    return existing_var
+            kinds[var.kind] = var
+        variables.append(var)
+        return None
+
+    def update(self, metadata):
+        """Add all variables in the metadata dictionary to the index and
+        record an error message for each incompatible variable."""
+        for (standard_name, variables) in metadata.items():
+            for var in variables:
+                existing_var = self.add(standard_name, var)
+                if existing_var is not None:
+                    self._errors.append('Incompatible entries in metadata for variable {0}:\n'.format(standard_name) +\
+                                        '    {0}\n'.format(existing_var.print_debug()) +\
+                                        'vs. {0}'.format(var.print_debug()))
+
+    @property
+    def errors(self):
+        """Return the list of error messages recorded by update"""
+        return self._errors
+
+    def check(self):
+        """Raise an exception listing all incompatible entries, if any"""
+        if self._errors:
+            raise Exception('\n'.join(self._errors))
+
+    def metadata(self):
+        """Return the metadata dictionary, sorted by standard_name"""
+        return collections.OrderedDict((standard_name, self._records[standard_name][2])
+                                       for standard_name in sorted(self._records.keys()))
+
+
 def merge_dictionaries(x, y):
-    """Merges two metadata dictionaries. For each list of elements
-    (variables = class Var in mkcap.py) in one dictionary, we know
-    that all entries are compatible. If one or more elements exist
-    in both x and y, we therefore have to test compatibility of
-    one of the items in each dictionary only."""
+    """Merges two metadata dictionaries. Each variable (class Var in mkcap.py)
+    is tested for compatibility with the existing entries using a MetadataIndex,
+    and all incompatible entries are reported at once."""
+    index = MetadataIndex()
     z = collections.OrderedDict()
-    x_keys = sorted(x.keys())
-    y_keys = sorted(y.keys())
-    z_keys = sorted(list(set(x_keys + y_keys)))
-    for key in z_keys:
-        z[key] = collections.OrderedDict()
-        if key in x_keys and key in y_keys:
-            # Metadata dictionaries containing lists of variables of type Var for each key=standard_name
-            if isinstance(x[key][0], Var):
-                # We know that all entries within each dictionary are compatible;
-                # we need to test compatibility of one of the items in each only.
-                if not x[key][0].compatible(y[key][0]):
-                    raise Exception('Incompatible entries in metadata for variable {0}:\n'.format(key) +\
-                                    '    {0}\n'.format(x[key][0].print_debug()) +\
-                                    'vs. {0}'.format(y[key][0].print_debug()))
-                z[key] = x[key] + y[key]
+    for key in sorted(set(x.keys()) | set(y.keys())):
+        entries = [metadata[key] for metadata in (x, y) if key in metadata]
+        if entries[0] and not isinstance(entries[0][0], Var):
+            if len(entries) == 1:
+                z[key] = entries[0]
             # Physics set dictionaries containing lists of physics sets of type string for each key=standard_name
-            elif type(x[key][0]) is str:
-                z[key] = list(set(x[key] + y[key]))
+            elif type(entries[0][0]) is str:
+                z[key] = list(set(entries[0] + entries[1]))
             else:
-                raise Exception("x[key][0] is of unsupported type", type(x[key][0]))
-        elif key in x_keys:
-            z[key] = x[key]
-        elif key in y_keys:
-            z[key] = y[key]
+                raise Exception("x[key][0] is of unsupported type", type(entries[0][0]))
+            continue
+        index.update({key : [var for variables in entries for var in variables]})
+        z[key] = None
+    index.check()
+    merged = index.metadata()
+    for key in z.keys():
+        if z[key] is None:
+            z[key] = merged.get(key, [])
     return z
 
 def read_new_metadata(filename, module_name, table_name, scheme_name = None, subroutine_name = None):
@@ -112,8 +214,7 @@ def read_new_metadata(filename, module_name, table_name, scheme_name = None, sub
     if filename in NEW_METADATA_SAVE.keys():
         new_metadata_headers = NEW_METADATA_SAVE[filename]
     else:
-        new_metadata_headers = parse_metadata_file(filename, known_ddts=registered_fortran_ddt_names(),
-                                                                                run_env=_DUMMY_RUN_ENV)
+        new_metadata_headers = parse_new_metadata_file(filename)
         NEW_METADATA_SAVE[filename] = new_metadata_headers
 
     # Record dependencies for the metadata table (only applies to schemes)
@@ -257,6 +358,8 @@ def read_new_metadata(filename, module_name, table_name, scheme_name = None, sub
 
 def parse_variable_tables(filepath, filename):
     """Parses metadata tables on the host model side that define the available variables.
+    The file <filename> (and its metadata file) is read from directory <filepath>,
+    the current working directory is not used.
     Metadata tables can refer to variables inside a module or as part of a derived
     datatype, which itself is defined inside a module (depending on the location of the
     metadata table). Each variable (standard_name) can exist only once, i.e. each entry
@@ -267,6 +370,8 @@ def parse_variable_tables(filepath, filename):
 
     # Final metadata container for all variables in file
     metadata = collections.OrderedDict()
+    # Index for testing the compatibility of new entries with existing ones
+    index = MetadataIndex()
 
     # Registry of modules and derived data types in file
     registry = collections.OrderedDict()
@@ -275,7 +380,7 @@ def parse_variable_tables(filepath, filename):
     dependencies = collections.OrderedDict()
 
     # Read all lines of the file at once
-    with (open(filename, 'r')) as file:
+    with (open(os.path.join(filepath, filename), 'r')) as file:
         try:
             file_lines = file.readlines()
         except UnicodeDecodeError:
@@ -415,7 +520,7 @@ def parse_variable_tables(filepath, filename):
                         words = line.split()
                         if words[0] == '!!' and words[1] == '\\htmlinclude' and len(words) == 3:
                             filename_parts = filename.split('.')
-                            metadata_filename = '.'.join(filename_parts[0:len(filename_parts)-1]) + '.meta'
+                            metadata_filename = os.path.join(filepath, '.'.join(filename_parts[0:len(filename_parts)-1]) + '.meta')
                             (this_metadata, these_dependencies) = read_new_metadata(metadata_filename, module_name, table_name)
                             if these_dependencies:
                                 # Remove duplicates when combining lists
@@ -428,18 +533,17 @@ def parse_variable_tables(filepath, filename):
                                                         ' is incompatible with mandatory variable:\n' +\
                                                         '    existing: {0}\n'.format(CCPP_MANDATORY_VARIABLES[var_name].print_debug()) +\
                                                         '     vs. new: {0}'.format(var.print_debug()))
+                                    existing_var = index.add(var_name, var)
+                                    if existing_var is not None:
+                                        raise Exception('New entry for variable {0}'.format(var_name) + \
+                                                        ' in argument table {0}'.format(table_name) +\
+                                                        ' is incompatible with existing entry:\n' +\
+                                                        '    existing: {0}\n'.format(existing_var.print_debug()) +\
+                                                        '     vs. new: {0}'.format(var.print_debug()))
                                     # Add variable to metadata dictionary
                                     if not var_name in metadata.keys():
                                         metadata[var_name] = [var]
                                     else:
-                                        for existing_var in metadata[var_name]:
-                                            if not existing_var.compatible(var):
-                                                raise Exception('New entry for variable {0}'.format(var_name) + \
-                                                                ' in argument table {0}'.format(table_name) +\
-                                                                ' is incompatible with existing entry:\n' +\
-                                                                '    existing: {0}\n'.format(existing_var.print_debug()) +\
-                                                                '     vs. new: {0}'.format(var.print_debug()))
-
                                         metadata[var_name].append(var)
                         else:
                             raise Exception("Invalid definition of new metadata format in file {}, \htmlinclude must be preceeded by '!! ' : {}".format(filename, line))
@@ -519,7 +623,9 @@ def parse_variable_tables(filepath, filename):
 
 def parse_scheme_tables(filepath, filename):
     """Parses metadata tables for a physics scheme that requests/requires variables as
-    input arguments. Metadata tables can only describe variables required by a subroutine
+    input arguments. The file <filename> (and its metadata file) is read from directory
+    <filepath>, the current working directory is not used.
+    Metadata tables can only describe variables required by a subroutine
     'subroutine_name' of scheme 'scheme_name' inside a module 'module_name'. Each variable
     (standard_name) can exist only once, i.e. each entry (list of variables) in the metadata
     dictionary  contains only one element (variable = instance of class Var defined in
@@ -536,6 +642,8 @@ def parse_scheme_tables(filepath, filename):
 
     # Final metadata container for all variables in file
     metadata = collections.OrderedDict()
+    # Index for testing the compatibility of new entries with existing ones
+    index = MetadataIndex()
 
     # Registry of modules and derived data types in file
     registry = collections.OrderedDict()
@@ -547,7 +655,7 @@ def parse_scheme_tables(filepath, filename):
     dependencies = collections.OrderedDict()
 
     # Read all lines of the file at once
-    with (open(filename, 'r')) as file:
+    with (open(os.path.join(filepath, filename), 'r')) as file:
         try:
             file_lines = file.readlines()
         except UnicodeDecodeError:
@@ -696,7 +804,7 @@ def parse_scheme_tables(filepath, filename):
                         words = lines[header_line_number].split()
                         if words[0] == '!!' and words[1] == '\\htmlinclude' and len(words) == 3:
                             filename_parts = filename.split('.')
-                            metadata_filename = '.'.join(filename_parts[0:len(filename_parts)-1]) + '.meta'
+                            metadata_filename = os.path.join(filepath, '.'.join(filename_parts[0:len(filename_parts)-1]) + '.meta')
                             (this_metadata, these_dependencies) = read_new_metadata(metadata_filename, module_name, table_name,
                                                                                     scheme_name=scheme_name, subroutine_name=subroutine_name)
                             if these_dependencies:
@@ -708,16 +816,16 @@ def parse_scheme_tables(filepath, filename):
                                 # For all instances of this var (can be only one) in this subroutine's metadata,
                                 # add to global metadata and check for compatibility with existing variables
                                 for var in this_metadata[var_name]:
+                                    existing_var = index.add(var_name, var)
+                                    if existing_var is not None:
+                                        raise Exception('New entry for variable {0}'.format(var_name) + \
+                                                        ' in argument table of subroutine {0}'.format(subroutine_name) +\
+                                                        ' is incompatible with existing entry:\n' +\
+                                                        '    existing: {0}\n'.format(existing_var.print_debug()) +\
+                                                        '     vs. new: {0}'.format(var.print_debug()))
                                     if not var_name in metadata.keys():
                                         metadata[var_name] = [var]
                                     else:
-                                        for existing_var in metadata[var_name]:
-                                            if not existing_var.compatible(var):
-                                                raise Exception('New entry for variable {0}'.format(var_name) + \
-                                                                ' in argument table of subroutine {0}'.format(subroutine_name) +\
-                                                                ' is incompatible with existing entry:\n' +\
-                                                                '    existing: {0}\n'.format(existing_var.print_debug()) +\
-                                                                '     vs. new: {0}'.format(var.print_debug()))
                                         metadata[var_name].append(var)
                         else:
                             raise Exception("Invalid definition of new metadata format in file {}, \htmlinclude must be preceeded by '!! ' : {}".format(filename, lines[header_line_number]))
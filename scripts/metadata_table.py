@@ -265,6 +265,51 @@ def find_scheme_names(filename):
 
 ########################################################################
 
+def find_ddt_names(filename):
+    """Find and return a list of all the DDT table names in <filename>
+    (in file order). Unlike register_ddts, the names are returned with
+    the case used in the file and no names are registered.
+    """
+    ddt_names = []
+    with open(filename, 'r') as infile:
+        fin_lines = infile.readlines()
+    # end with
+    context = ParseContext(linenum=0, filename=filename)
+    in_table = False
+    table_name = ''
+    table_type = ''
+    for line in fin_lines + [None]:
+        context.line_num += 1
+        if line is not None:
+            line = line.strip()
+            if blank_metadata_line(line):
+                continue
+            # end if
+        # end if
+        table_start = MetadataTable.table_start(line)
+        if (line is None) or table_start or MetadataSection.header_start(line):
+            # We have exited the table properties (or reached the end of file)
+            if in_table and (table_type == 'ddt') and table_name:
+                ddt_names.append(table_name)
+            # end if
+            in_table = table_start
+            table_name = ''
+            table_type = ''
+        elif in_table:
+            for prop in _parse_config_line(line, context):
+                key = prop[0].lower()
+                if key == 'name':
+                    table_name = prop[1]
+                elif key == 'type':
+                    table_type = prop[1].lower()
+                # end if
+            # end for
+        # end if
+    # end for
+    return ddt_names
+
+########################################################################
+
 def register_ddts(file_list):
     """Scan the metadata files in <file_list> and register all
        DDT tables found.
@@ -12,6 +12,8 @@ VarDictionary: Class to hold all CCPP variables of a CCPP unit (e.g., suite,
 
 # Python library imports
 import re
+import sys
+import weakref
 from collections import OrderedDict
 # CCPP framework imports
 from framework_env import CCPPFrameworkEnv
@@ -163,6 +165,11 @@ class Var:
             ParseSource('vname', 'SCHEME', ParseContext()), _MVAR_DUMMY_RUN_ENV), \
             _MVAR_DUMMY_RUN_ENV) #doctest: +ELLIPSIS
     <var_props.VarCompatObj object at ...>
+
+    # Check that a clone shares the frozen context of the original Var
+    >>> _var = Var({'local_name' : 'foo', 'standard_name' : 'hi_mom', 'units' : 'm s-1', 'dimensions' : '()', 'type' : 'real', 'intent' : 'in'}, ParseSource('vname', 'SCHEME', ParseContext()), _MVAR_DUMMY_RUN_ENV)
+    >>> _var.clone('bar').context is _var.context
+    True
     """
 
     ## Prop lists below define all the allowed CCPP Metadata attributes
@@ -261,6 +268,19 @@ class Var:
     __var_propdict.update({p.name : p for p in __constituent_props})
     # All constituent props are optional so no check
 
+    # Properties whose values are interned. Large models have many
+    #   variables but few distinct units, types, kinds, and dimensions.
+    __interned_props = ('units', 'type', 'kind', 'dimensions')
+
+    # Frozen contexts created for Var objects. These are never modified
+    #   so they may be shared by any Var which is created from one.
+    __frozen_contexts = weakref.WeakSet()
+
+    # Var objects are numerous, do not give each one a __dict__
+    __slots__ = ('__parent_var', '__children', '__clone_source', '__run_env',
+                 '__required_props', '__source', '_context', '__intrinsic',
+                 '__is_constituent', '_prop_dict')
+
     def __init__(self, prop_dict, source, run_env, context=None,
                  clone_source=None):
         """Initialize a new Var object.
@@ -274,7 +294,7 @@ class Var:
             source of a cloned variable.
         """
         self.__parent_var = None # for array references
-        self.__children = list() # This Var's array references
+        self.__children = None # This Var's array references (if any)
         self.__clone_source = clone_source
         self.__run_env = run_env
         if isinstance(prop_dict, Var):
@@ -292,12 +312,15 @@ class Var:
 # XXgoldyXX: ^ don't fill in default properties?
         # end if
         self.__source = source
-        # Grab a frozen copy of the context
+        # Grab a frozen copy of the context (unless it is already frozen)
         if context is None:
-            self._context = ParseContext(context=source.context)
-        else:
-            self._context = context
+            context = source.context
+            if context not in Var.__frozen_contexts:
+                context = ParseContext(context=context)
+                Var.__frozen_contexts.add(context)
+            # end if
         # end if
+        self._context = context
         # First, check the input
         if 'ddt_type' in prop_dict:
             # Special case to bypass normal type rules
@@ -348,6 +371,11 @@ class Var:
             # end if
         # end for
         # Steal dict from caller
+        for prop_name in Var.__interned_props:
+            if prop_name in prop_dict:
+                prop_dict[prop_name] = Var.__intern_value(prop_dict[prop_name])
+            # end if
+        # end for
         self._prop_dict = prop_dict
 # XXgoldyXX: v don't fill in default properties?
 #        # Fill in default values for missing properties
@@ -374,6 +402,19 @@ class Var:
                                    context=self.context) from cperr
         # end try
 
+    @staticmethod
+    def __intern_value(value):
+        """Return an interned version of <value> if it is a string.
+        If <value> is a list, intern its string elements in place (the list
+        may be shared with other prop_dicts)."""
+        if isinstance(value, str):
+            value = sys.intern(value)
+        elif isinstance(value, list):
+            value[:] = [sys.intern(x) if isinstance(x, str) else x
+                        for x in value]
+        # end if
+        return value
+
     def compatible(self, other, run_env, is_tend=False):
         """Return a VarCompatObj object which describes the equivalence,
         compatibility, or incompatibility between <self> and <other>.
@@ -873,6 +914,9 @@ class Var:
 
     def add_child(self, cvar):
         """Add <cvar> as a child of this Var object"""
+        if self.__children is None:
+            self.__children = list()
+        # end if
         if cvar not in self.__children:
             self.__children.append(cvar)
         # end if
@@ -1196,6 +1240,8 @@ class FortranVar(Var):
     __fortran_props = [VariableProperty('optional', bool,
                                         optional_in=True, default_in=False)]
 
+    __slots__ = ()
+
     def __init__(self, prop_dict, source, run_env, context=None,
                  clone_source=None):
         """Initialize a FortranVar object.
@@ -1285,6 +1331,14 @@ def ccpp_standard_var(std_name, source_type, run_env,
 
 ###############################################################################
 
+def _new_var_dictionary(dict_class):
+    """Return an empty <dict_class> object without calling its __init__
+    method. The object's attributes and variables are restored by
+    unpickling (see VarDictionary.__reduce__)."""
+    return OrderedDict.__new__(dict_class)
+
+###############################################################################
+
 class VarAction:
     """A base class for variable actions such as loop substitutions or
     temporary variable handling."""
@@ -1527,8 +1581,23 @@ class VarDictionary(OrderedDict):
     >>> VarDictionary('glitch', _MVAR_DUMMY_RUN_ENV, variables=Var({'local_name' : 'foo', 'standard_name' : 'hi_mom', 'units' : 'm s-1', 'dimensions' : '()', 'type' : 'real', 'intent' : 'in'}, ParseSource('vname', 'scheme', ParseContext()), _MVAR_DUMMY_RUN_ENV)).add_variable(Var({'local_name' : 'bar', 'standard_name' : 'hi_mom', 'units' : 'm s-1', 'dimensions' : '()', 'type' : 'real', 'intent' : 'in'}, ParseSource('vname2', 'DDT', ParseContext()), _MVAR_DUMMY_RUN_ENV), _MVAR_DUMMY_RUN_ENV) #doctest: +IGNORE_EXCEPTION_DETAIL
     Traceback (most recent call last):
     ParseSyntaxError: Invalid Duplicate standard name, 'hi_mom', at <standard input>:
+    >>> _parent = VarDictionary('parent', _MVAR_DUMMY_RUN_ENV, variables=Var({'local_name' : 'foo', 'standard_name' : 'hi_mom', 'units' : 'm s-1', 'dimensions' : '()', 'type' : 'real', 'intent' : 'in'}, ParseSource('vname', 'scheme', ParseContext()), _MVAR_DUMMY_RUN_ENV))
+    >>> _child = VarDictionary('child', _MVAR_DUMMY_RUN_ENV, parent_dict=_parent)
+    >>> _child.find_local_name('foo', any_scope=True) #doctest: +ELLIPSIS
+    <metavar.Var hi_mom: foo at 0x...>
+    >>> _child.add_variable(Var({'local_name' : 'foo', 'standard_name' : 'bye_mom', 'units' : 'm s-1', 'dimensions' : '()', 'type' : 'real', 'intent' : 'in'}, ParseSource('vname', 'scheme', ParseContext()), _MVAR_DUMMY_RUN_ENV), _MVAR_DUMMY_RUN_ENV, exists_ok=True)
+    >>> _child.find_local_name('foo', any_scope=True) #doctest: +ELLIPSIS
+    <metavar.Var bye_mom: foo at 0x...>
     """
 
+    # Generation counters used to check that scope index entries are still
+    #   current. The generation of a name changes whenever that name is
+    #   added to or removed from any dictionary (standard names) or added to
+    #   any dictionary (local names). The structure generation changes
+    #   whenever the scope tree is rearranged.
+    __name_generations = {}
+    __structure_generation = 0
+
     def __init__(self, name, run_env, variables=None,
                  parent_dict=None):
         """Unlike dict, VarDictionary only takes a Var or Var list"""
@@ -1541,6 +1610,10 @@ class VarDictionary(OrderedDict):
         # end if
         self.__sub_dicts = list()
         self.__local_names = {} # local names in use
+        # Next internal name candidate: (prefix, max_len) --> (index, prefix)
+        self.__name_candidates = {}
+        # Scope index: local name --> (owning dictionary, generation)
+        self.__scope_index = {}
         if isinstance(variables, Var):
             self.add_variable(variables, run_env)
         elif isinstance(variables, list):
@@ -1572,6 +1645,16 @@ class VarDictionary(OrderedDict):
         """Return the parent dictionary of this dictionary"""
         return self.__parent_dict
 
+    @parent.setter
+    def parent(self, parent_dict):
+        """Set the parent dictionary of this dictionary (e.g., to use an
+        analyzed suite from a previous run with a new API)"""
+        self.__parent_dict = parent_dict
+        if parent_dict is not None:
+            parent_dict.add_sub_scope(self)
+        # end if
+        VarDictionary.scope_changed()
+
     @staticmethod
     def include_var_in_list(var, std_vars, loop_vars, consts):
         """Return True iff <var> is of a type allowed by the logicals,
@@ -1729,6 +1812,7 @@ class VarDictionary(OrderedDict):
         lname = lname.lower()
         if lname not in self.__local_names:
             self.__local_names[lname] = standard_name
+            VarDictionary.scope_changed(lname)
         # end if
 
     def remove_variable(self, standard_name):
@@ -1846,7 +1930,13 @@ class VarDictionary(OrderedDict):
         or return None if no such variable is currently in the dictionary"""
         pvar = None
         lname = local_name.lower() # Case is insensitive for local names
-        if lname in self.__local_names:
+        if any_scope and (lname not in self.__local_names):
+            # Go straight to the dictionary which owns <lname> (if any)
+            owner = self.__local_name_scope(lname)
+            if owner is not None:
+                pvar = owner.find_local_name(local_name, any_scope=False)
+            # end if
+        elif lname in self.__local_names:
             stdname = self.__local_names[lname]
             pvar = self.find_variable(standard_name=stdname, any_scope=False)
             if not pvar:
@@ -1855,12 +1945,44 @@ class VarDictionary(OrderedDict):
                 raise ParseInternalError(emsg.format(self.name,
                                                      stdname, local_name))
             # end if (no else, pvar is fine)
-        elif any_scope and (self.__parent_dict is not None):
-            pvar = self.__parent_dict.find_local_name(local_name,
-                                                      any_scope=any_scope)
         # end if
         return pvar
 
+    def __local_name_scope(self, lname):
+        """Return the closest parent dictionary which has a variable with
+        local name, <lname>, or None if no parent dictionary has one.
+        The result is recorded in this dictionary's scope index."""
+        generation = VarDictionary.scope_generation(lname)
+        entry = self.__scope_index.get(lname)
+        if (entry is None) or (entry[1] != generation):
+            owner = self.__parent_dict
+            while (owner is not None) and (lname not in owner.__local_names):
+                owner = owner.__parent_dict
+            # end while
+            entry = (owner, generation)
+            self.__scope_index[lname] = entry
+        # end if
+        return entry[0]
+
+    @classmethod
+    def scope_generation(cls, name):
+        """Return a token which changes whenever <name> is added to or
+        removed from any dictionary or whenever the scope tree changes.
+        Scope index entries are valid as long as this token is unchanged."""
+        return (cls.__name_generations.get(name, 0),
+                cls.__structure_generation)
+
+    @classmethod
+    def scope_changed(cls, name=None):
+        """Invalidate scope index entries for <name> or, if <name> is None,
+        all scope index entries (e.g., when the scope tree is rearranged)."""
+        if name is None:
+            cls.__structure_generation += 1
+        else:
+            cls.__name_generations[name] = cls.__name_generations.get(name,
+                                                                      0) + 1
+        # end if
+
     def find_error_variables(self, any_scope=False, clone_as_out=False):
         """Find and return a consistent set of error variables in this
         dictionary.
@@ -1967,6 +2089,20 @@ class VarDictionary(OrderedDict):
         # end if
         return f"VarDictionary({self.name}{comma}{srepr[vstart:]}"
 
+    def __setitem__(self, standard_name, var):
+        """Add <var> to this dictionary and invalidate any scope index
+        entry for <standard_name>"""
+        if standard_name not in self:
+            VarDictionary.scope_changed(standard_name)
+        # end if
+        super().__setitem__(standard_name, var)
+
+    def __delitem__(self, standard_name):
+        """Remove <standard_name> from this dictionary and invalidate any
+        scope index entry for <standard_name>"""
+        super().__delitem__(standard_name)
+        VarDictionary.scope_changed(standard_name)
+
     def __del__(self):
         """Attempt to delete all of the variables in this dictionary"""
         self.clear()
@@ -1976,6 +2112,18 @@ class VarDictionary(OrderedDict):
         list equality"""
         return self is other
 
+    def __reduce__(self):
+        """Allow VarDictionary objects to be pickled (e.g., to return parsed
+        metadata from a worker process). The OrderedDict version tries to
+        call __init__ without the required arguments. The object is
+        recreated without calling __init__ so that subclasses with other
+        __init__ arguments (e.g., analyzed suites) can be pickled too."""
+        state = self.__dict__.copy()
+        # Scope index generations are only meaningful in this process
+        state['_VarDictionary__scope_index'] = {}
+        return (_new_var_dictionary, (self.__class__,),
+                state, None, iter(self.items()))
+
     @classmethod
     def loop_var_match(cls, standard_name):
         """Return a VarLoopSubst if <standard_name> is a loop variable,
@@ -2096,34 +2244,46 @@ class VarDictionary(OrderedDict):
         """
         return var.call_string(self, loop_vars=loop_vars)
 
-    def new_internal_variable_name(self, prefix=None, max_len=63):
+    def new_internal_variable_name(self, prefix=None, max_len=63,
+                                   exclude=None):
         """Find a new local variable name for this dictionary.
         The new name begins with <prefix>_<self.name> or with <self.name>
         (where <self.name> is this VarDictionary's name) if <prefix> is None.
         The new variable name is kept to a maximum length of <max_len>.
+        If <exclude> is not None, the new name is not in <exclude> (for
+        names which are in use but not in this dictionary).
+        Local names are never removed so a candidate name which is in use
+        stays in use. Therefore, the search for a new name resumes from
+        the last candidate returned for the same <prefix> and <max_len>.
         """
-        index = 0
         if prefix is None:
             var_prefix = '{}_var'.format(self.name)
         else:
             var_prefix = '{}'.format(prefix)
         # end if
-        varlist = [x for x in self.__local_names.keys() if var_prefix in x]
+        key = (var_prefix, max_len)
+        index, cand_prefix = self.__name_candidates.get(key, (0, var_prefix))
         newvar = None
         while newvar is None:
             if index == 0:
-                newvar = var_prefix
+                newvar = cand_prefix
             else:
-                newvar = '{}{}'.format(var_prefix, index)
+                newvar = '{}{}'.format(cand_prefix, index)
             # end if
-            index = index + 1
             if len(newvar) > max_len:
-                var_prefix = var_prefix[:-1]
+                cand_prefix = cand_prefix[:-1]
                 newvar = None
-            elif newvar in varlist:
+            elif (newvar in self.__local_names) and (var_prefix in newvar):
                 newvar = None
+            elif exclude and (newvar in exclude):
+                newvar = None
+            # end if
+            if newvar is None:
+                index = index + 1
             # end if
         # end while
+        # The caller may not use <newvar> so it is our next candidate
+        self.__name_candidates[key] = (index, cand_prefix)
         return newvar
 
 ###############################################################################
@@ -34,6 +34,7 @@ class Var(object):
         self._active        = None
         self._optional      = None
         self._pointer       = False
+        self._save          = False
         self._target        = None
         self._actions       = { 'in' : None, 'out' : None }
         for key, value in kwargs.items():
@@ -160,6 +161,19 @@ class Var(object):
             raise ValueError('Invalid value {0} for variable property pointer, must be a logical'.format(value))
         self._pointer = value
 
+    # Save is not set by parsing metadata attributes, but by mkstatic
+    # for local variables that persist between calls of the cap.
+    @property
+    def save(self):
+        '''Get the save attribute of the variable.'''
+        return self._save
+
+    @save.setter
+    def save(self, value):
+        if not isinstance(value, bool):
+            raise ValueError('Invalid value {0} for variable property save, must be a logical'.format(value))
+        self._save = value
+
     @property
     def target(self):
         '''Get the target of the variable.'''
@@ -194,6 +208,21 @@ class Var(object):
         else:
             raise Exception('Invalid values for variable attribute actions.')
 
+    @property
+    def signature(self):
+        '''Get the compatibility signature of the variable, i.e. the attributes
+        that must be identical for compatible variables. The length of character
+        variables is not part of the signature, see compatible and kind_compatible.'''
+        if self.type == 'character' and self.kind.startswith('len='):
+            return (self.standard_name, self.type, self.rank, 'len=')
+        return (self.standard_name, self.type, self.rank, self.kind)
+
+    @staticmethod
+    def kind_compatible(kind, other_kind):
+        '''Test if two kinds of variables with the same signature are compatible:
+        they must be identical or one of them must be len=* (character variables).'''
+        return kind == other_kind or kind == 'len=*' or other_kind == 'len=*'
+
     def compatible(self, other):
         """Test if the variable is compatible another variable. This requires
         that certain variable attributes are identical. Others, for example
@@ -201,16 +230,8 @@ class Var(object):
         character(len=*) as compatible with character(len=INTEGER_VALUE).
         We defer testing units here and catch incompatible units later when
         unit-conversion code is autogenerated."""
-        if self.type == 'character':
-            if (self.kind == 'len=*' and other.kind.startswith('len=')) or \
-                   (self.kind.startswith('len=') and other.kind == 'len=*'):
-                return self.standard_name == other.standard_name \
-                    and self.type == other.type \
-                    and self.rank == other.rank
-        return self.standard_name == other.standard_name \
-            and self.type == other.type \
-            and self.kind == other.kind \
-            and self.rank == other.rank
+        return self.signature == other.signature \
+            and Var.kind_compatible(self.kind, other.kind)
 
     def convert_to(self, units):
         """Generate action to convert data in the variable's units to other units"""
@@ -366,6 +387,8 @@ class Var(object):
             #    target = ''
             target = ', target'
             # *DH
+            if self.save:
+                target += ', save'
             if self.type in STANDARD_VARIABLE_TYPES:
                 if self.kind:
                     if self.rank:
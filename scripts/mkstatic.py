@@ -21,6 +21,7 @@ from common import CCPP_CONSTANT_ONE, CCPP_HORIZONTAL_DIMENSION, CCPP_HORIZONTAL
 from common import FORTRAN_CONDITIONAL_REGEX_WORDS, FORTRAN_CONDITIONAL_REGEX
 from common import CCPP_TYPE, STANDARD_VARIABLE_TYPES, STANDARD_CHARACTER_TYPE
 from common import CCPP_STATIC_API_MODULE, CCPP_STATIC_SUBROUTINE_NAME
+from common import CCPP_STATIC_HANDLE_SUBROUTINE_NAME, CCPP_STATIC_SUITE_HANDLE_FUNCTION, CCPP_STATIC_GROUP_HANDLE_FUNCTION
 from metadata_parser import CCPP_MANDATORY_VARIABLES
 from mkcap import Var
 
@@ -148,6 +149,85 @@ def extract_dimensions_from_local_name(local_name):
         dim_string = ''
     return (dimensions, dim_string)
 
+def extract_dimension_names(dimensions):
+    """Return the standard names (in lower case) of all variables in
+    the list of dimensions, e.g. ['1:A', 'B:3'] -> ['a', 'b']"""
+    dimension_names = []
+    # dim_expression can be 'A', '1', '1:A', ...
+    for dim_expression in dimensions:
+        for dim in dim_expression.split(':'):
+            dim = dim.lower()
+            try:
+                int(dim)
+            except ValueError:
+                dimension_names.append(dim)
+    return dimension_names
+
+def translate_conditional(active, var_standard_name, metadata_define):
+    """Convert the conditional expression active in standard_name format to local
+    names known to the host model. Return the converted conditional and the
+    standard names of all variables used in it."""
+    if active == 'T':
+        return ('.true.', [])
+    elif active == 'F':
+        return ('.false.', [])
+    conditional = ''
+    variables = []
+    # Find all words in the conditional, for each of them look for a matching
+    # standard name in the list of known variables
+    items = FORTRAN_CONDITIONAL_REGEX.findall(active)
+    for item in items:
+        item = item.lower()
+        if item in FORTRAN_CONDITIONAL_REGEX_WORDS:
+            conditional += item
+        else:
+            # Detect integers, following Python's "easier to ask forgiveness than permission" mentality
+            try:
+                int(item)
+                conditional += item
+            except ValueError:
+                if not item in metadata_define.keys():
+                    raise Exception("Variable {} used in conditional for {} not known to host model".format(
+                                                                                   item, var_standard_name))
+                conditional += metadata_define[item][0].local_name
+                variables.append(item)
+    return (conditional, variables)
+
+def find_parent_variables(var_local_name_define, var_standard_name, standard_name_by_local_name_define):
+    """Break apart the local name of a host model variable into the different components
+    (members of DDTs) and find the standard names of the parent and of all indices.
+    Return the local name of the parent and a list of tuples (local name, standard name)
+    for the parent followed by the indices."""
+    (parent_local_name_define, parent_local_names_define_indices) = \
+        extract_parents_and_indices_from_local_name(var_local_name_define)
+    parents = []
+    # Check for each of the derived parent local names as defined by the host model
+    # if they are registered (i.e. if there is a standard name for it). Note that
+    # the output of extract_parents_and_indices_from_local_name is stripped of any
+    # array subset information, i.e. a local name 'Atm(:)%...' will produce a
+    # parent local name 'Atm'. Since the rank of the parent variable is not known
+    # at this point and since the local name in the host model metadata table could
+    # contain '(:)', '(:,:)', ... (up to the rank of the array), we search for the
+    # maximum number of dimensions allowed by the Fortran standard.
+    for local_name_define in [parent_local_name_define] + parent_local_names_define_indices:
+        parent_standard_name = None
+        for i in range(FORTRAN_ARRAY_MAX_DIMS+1):
+            if i==0:
+                dims_string = ''
+            else:
+                # (:) for i==1, (:,:) for i==2, ...
+                dims_string = '(' + ','.join([':' for j in range(i)]) + ')'
+            if local_name_define+dims_string in standard_name_by_local_name_define.keys():
+                parent_standard_name = standard_name_by_local_name_define[local_name_define+dims_string]
+                break
+        if not parent_standard_name:
+            raise Exception('Parent variable {parent} of {child} with standard name '.format(
+                                       parent=local_name_define, child=var_local_name_define)+\
+                            '{standard_name} not defined in host model metadata'.format(
+                                                       standard_name=var_standard_name))
+        parents.append((local_name_define, parent_standard_name))
+    return (parent_local_name_define, parents)
+
 def create_argument_list_wrapped(arguments):
     """Create a wrapped argument list, remove trailing ',' """
     argument_list = ''
@@ -305,21 +385,95 @@ module {module}
       character(len=*), optional, intent(in)    :: group_name
       integer,                    intent(out)   :: ierr
 
-      ierr = 0
+      integer :: suite_handle
+      integer :: group_handle
 
-{suite_switch}
-      else
+      ierr = 0
 
+      suite_handle = {suite_handle_function}(suite_name)
+      if (suite_handle == 0) then
          write({ccpp_var_name}%errmsg,'(*(a))') 'Invalid suite ' // trim(suite_name)
          ierr = 1
+         {ccpp_var_name}%errflg = ierr
+         return
+      end if
 
+      if (present(group_name)) then
+         group_handle = {group_handle_function}(suite_handle, group_name)
+         if (group_handle == 0) then
+            write({ccpp_var_name}%errmsg, '(*(a))') 'Group ' // trim(group_name) // ' not found'
+            ierr = 1
+            {ccpp_var_name}%errflg = ierr
+            return
+         end if
+         call {handle_subroutine}({ccpp_var_name}, suite_handle, group_handle, ierr)
+      else
+         call {handle_subroutine}({ccpp_var_name}, suite_handle, ierr=ierr)
       end if
 
+   end subroutine {subroutine}
+'''
+
+    handle_sub = '''
+   subroutine {subroutine}({ccpp_var_name}, suite_handle, group_handle, ierr)
+
+      use ccpp_types, only : ccpp_t
+
+      implicit none
+
+      type(ccpp_t),               intent(inout) :: {ccpp_var_name}
+      integer,                    intent(in)    :: suite_handle
+      integer,          optional, intent(in)    :: group_handle
+      integer,                    intent(out)   :: ierr
+
+      ierr = 0
+
+      select case (suite_handle)
+{suite_switch}
+      case default
+
+         write({ccpp_var_name}%errmsg,'(a,i0)') 'Invalid suite handle ', suite_handle
+         ierr = 1
+
+      end select
+
       {ccpp_var_name}%errflg = ierr
 
    end subroutine {subroutine}
 '''
 
+    suite_handle_function = '''
+   integer function {function}(suite_name)
+
+      implicit none
+
+      character(len=*), intent(in) :: suite_name
+
+      select case (trim(suite_name))
+{suite_cases}
+      case default
+         {function} = 0
+      end select
+
+   end function {function}
+'''
+
+    group_handle_function = '''
+   integer function {function}(suite_handle, group_name)
+
+      implicit none
+
+      integer,          intent(in) :: suite_handle
+      character(len=*), intent(in) :: group_name
+
+      {function} = 0
+      select case (suite_handle)
+{group_cases}
+      end select
+
+   end function {function}
+'''
+
     footer = '''
 end module {module}
 '''
@@ -416,38 +570,57 @@ end module {module}
             raise Exception('CCPP variable {0} of type {1} must be a scalar.'.format(ccpp_var.local_name, CCPP_TYPE))
         del parent_standard_names
 
-        # Create a subroutine for each stage
+        # Create the functions which return the integer handles of suites
+        # and groups; suites are numbered in order, groups in order within
+        # their suite
+        suite_cases = ''
+        group_cases = ''
+        for suite_handle, suite in enumerate(suites, 1):
+            suite_cases += '''      case ("{suite_name}")
+         {function} = {suite_handle}
+'''.format(suite_name=suite.name, function=CCPP_STATIC_SUITE_HANDLE_FUNCTION, suite_handle=suite_handle)
+            group_cases += '''      case ({suite_handle})
+         select case (trim(group_name))
+'''.format(suite_handle=suite_handle)
+            for group_handle, group in enumerate(suite.groups, 1):
+                group_cases += '''         case ("{group_name}")
+            {function} = {group_handle}
+'''.format(group_name=group.name, function=CCPP_STATIC_GROUP_HANDLE_FUNCTION, group_handle=group_handle)
+            group_cases += '''         end select
+'''
+        functions = API.suite_handle_function.format(function=CCPP_STATIC_SUITE_HANDLE_FUNCTION,
+                                                     suite_cases=suite_cases.rstrip('\n'))
+        functions += API.group_handle_function.format(function=CCPP_STATIC_GROUP_HANDLE_FUNCTION,
+                                                      group_cases=group_cases.rstrip('\n'))
+
+        # Create a subroutine for each stage, which selects suites and groups by
+        # their handles, and a wrapper that selects them by name
         self._subroutines=[]
         subs = ''
         for ccpp_stage in CCPP_STAGES.keys():
             suite_switch = ''
-            for suite in suites:
+            for suite_handle, suite in enumerate(suites, 1):
                 # Calls to groups of schemes for this stage
                 group_calls = ''
-                for group in suite.groups:
+                for group_handle, group in enumerate(suite.groups, 1):
                     # The <init></init> and <finalize></finalize> groups require special treatment,
                     # since they can only be run in the respective stage (init/finalize)
                     if (group.init and not ccpp_stage == 'init') or \
                         (group.finalize and not ccpp_stage == 'finalize'):
                         continue
-                    if not group_calls:
-                        clause = 'if'
-                    else:
-                        clause = 'else if'
                     argument_list_group = create_argument_list_wrapped_explicit(group.arguments[ccpp_stage])
                     group_calls += '''
-            {clause} (trim(group_name)=="{group_name}") then
-               ierr = {suite_name}_{group_name}_{stage}_cap({arguments})'''.format(clause=clause,
+            case ({group_handle})
+               ierr = {suite_name}_{group_name}_{stage}_cap({arguments})'''.format(group_handle=group_handle,
                                                                                    suite_name=group.suite,
                                                                                    group_name=group.name,
                                                                                    stage=CCPP_STAGES[ccpp_stage],
                                                                                    arguments=argument_list_group)
                 group_calls += '''
-            else
-               write({ccpp_var_name}%errmsg, '(*(a))') 'Group ' // trim(group_name) // ' not found'
+            case default
+               write({ccpp_var_name}%errmsg, '(a,i0,a)') 'Group with handle ', group_handle, ' not found in suite {suite_name}'
                ierr = 1
-            end if
-'''.format(ccpp_var_name=ccpp_var.local_name, group_name=group.name)
+'''.format(ccpp_var_name=ccpp_var.local_name, suite_name=suite.name)
 
                 # Call to entire suite for this stage
 
@@ -458,25 +631,33 @@ end module {module}
 '''.format(suite_name=suite.name, stage=CCPP_STAGES[ccpp_stage], arguments=argument_list_suite)
 
                 # Add call to all groups of this suite and to the entire suite
-                if not suite_switch:
-                    clause = 'if'
-                else:
-                    clause = 'else if'
                 suite_switch += '''
-      {clause} (trim(suite_name)=="{suite_name}") then
+      case ({suite_handle})
+
+         if (present(group_handle)) then
 
-         if (present(group_name)) then
+            select case (group_handle)
 {group_calls}
+            end select
+
          else
 {suite_call}
          end if
-'''.format(clause=clause, suite_name=suite.name, group_calls=group_calls, suite_call=suite_call)
+'''.format(suite_handle=suite_handle, group_calls=group_calls, suite_call=suite_call)
 
+            handle_subroutine = CCPP_STATIC_HANDLE_SUBROUTINE_NAME.format(stage=ccpp_stage)
             subroutine = CCPP_STATIC_SUBROUTINE_NAME.format(stage=ccpp_stage)
             self._subroutines.append(subroutine)
+            self._subroutines.append(handle_subroutine)
             subs += API.sub.format(subroutine=subroutine,
                                    ccpp_var_name=ccpp_var.local_name,
-                                   suite_switch=suite_switch)
+                                   handle_subroutine=handle_subroutine,
+                                   suite_handle_function=CCPP_STATIC_SUITE_HANDLE_FUNCTION,
+                                   group_handle_function=CCPP_STATIC_GROUP_HANDLE_FUNCTION)
+            subs += API.handle_sub.format(subroutine=handle_subroutine,
+                                          ccpp_var_name=ccpp_var.local_name,
+                                          suite_switch=suite_switch)
+        subs += functions
 
         # Write output to stdout or file
         if (self.filename is not sys.stdout):
@@ -502,7 +683,9 @@ end module {module}
             f = sys.stdout
         f.write(API.header.format(module=self._module,
                                   module_use=module_use,
-                                  subroutines=','.join(self._subroutines)))
+                                  subroutines=','.join(self._subroutines +
+                                                       [CCPP_STATIC_SUITE_HANDLE_FUNCTION,
+                                                        CCPP_STATIC_GROUP_HANDLE_FUNCTION])))
         f.write(subs)
         f.write(Suite.footer.format(module=self._module))
         if (f is not sys.stdout):
@@ -826,10 +1009,11 @@ end module {module}
     def arguments(self, value):
         self._arguments = value
 
-    def write(self, metadata_request, metadata_define, arguments, debug):
+    def write(self, metadata_request, metadata_define, arguments, debug, persistent_block_buffers=False):
         """Create caps for all groups in the suite and for the entire suite
         (calling the group caps one after another). Add additional code for
-        debugging if debug flag is True."""
+        debugging if debug flag is True. If persistent_block_buffers is True,
+        the group caps reuse the contiguous arrays for blocked data between calls."""
         # Set name of module and filename of cap
         self._module = 'ccpp_{suite_name}_cap'.format(suite_name=self._name)
         self.filename = '{module_name}.F90'.format(module_name=self._module)
@@ -840,7 +1024,7 @@ end module {module}
         # require adjusting the intent of the variables.
         module_use = ''
         for group in self._groups:
-            group.write(metadata_request, metadata_define, arguments, debug)
+            group.write(metadata_request, metadata_define, arguments, debug, persistent_block_buffers)
             for subroutine in group.subroutines:
                 module_use += '   use {m}, only: {s}\n'.format(m=group.module, s=subroutine)
             for ccpp_stage in CCPP_STAGES.keys():
@@ -969,7 +1153,7 @@ module {module}
    private
    public :: {subroutines}
 
-   logical, dimension({num_instances}), save :: initialized = .false.
+   logical, dimension({num_instances}), save :: initialized = .false.{module_var_defs}
 
    contains
 '''
@@ -1058,15 +1242,32 @@ end module {module}
         for key, value in kwargs.items():
             setattr(self, "_"+key, value)
 
-    def write(self, metadata_request, metadata_define, arguments, debug):
+    def write(self, metadata_request, metadata_define, arguments, debug, persistent_block_buffers=False):
         """Create caps for all stages of this group. Add additional code for
-        debugging if debug flag is True."""
+        debugging if debug flag is True. If persistent_block_buffers is True,
+        the contiguous arrays for converting blocked data in the init, timestep_init,
+        timestep_finalize and finalize stages are module variables (private to each
+        thread), shared by these stages and kept between calls instead of being
+        allocated and deallocated for each call. Blocked data with intent(out) are
+        then not copied into these arrays before calling the scheme."""
 
         # Create an inverse lookup table of local variable names defined (by the host model) and standard names
         standard_name_by_local_name_define = collections.OrderedDict()
         for standard_name in metadata_define.keys():
             standard_name_by_local_name_define[metadata_define[standard_name][0].local_name] = standard_name
 
+        # Argument plans: the information derived from the host model metadata for each variable
+        # (dimensions, conditionals, parent variables) is computed once and reused for all stages,
+        # subcycles and schemes of this group
+        dimension_plans = {}
+        conditional_plans = {}
+        parent_plans = {}
+        # Lookup table for the requested variables by standard name and container
+        request_by_container = {}
+        for standard_name in metadata_request.keys():
+            for var in metadata_request[standard_name]:
+                request_by_container.setdefault((standard_name, var.container), var)
+
         # First get target names of standard CCPP variables for subcycling and error handling
         ccpp_loop_counter_target_name = metadata_request[CCPP_LOOP_COUNTER][0].target
         ccpp_loop_extent_target_name = metadata_request[CCPP_LOOP_EXTENT][0].target
@@ -1081,6 +1282,9 @@ end module {module}
         self._filename = '{module_name}.F90'.format(module_name=self._module)
         self._subroutines = []
         local_subs = ''
+        # For mapping the module variables shared by all stages for converting blocked
+        # data (if persistent_block_buffers is True) to local variable names
+        saved_tmpvars = collections.OrderedDict()
         #
         for ccpp_stage in CCPP_STAGES.keys():
             # The special init and finalize routines are only run in that stage
@@ -1129,22 +1333,26 @@ end module {module}
                     # variables. This is mostly for handling horizontal dimensions
                     # correctly for the different CCPP phases and for cases when
                     # blocked data structures or chunked arrays are used.
+                    # scheme_arguments and required_variables contain the arguments and
+                    # the arguments plus additional variables for fast membership tests.
                     additional_variables_required = []
+                    scheme_arguments = set(arguments[scheme_name][subroutine_name])
+                    required_variables = set(scheme_arguments)
                     if CCPP_HORIZONTAL_LOOP_EXTENT in metadata_define.keys():
                         for add_var in [ CCPP_CONSTANT_ONE, CCPP_HORIZONTAL_LOOP_EXTENT]:
-                            if not add_var in local_vars.keys() \
-                                    and not add_var in additional_variables_required + arguments[scheme_name][subroutine_name]:
+                            if not add_var in local_vars.keys() and not add_var in required_variables:
                                 logging.debug("Adding variable {} for handling blocked data structures".format(add_var))
                                 additional_variables_required.append(add_var)
+                                required_variables.add(add_var)
                     elif ccpp_stage == 'run' and \
                             CCPP_HORIZONTAL_LOOP_BEGIN in metadata_define.keys() and \
                             CCPP_HORIZONTAL_LOOP_END in metadata_define.keys() and \
                             CCPP_CHUNK_EXTENT in metadata_define.keys():
                         for add_var in [ CCPP_HORIZONTAL_LOOP_BEGIN, CCPP_HORIZONTAL_LOOP_END, CCPP_CHUNK_EXTENT]:
-                            if not add_var in local_vars.keys() \
-                                    and not add_var in additional_variables_required + arguments[scheme_name][subroutine_name]:
+                            if not add_var in local_vars.keys() and not add_var in required_variables:
                                 logging.debug("Adding variable {} for handling chunked data arrays".format(add_var))
                                 additional_variables_required.append(add_var)
+                                required_variables.add(add_var)
                     # Next, identify all dimensions needed to handle the arguments
                     # and add them to the list of required variables for the cap
                     for var_standard_name in arguments[scheme_name][subroutine_name]:
@@ -1152,62 +1360,36 @@ end module {module}
                             raise Exception('Variable {standard_name} not defined in host model metadata'.format(
                                                                                 standard_name=var_standard_name))
                         var = metadata_define[var_standard_name][0]
-                        # dim_expression can be 'A', '1', '1:A', ...
-                        for dim_expression in var.dimensions:
-                            dims = dim_expression.split(':')
-                            for dim in dims:
-                                dim = dim.lower()
-                                try:
-                                    dim = int(dim)
-                                except ValueError:
-                                    if not dim in local_vars.keys() and \
-                                            not dim in additional_variables_required + arguments[scheme_name][subroutine_name]:
-                                        if not dim in metadata_define.keys():
-                                            raise Exception('Dimension {}, required by variable {}, not defined in host model metadata'.format(
-                                                                                                                       dim, var_standard_name))
-                                        logging.debug("Adding dimension {} for variable {}".format(dim, var_standard_name))
-                                        additional_variables_required.append(dim)
+                        if not var_standard_name in dimension_plans.keys():
+                            dimension_plans[var_standard_name] = extract_dimension_names(var.dimensions)
+                        for dim in dimension_plans[var_standard_name]:
+                            if not dim in local_vars.keys() and not dim in required_variables:
+                                if not dim in metadata_define.keys():
+                                    raise Exception('Dimension {}, required by variable {}, not defined in host model metadata'.format(
+                                                                                                               dim, var_standard_name))
+                                logging.debug("Adding dimension {} for variable {}".format(dim, var_standard_name))
+                                additional_variables_required.append(dim)
+                                required_variables.add(dim)
 
                         # If blocked data structures need to be converted, add necessary variables
                         if ccpp_stage in ['init', 'timestep_init', 'timestep_finalize', 'finalize'] and CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER] in var.local_name:
                             for add_var in [ CCPP_BLOCK_COUNT, CCPP_HORIZONTAL_DIMENSION]:
-                                if not add_var in local_vars.keys() \
-                                        and not add_var in additional_variables_required + arguments[scheme_name][subroutine_name]:
+                                if not add_var in local_vars.keys() and not add_var in required_variables:
                                     logging.debug("Adding variable {} for handling blocked data structures".format(add_var))
                                     additional_variables_required.append(add_var)
+                                    required_variables.add(add_var)
 
                         # If the variable is only active/used under certain conditions, add necessary variables
                         # also record the conditional for later use in unit conversions / blocked data conversions.
-                        if var.active == 'T':
-                            conditional = '.true.'
-                        elif var.active == 'F':
-                            conditional = '.false.'
-                        else:
-                            # Convert conditional expression in standard_name format to local names known to the host model
-                            conditional = ''
-                            # Find all words in the conditional, for each of them look for a matching
-                            # standard name in the list of known variables
-                            items = FORTRAN_CONDITIONAL_REGEX.findall(var.active)
-                            for item in items:
-                                item = item.lower()
-                                if item in FORTRAN_CONDITIONAL_REGEX_WORDS:
-                                    conditional += item
-                                else:
-                                    # Detect integers, following Python's "easier to ask forgiveness than permission" mentality
-                                    try:
-                                        int(item)
-                                        conditional += item
-                                    except ValueError:
-                                        if not item in metadata_define.keys():
-                                            raise Exception("Variable {} used in conditional for {} not known to host model".format(
-                                                                                                           item, var_standard_name))
-                                        var2 = metadata_define[item][0]
-                                        conditional += var2.local_name
-                                        # Add to list of required variables for the cap
-                                        if not item in local_vars.keys() \
-                                                and not item in additional_variables_required + arguments[scheme_name][subroutine_name]:
-                                            logging.debug("Adding variable {} for handling conditionals".format(item))
-                                            additional_variables_required.append(item)
+                        if not var_standard_name in conditional_plans.keys():
+                            conditional_plans[var_standard_name] = translate_conditional(var.active, var_standard_name, metadata_define)
+                        (conditional, conditional_variables) = conditional_plans[var_standard_name]
+                        # Add to list of required variables for the cap
+                        for item in conditional_variables:
+                            if not item in local_vars.keys() and not item in required_variables:
+                                logging.debug("Adding variable {} for handling conditionals".format(item))
+                                additional_variables_required.append(item)
+                                required_variables.add(item)
                         # Conditionals are identical per requirement, no need to test for consistency again
                         if not var_standard_name in conditionals.keys():
                             conditionals[var_standard_name] = conditional
@@ -1220,10 +1402,9 @@ end module {module}
                         for var_standard_name in additional_variables_required + arguments[scheme_name][subroutine_name]:
                             # Pick the correct variable for this module/scheme/subroutine
                             # from the list of requested variables, if it is in that list
-                            if var_standard_name in arguments[scheme_name][subroutine_name]:
-                                for var in metadata_request[var_standard_name]:
-                                    if container == var.container:
-                                        break
+                            if var_standard_name in scheme_arguments:
+                                var = request_by_container.get((var_standard_name, container),
+                                                               metadata_request[var_standard_name][-1])
                             # This is a dimension or required variable added automatically (e.g. for handling blocked data)
                             else:
                                 # Create a copy of the variable in the metadata dictionary
@@ -1237,58 +1418,29 @@ end module {module}
 
                                 # Break apart var_local_name_define into the different components (members of DDTs)
                                 # to determine all variables that are required
-                                (parent_local_name_define, parent_local_names_define_indices) = \
-                                    extract_parents_and_indices_from_local_name(var_local_name_define)
-
-                                parent_standard_name = None
-                                parent_var = None
-                                # Check for each of the derived parent local names as defined by the host model
-                                # if they are registered (i.e. if there is a standard name for it). Note that
-                                # the output of extract_parents_and_indices_from_local_name is stripped of any
-                                # array subset information, i.e. a local name 'Atm(:)%...' will produce a
-                                # parent local name 'Atm'. Since the rank of the parent variable is not known
-                                # at this point and since the local name in the host model metadata table could
-                                # contain '(:)', '(:,:)', ... (up to the rank of the array), we search for the
-                                # maximum number of dimensions allowed by the Fortran standard.
-                                for local_name_define in [parent_local_name_define] + parent_local_names_define_indices:
-                                    parent_standard_name = None
-                                    parent_var = None
-                                    for i in range(FORTRAN_ARRAY_MAX_DIMS+1):
-                                        if i==0:
-                                            dims_string = ''
-                                        else:
-                                            # (:) for i==1, (:,:) for i==2, ...
-                                            dims_string = '(' + ','.join([':' for j in range(i)]) + ')'
-                                        if local_name_define+dims_string in standard_name_by_local_name_define.keys():
-                                            parent_standard_name = standard_name_by_local_name_define[local_name_define+dims_string]
-                                            parent_var = metadata_define[parent_standard_name][0]
-                                            break
-                                    if not parent_var:
-                                        raise Exception('Parent variable {parent} of {child} with standard name '.format(
-                                                                   parent=local_name_define, child=var_local_name_define)+\
-                                                        '{standard_name} not defined in host model metadata'.format(
-                                                                                   standard_name=var_standard_name))
+                                if not var_standard_name in parent_plans.keys():
+                                    parent_plans[var_standard_name] = find_parent_variables(var_local_name_define,
+                                                                          var_standard_name, standard_name_by_local_name_define)
+                                (parent_local_name_define, parents) = parent_plans[var_standard_name]
+
+                                for (local_name_define, parent_standard_name) in parents:
+                                    parent_var = metadata_define[parent_standard_name][0]
 
                                     # Reset local name for entire array to a notation without (:), (:,:), etc.;
                                     # this is needed for the var.print_def_intent() routine to work correctly
                                     parent_var.local_name = local_name_define
 
-                                    # Add the parent_var's dimensions to the locally defined dimensions:
-                                    # dim_expression can be 'A', '1', '1:A', ...
-                                    for dim_expression in parent_var.dimensions:
-                                        dims = dim_expression.split(':')
-                                        for dim in dims:
-                                            dim = dim.lower()
-                                            try:
-                                                dim = int(dim)
-                                            except ValueError:
-                                                if not dim in local_vars.keys() and \
-                                                        not dim in additional_variables_required + arguments[scheme_name][subroutine_name]:
-                                                    if not dim in metadata_define.keys():
-                                                        raise Exception('Dimension {}, required by parent variable {}, not defined in host model metadata'.format(
-                                                                                                                                       dim, parent_standard_name))
-                                                    logging.debug("Adding dimension {} for parent variable {}".format(dim, parent_standard_name))
-                                                    additional_variables_required.append(dim)
+                                    # Add the parent_var's dimensions to the locally defined dimensions
+                                    if not parent_standard_name in dimension_plans.keys():
+                                        dimension_plans[parent_standard_name] = extract_dimension_names(parent_var.dimensions)
+                                    for dim in dimension_plans[parent_standard_name]:
+                                        if not dim in local_vars.keys() and not dim in required_variables:
+                                            if not dim in metadata_define.keys():
+                                                raise Exception('Dimension {}, required by parent variable {}, not defined in host model metadata'.format(
+                                                                                                                               dim, parent_standard_name))
+                                            logging.debug("Adding dimension {} for parent variable {}".format(dim, parent_standard_name))
+                                            additional_variables_required.append(dim)
+                                            required_variables.add(dim)
 
                                     # Add variable to dictionary of parent variables, if not already there.
                                     # Set or update intent, depending on whether the variable is an index
@@ -1346,9 +1498,8 @@ end module {module}
                     for var_standard_name in arguments[scheme_name][subroutine_name]:
                         # Pick the correct variable for this module/scheme/subroutine
                         # from the list of requested variables
-                        for var in metadata_request[var_standard_name]:
-                            if container == var.container:
-                                break
+                        var = request_by_container.get((var_standard_name, container),
+                                                       metadata_request[var_standard_name][-1])
 
                         # We need some information about the host model variable
                         (dimensions_target_name, dim_string_target_name) = extract_dimensions_from_local_name(var.target)
@@ -1583,6 +1734,14 @@ end module {module}
                                 tmpvar_cnt += 1
                                 tmpvar = copy.deepcopy(var)
                                 tmpvar.local_name = '{0}_{1}_local'.format(var.local_name, tmpvar_cnt)
+                                if persistent_block_buffers:
+                                    # Use the module variable for this variable, shared by all stages
+                                    if local_vars[var_standard_name]['name'] in saved_tmpvars.keys():
+                                        tmpvar.local_name = saved_tmpvars[local_vars[var_standard_name]['name']].local_name
+                                    else:
+                                        tmpvar.local_name = '{0}_{1}_buffer'.format(var.local_name, len(saved_tmpvars)+1)
+                                        saved_tmpvars[local_vars[var_standard_name]['name']] = tmpvar
+                                    tmpvar.save = True
 
                             # Create string for allocating the temporary array by converting the dimensions
                             # (in standard_name format) to local names as known to the host model
@@ -1624,43 +1783,81 @@ end module {module}
                                 # Add necessary local variables for looping over blocks
                                 var_defs_manual.append('integer :: ib, nb')
 
-                                # Define actions before. Always copy data in, independent of intent.
-                                # We intentionally omit the dim string for the assignment on the right hand side,
-                                # since it worked without until now, since coding this up together with chunked array
-                                # logic is tricky, and since all this logic will go away after the models transitioned
-                                # to chunked arrays.
-                                actions_in = '''        ! Allocate local variable to copy blocked data {var} into a contiguous array
-        allocate({tmpvar}({dims}))
-        ib = 1
+                                block_count = metadata_define[CCPP_BLOCK_COUNT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb')
+                                block_size = metadata_define[CCPP_HORIZONTAL_LOOP_EXTENT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb')
+                                copy_in = '''        ib = 1
         do nb=1,{block_count}
           {tmpvar}({dimpad_before}ib:ib+{block_size}-1{dimpad_after}) = {var}
           ib = ib+{block_size}
         end do
 '''.format(tmpvar=tmpvar.local_name,
-           block_count=metadata_define[CCPP_BLOCK_COUNT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
-           block_size=metadata_define[CCPP_HORIZONTAL_LOOP_EXTENT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
+           block_count=block_count,
+           block_size=block_size,
            var=tmpvar.target.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
-           dims=','.join(alloc_dimensions),
            dimpad_before=dimpad_before,
            dimpad_after=dimpad_after,
            )
-                                # Define actions after, depending on intent.
-                                if var.intent in [ 'inout', 'out' ]:
-                                    actions_out = '''        ib = 1
+                                copy_out = '''        ib = 1
         do nb=1,{block_count}
           {var} = {tmpvar}({dimpad_before}ib:ib+{block_size}-1{dimpad_after})
           ib = ib+{block_size}
         end do
-        deallocate({tmpvar})
 '''.format(tmpvar=tmpvar.local_name,
-           block_count=metadata_define[CCPP_BLOCK_COUNT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
-           block_size=metadata_define[CCPP_HORIZONTAL_LOOP_EXTENT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
+           block_count=block_count,
+           block_size=block_size,
            var=tmpvar.target.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
            dimpad_before=dimpad_before,
            dimpad_after=dimpad_after,
            )
+
+                                if persistent_block_buffers:
+                                    # Reuse the module variable from previous calls, unless its bounds changed.
+                                    # Copy the blocked data in only if the scheme reads the variable: as required
+                                    # by the Fortran standard for intent(out) arguments, schemes must set every
+                                    # element of an intent(out) variable. Copy back only if the scheme modifies
+                                    # the variable.
+                                    bounds_changed = ' .or. &\n              '.join(
+                                        'lbound({tmpvar},{i})/={dim0} .or. ubound({tmpvar},{i})/={dim1}'.format(
+                                            tmpvar=tmpvar.local_name, i=i+1, dim0=dim0, dim1=dim1)
+                                        for (i, (dim0, dim1)) in enumerate(x.split(':') for x in alloc_dimensions))
+                                    actions_in = '''        ! Reuse module variable for blocked data {var} as a contiguous array
+        if (allocated({tmpvar})) then
+          if ({bounds_changed}) then
+            deallocate({tmpvar})
+          end if
+        end if
+        if (.not. allocated({tmpvar})) then
+          allocate({tmpvar}({dims}))
+        end if
+'''.format(tmpvar=tmpvar.local_name,
+           var=tmpvar.target.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
+           dims=','.join(alloc_dimensions),
+           bounds_changed=bounds_changed,
+           )
+                                    if var.intent in [ 'in', 'inout' ]:
+                                        actions_in += copy_in
+                                    if var.intent in [ 'inout', 'out' ]:
+                                        actions_out = copy_out
+                                    else:
+                                        actions_out = ''
                                 else:
-                                    actions_out = '''        deallocate({tmpvar})
+                                    # Define actions before. Always copy data in, independent of intent.
+                                    # We intentionally omit the dim string for the assignment on the right hand side,
+                                    # since it worked without until now, since coding this up together with chunked array
+                                    # logic is tricky, and since all this logic will go away after the models transitioned
+                                    # to chunked arrays.
+                                    actions_in = '''        ! Allocate local variable to copy blocked data {var} into a contiguous array
+        allocate({tmpvar}({dims}))
+'''.format(tmpvar=tmpvar.local_name,
+           var=tmpvar.target.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
+           dims=','.join(alloc_dimensions),
+           ) + copy_in
+                                    # Define actions after, depending on intent.
+                                    if var.intent in [ 'inout', 'out' ]:
+                                        actions_out = copy_out
+                                    else:
+                                        actions_out = ''
+                                    actions_out += '''        deallocate({tmpvar})
 '''.format(tmpvar=tmpvar.local_name)
 
                                 # Set/update actions for this temporary variable
@@ -1794,7 +1991,7 @@ end module {module}
                                                                         ptr_name=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p")
 
                         # Ordinary variables, no blocked data or unit conversions
-                        elif var_standard_name in arguments[scheme_name][subroutine_name]:
+                        elif var_standard_name in scheme_arguments:
                             if debug and assign_test:
                                 actions_in = assign_test
                             else:
@@ -1910,7 +2107,8 @@ end module {module}
             # Get list of arguments, module use statement and variable definitions for this subroutine (=stage for the group)
             (self.arguments[ccpp_stage], sub_module_use, sub_var_defs) = create_arguments_module_use_var_defs(
                                                            self.parents[ccpp_stage], metadata_define,
-                                                           tmpvars.values(), tmpptrs.values())
+                                                           [ x for x in tmpvars.values() if not x.save ],
+                                                           tmpptrs.values())
             sub_argument_list = create_argument_list_wrapped(self.arguments[ccpp_stage])
 
             # Remove duplicates from additional manual variable definitions
@@ -1944,6 +2142,20 @@ end module {module}
                                            var_defs='\n      '.join(sub_var_defs + var_defs_manual),
                                            body=body)
 
+        # Module variables for converting blocked data, private to each thread
+        module_var_defs = ''
+        if saved_tmpvars:
+            (_, saved_module_use, _) = create_arguments_module_use_var_defs(
+                                                           {}, metadata_define, saved_tmpvars.values(), [])
+            for line in saved_module_use:
+                module_use += '   {}\n'.format(line)
+            saved_var_defs = ['', '! Contiguous arrays for blocked data, shared by the init, timestep_init,',
+                              '! timestep_finalize and finalize caps and kept between calls']
+            for tmpvar in saved_tmpvars.values():
+                saved_var_defs.append(tmpvar.print_def_local(metadata_define))
+                saved_var_defs.append('!$omp threadprivate({})'.format(tmpvar.local_name))
+            module_var_defs = '\n' + '\n   '.join(saved_var_defs)
+
         # Write output to stdout or file
         if (self.filename is not sys.stdout):
             filepath = os.path.split(self.filename)[0]
@@ -1968,7 +2180,8 @@ end module {module}
                                     module=self._module,
                                     module_use=module_use,
                                     subroutines=', &\n             '.join(self._subroutines),
-                                    num_instances=CCPP_NUM_INSTANCES))
+                                    num_instances=CCPP_NUM_INSTANCES,
+                                    module_var_defs=module_var_defs))
         f.write(local_subs)
         f.write(Group.footer.format(module=self._module))
         if (f is not sys.stdout):
@@ -22,8 +22,11 @@ from parse_checkers import fortran_list_match
 from parse_checkers import registered_fortran_ddt_name
 from parse_checkers import register_fortran_ddt_name
 from parse_checkers import registered_fortran_ddt_names
+from parse_checkers import reset_fortran_ddt_names
 from parse_checkers import check_units, check_dimensions, check_cf_standard_name
 from parse_checkers import check_default_value, check_valid_values, check_molar_mass
+from parse_cache import ParseCache, file_hash, framework_version
+from parse_cache import dumps_parse_data, loads_parse_data
 from parse_log import init_log, set_log_level, flush_log
 from parse_log import set_log_to_stdout, set_log_to_null
 from parse_log import set_log_to_file, verbose
@@ -51,6 +54,8 @@ __all__ = [
     'check_valid_values',
     'check_molar_mass',
     'context_string',
+    'dumps_parse_data',
+    'file_hash',
     'find_schema_file',
     'find_schema_version',
     'flush_log',
@@ -58,7 +63,10 @@ __all__ = [
     'FORTRAN_ID',
     'FORTRAN_SCALAR_REF',
     'FORTRAN_SCALAR_REF_RE',
+    'framework_version',
     'init_log',
+    'loads_parse_data',
+    'ParseCache',
     'ParseContext',
     'ParseInternalError',
     'ParseSource',
@@ -70,6 +78,7 @@ __all__ = [
     'register_fortran_ddt_name',
     'registered_fortran_ddt_name',
     'registered_fortran_ddt_names',
+    'reset_fortran_ddt_names',
     'reset_standard_name_counter',
     'set_log_level',
     'set_log_to_file',
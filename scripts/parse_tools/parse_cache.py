@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+"""
+On-disk cache for the results of parsing metadata and Fortran files.
+Cache entries are keyed by the content of the parsed files, the parse
+options, and the version of the framework scripts so that an entry is
+never used if anything which could change the parse result has changed.
+"""
+
+# Python library imports
+import glob
+import hashlib
+import io
+import os
+import pickle
+import sys
+import tempfile
+
+## Bump this if the format of cache entries changes
+_CACHE_FORMAT = 1
+
+## Persistent ID used for the run environment in pickled cache data
+_RUN_ENV_PID = 'run_env'
+
+## The framework scripts directory (parent of this directory)
+_SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## Memoized framework version hash
+_FRAMEWORK_VERSION = None
+
+###############################################################################
+class _RunEnvPickler(pickle.Pickler):
+###############################################################################
+    """Pickler which stores a reference to the run environment instead of
+    the run environment itself."""
+
+    def __init__(self, file, run_env):
+        """Initialize this pickler to replace <run_env> with a reference"""
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.__run_env = run_env
+
+    def persistent_id(self, obj):
+        """Return a persistent ID for the run environment, otherwise None"""
+        if obj is self.__run_env:
+            return _RUN_ENV_PID
+        # end if
+        return None
+
+###############################################################################
+class _RunEnvUnpickler(pickle.Unpickler):
+###############################################################################
+    """Unpickler which replaces run environment references with the
+    current run environment."""
+
+    def __init__(self, file, run_env):
+        """Initialize this unpickler to replace references with <run_env>"""
+        super().__init__(file)
+        self.__run_env = run_env
+
+    def persistent_load(self, pid):
+        """Return the current run environment for a run environment
+        reference."""
+        if pid == _RUN_ENV_PID:
+            return self.__run_env
+        # end if
+        raise pickle.UnpicklingError(f"Unknown persistent ID, '{pid}'")
+
+###############################################################################
+def dumps_parse_data(obj, run_env):
+###############################################################################
+    """Return <obj> pickled as bytes with references to <run_env>
+    stored as references to the run environment."""
+    buffer = io.BytesIO()
+    _RunEnvPickler(buffer, run_env).dump(obj)
+    return buffer.getvalue()
+
+###############################################################################
+def loads_parse_data(data, run_env):
+###############################################################################
+    """Return the object pickled in <data> by <dumps_parse_data> with
+    run environment references replaced by <run_env>."""
+    return _RunEnvUnpickler(io.BytesIO(data), run_env).load()
+
+###############################################################################
+def file_hash(filename):
+###############################################################################
+    """Return a hash of the contents of <filename>"""
+    with open(filename, 'rb') as infile:
+        return hashlib.sha256(infile.read()).hexdigest()
+    # end with
+
+###############################################################################
+def framework_version():
+###############################################################################
+    """Return a hash which changes whenever the framework scripts (or the
+    Python version running them) change."""
+    global _FRAMEWORK_VERSION
+    if _FRAMEWORK_VERSION is None:
+        fhash = hashlib.sha256()
+        fhash.update(f"{_CACHE_FORMAT}:{sys.version}".encode('utf-8'))
+        pattern = os.path.join(_SCRIPTS_DIR, '**', '*.py')
+        for filename in sorted(glob.glob(pattern, recursive=True)):
+            fhash.update(os.path.relpath(filename, _SCRIPTS_DIR).encode('utf-8'))
+            fhash.update(file_hash(filename).encode('utf-8'))
+        # end for
+        _FRAMEWORK_VERSION = fhash.hexdigest()
+    # end if
+    return _FRAMEWORK_VERSION
+
+###############################################################################
+class ParseCache:
+###############################################################################
+    """Class to store and retrieve parse results in <cache_dir>.
+    Objects stored in the cache may refer to <run_env>, these references
+    are replaced with the current run environment when an object is loaded.
+    >>> ParseCache(None, None).key(None) == ParseCache(None, None).key(None)
+    True
+    >>> ParseCache(None, None).key(1) == ParseCache(None, None).key(2)
+    False
+    """
+
+    def __init__(self, cache_dir, run_env):
+        """Initialize a cache which lives in <cache_dir>"""
+        self.__cache_dir = cache_dir
+        self.__run_env = run_env
+
+    def key(self, *items):
+        """Return a cache key for <items>, which should include
+        everything the cached result depends on."""
+        khash = hashlib.sha256(framework_version().encode('utf-8'))
+        khash.update(repr(items).encode('utf-8'))
+        return khash.hexdigest()
+
+    def __entry_path(self, key):
+        """Return the pathname of the cache entry for <key>"""
+        return os.path.join(self.cache_dir, key[0:2], key + '.pkl')
+
+    def load(self, key):
+        """Return the object stored for <key> or None if there is no
+        valid cache entry for <key>."""
+        try:
+            with open(self.__entry_path(key), 'rb') as infile:
+                data = infile.read()
+            # end with
+            return loads_parse_data(data, self.__run_env)
+        except (OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError, TypeError, ValueError):
+            # Missing or unusable entry, treat as a cache miss
+            return None
+        # end try
+
+    def store(self, key, obj):
+        """Store <obj> in the cache under <key>.
+        The entry is written to a temporary file, then moved into place so
+        that concurrent processes never see a partial entry."""
+        entry_path = self.__entry_path(key)
+        entry_dir = os.path.dirname(entry_path)
+        os.makedirs(entry_dir, exist_ok=True)
+        data = dumps_parse_data(obj, self.__run_env)
+        fdesc, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fdesc, 'wb') as outfile:
+                outfile.write(data)
+            # end with
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            # end if
+            raise
+        # end try
+
+    def remove(self, key):
+        """Remove the entry stored for <key>, if any"""
+        try:
+            os.remove(self.__entry_path(key))
+        except OSError:
+            pass
+        # end try
+
+    @property
+    def cache_dir(self):
+        """Return the directory where cache entries are stored"""
+        return self.__cache_dir
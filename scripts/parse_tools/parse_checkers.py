@@ -1087,6 +1087,26 @@ def register_fortran_ddt_name(name):
 
 ########################################################################
 
+def reset_fortran_ddt_names(names):
+    """Replace the registered DDT names with <names>.
+    This is used by parse worker processes, which are reused for several
+    files, to start each file with the DDTs registered in a serial parse.
+    >>> saved_names = list(registered_fortran_ddt_names())
+    >>> register_fortran_ddt_name("leaked_ddt_t")
+    >>> reset_fortran_ddt_names(["foo_t", "bar_t", "foo_t"])
+    >>> registered_fortran_ddt_names()
+    ['foo_t', 'bar_t']
+    >>> reset_fortran_ddt_names(saved_names)
+    >>> registered_fortran_ddt_name("leaked_ddt_t") is None
+    True
+    """
+    del _REGISTERED_FORTRAN_DDT_NAMES[:]
+    for name in names:
+        register_fortran_ddt_name(name)
+    # end for
+
+########################################################################
+
 if __name__ == "__main__":
     # pylint: disable=ungrouped-imports
     import doctest
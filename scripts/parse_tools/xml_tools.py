@@ -12,14 +12,23 @@ import shutil
 import subprocess
 import sys
 import xml.etree.ElementTree as ET
+try:
+    # lxml allows schema validation without running xmllint
+    from lxml import etree as _LXML_ETREE
+except ImportError:
+    _LXML_ETREE = None
+# end try
 sys.path.insert(0, os.path.dirname(__file__))
 # CCPP framework imports
 from parse_source import CCPPError
 from parse_log import init_log, set_log_to_null
+from parse_cache import ParseCache, file_hash
 
 # Global data
 _INDENT_STR = "  "
 _XMLLINT = shutil.which('xmllint') # Blank if not installed
+_XML_SCHEMAS = {} # Parsed lxml schemas, by schema filename
+_VALIDATED_XML = set() # Validation keys of files which passed validation
 beg_tag_re = re.compile(r"([<][^/][^<>]*[^/][>])")
 end_tag_re = re.compile(r"([<][/][^<>/]+[>])")
 simple_tag_re = re.compile(r"([<][^/][^<>/]+[/][>])")
@@ -171,13 +180,73 @@ def find_schema_file(schema_root, version, schema_path=None):
     # end if
     return None
 
+###############################################################################
+def _schema_file_set(schema_file):
+###############################################################################
+    """Return a sorted list of <schema_file> and all of the schema files it
+    includes, imports, or redefines (directly or indirectly).
+    Schema locations which are not local files are skipped.
+    """
+    xsd_ns = '{http://www.w3.org/2001/XMLSchema}'
+    ref_tags = [xsd_ns + x for x in ('include', 'import', 'redefine')]
+    found = set()
+    to_check = [os.path.abspath(schema_file)]
+    while to_check:
+        sfile = to_check.pop()
+        if (sfile in found) or (not os.path.isfile(sfile)):
+            continue
+        # end if
+        found.add(sfile)
+        try:
+            sroot = ET.parse(sfile).getroot()
+        except ET.ParseError:
+            # Let the validator report an unreadable schema
+            continue
+        # end try
+        for elem in sroot:
+            location = elem.get('schemaLocation')
+            if (elem.tag in ref_tags) and location:
+                to_check.append(os.path.abspath(
+                    os.path.join(os.path.dirname(sfile), location)))
+            # end if
+        # end for
+    # end while
+    return sorted(found)
+
+###############################################################################
+def _validate_with_lxml(filename, schema_file):
+###############################################################################
+    """Validate the XML file, <filename>, against <schema_file> in process
+    using lxml. Raise a CCPPError if <filename> is not valid."""
+    if schema_file not in _XML_SCHEMAS:
+        _XML_SCHEMAS[schema_file] = _LXML_ETREE.XMLSchema(
+            _LXML_ETREE.parse(schema_file))
+    # end if
+    schema = _XML_SCHEMAS[schema_file]
+    try:
+        valid = schema.validate(_LXML_ETREE.parse(filename))
+    except _LXML_ETREE.XMLSyntaxError as perr:
+        raise CCPPError(f"Cannot parse '{filename}': {perr}") from perr
+    # end try
+    if not valid:
+        errors = '\n'.join([str(x) for x in schema.error_log])
+        emsg = f"'{filename}' fails to validate against '{schema_file}'"
+        raise CCPPError(f"{emsg}\n{errors}")
+    # end if
+    return True
+
 ###############################################################################
 def validate_xml_file(filename, schema_root, version, logger,
-                      schema_path=None, error_on_noxmllint=False):
+                      schema_path=None, error_on_noxmllint=False,
+                      cache_dir=None):
 ###############################################################################
     """
     Find the appropriate schema and validate the XML file, <filename>,
-    against it using xmllint
+    against it in process using lxml (if available) or using xmllint.
+    Successful validations are remembered (by the contents of <filename>
+    and of the schema) so an unchanged file is not validated again.
+    If <cache_dir> is not None, successful validations are also recorded
+    there so that they are remembered by later runs.
     """
     # Check the filename
     if not os.path.isfile(filename):
@@ -208,11 +277,35 @@ def validate_xml_file(filename, schema_root, version, logger,
         emsg = "validate_xml_file: Cannot open schema, '{}'"
         raise CCPPError(emsg.format(schema_file))
     # end if
-    if _XMLLINT:
+    if _LXML_ETREE or _XMLLINT:
+        schema_hashes = tuple(file_hash(x)
+                              for x in _schema_file_set(schema_file))
+        vkey = (file_hash(filename), schema_hashes, tuple(version))
+        if cache_dir:
+            vcache = ParseCache(cache_dir, None)
+            ckey = vcache.key('xml_validation', *vkey)
+        else:
+            vcache = None
+        # end if
+        if (vkey in _VALIDATED_XML) or (vcache and vcache.load(ckey)):
+            logger.debug("Using previous validation of {}".format(filename))
+            _VALIDATED_XML.add(vkey)
+            return True
+        # end if
         logger.debug("Checking file {} against schema {}".format(filename,
                                                                  schema_file))
-        cmd = [_XMLLINT, '--noout', '--schema', schema_file, filename]
-        result = call_command(cmd, logger)
+        if _LXML_ETREE:
+            result = _validate_with_lxml(filename, schema_file)
+        else:
+            cmd = [_XMLLINT, '--noout', '--schema', schema_file, filename]
+            result = call_command(cmd, logger)
+        # end if
+        if result:
+            _VALIDATED_XML.add(vkey)
+            if vcache:
+                vcache.store(ckey, True)
+            # end if
+        # end if
         return result
     # end if
     lmsg = "xmllint not found, could not validate file {}"
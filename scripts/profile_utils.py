@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+"""
+Utilities for profiling the phases of a CCPP Framework run
+"""
+
+# Python library imports
+from contextlib import contextmanager
+import json
+import sys
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError:
+    # Peak memory is not available on all platforms
+    resource = None
+# end try
+
+# On macOS, ru_maxrss is in bytes, elsewhere it is in kilobytes
+_MAXRSS_SCALE = 1024 if sys.platform == 'darwin' else 1
+# tracemalloc.reset_peak is new in Python 3.9, without it, per-phase
+# peaks cannot be measured (only memory deltas are recorded).
+_HAVE_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+###############################################################################
+def peak_rss_kb():
+###############################################################################
+    """Return the peak resident set size of this process (in kilobytes) or
+    None if it is not available"""
+    if resource is None:
+        return None
+    # end if
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // _MAXRSS_SCALE
+
+###############################################################################
+class PhaseProfiler:
+###############################################################################
+    """Class to record the wall time, call count, and memory use of each
+    phase of a run. Phases may be nested and may also be recorded for
+    individual items (e.g., suites or groups).
+    Memory is measured with tracemalloc (started by the first recorded
+    phase) so it only covers memory allocated by Python. For each phase,
+    <mem_delta_kb> is the net change in traced memory and <peak_mem_kb> is
+    the largest traced memory seen during any call to that phase.
+    The process peak resident set size is only reported for the whole run
+    since it never decreases.
+    If the profiler is not enabled, phases are not recorded.
+    >>> prof = PhaseProfiler(enabled=True)
+    >>> with prof.phase('analyze', item='my_suite'):
+    ...     with prof.phase('analyze_group', item='my_group'):
+    ...         pass
+    >>> with prof.phase('analyze', item='my_suite'):
+    ...     pass
+    >>> prof.report()['phases']['analyze']['calls']
+    2
+    >>> prof.report()['items']['analyze_group']['my_group']['calls']
+    1
+    >>> prof.stop()
+    >>> prof = PhaseProfiler()
+    >>> with prof.phase('analyze'):
+    ...     pass
+    >>> prof.report()['phases']
+    {}
+    """
+
+    def __init__(self, enabled=False):
+        """Initialize this profiler"""
+        self.__enabled = enabled
+        self.__phases = {}
+        self.__items = {}
+        # Traced peak (bytes) seen so far by each open phase
+        self.__open_peaks = []
+        self.__started_tracing = False
+        self.__start_time = time.perf_counter()
+
+    @staticmethod
+    def __update(stats, wall_time, mem_delta, peak_mem):
+        """Add a call which took <wall_time> to <stats>"""
+        stats['calls'] += 1
+        stats['wall_time'] += wall_time
+        stats['mem_delta_kb'] += mem_delta // 1024
+        if peak_mem is not None:
+            stats['peak_mem_kb'] = max(stats['peak_mem_kb'] or 0,
+                                       peak_mem // 1024)
+        # end if
+
+    @staticmethod
+    def __new_stats():
+        """Return an empty statistics entry"""
+        return {'calls' : 0, 'wall_time' : 0.0, 'mem_delta_kb' : 0,
+                'peak_mem_kb' : None}
+
+    def __traced_memory(self):
+        """Return the current traced memory after folding the traced peak
+        into every open phase and resetting it (if possible)."""
+        current, peak = tracemalloc.get_traced_memory()
+        if _HAVE_RESET_PEAK:
+            for index, open_peak in enumerate(self.__open_peaks):
+                self.__open_peaks[index] = max(open_peak, peak)
+            # end for
+            tracemalloc.reset_peak()
+        # end if
+        return current
+
+    @contextmanager
+    def phase(self, name, item=None):
+        """Record the execution of the enclosed block as a call to phase,
+        <name>. If <item> is not None, also record the call for <item>."""
+        if not self.enabled:
+            yield
+            return
+        # end if
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+        # end if
+        start_mem = self.__traced_memory()
+        self.__open_peaks.append(start_mem)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            mem_delta = self.__traced_memory() - start_mem
+            peak_mem = self.__open_peaks.pop()
+            if not _HAVE_RESET_PEAK:
+                peak_mem = None
+            # end if
+            stats = self.__phases.setdefault(name, self.__new_stats())
+            self.__update(stats, wall_time, mem_delta, peak_mem)
+            if item is not None:
+                items = self.__items.setdefault(name, {})
+                stats = items.setdefault(item, self.__new_stats())
+                self.__update(stats, wall_time, mem_delta, peak_mem)
+            # end if
+        # end try
+
+    def stop(self):
+        """Stop memory tracing if this profiler started it"""
+        if self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False
+        # end if
+
+    def report(self):
+        """Return a dictionary with the recorded profile"""
+        return {'total' : {'wall_time' : time.perf_counter() - self.__start_time,
+                           'peak_rss_kb' : peak_rss_kb()},
+                'phases' : self.__phases, 'items' : self.__items}
+
+    def write_report(self, filename):
+        """Write the recorded profile to <filename> as JSON"""
+        with open(filename, 'w') as outfile:
+            json.dump(self.report(), outfile, indent=2)
+            outfile.write('\n')
+        # end with
+
+    @property
+    def enabled(self):
+        """Return True if this profiler is recording phases"""
+        return self.__enabled
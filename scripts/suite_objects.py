@@ -227,6 +227,9 @@ class SuiteObject(VarDictionary):
         self.__needs_vertical = None
         self.__needs_horizontal = None
         self.__phase_type = phase_type
+        # Scope index: (standard name, search_call_list) -->
+        #   (parent to search, loop substitution okay, generation)
+        self.__scope_index = {}
         # Initialize our dictionary
         super().__init__(self.name, run_env,
                          variables=variables, parent_dict=parent)
@@ -355,6 +358,7 @@ class SuiteObject(VarDictionary):
     def reset_parent(self, new_parent):
         """Reset the parent of this SuiteObject (which has been moved)"""
         self.__parent = new_parent
+        VarDictionary.scope_changed()
 
     def phase(self):
         """Return the CCPP state phase_type for this SuiteObject"""
@@ -830,15 +834,47 @@ class SuiteObject(VarDictionary):
         # end if
         if (found_var is None) and any_scope and (self.parent is not None):
             # We do not have the variable, look to parents.
-            found_var = self.parent.find_variable(standard_name=stdname,
-                                                  source_var=source_var,
-                                                  any_scope=True,
-                                                  clone=clone,
-                                                  search_call_list=scl,
-                                                  loop_subst=loop_subst)
+            pscope, ploop_okay = self.__parent_scope(stdname, scl)
+            if pscope is not None:
+                found_var = pscope.find_variable(standard_name=stdname,
+                                                 source_var=source_var,
+                                                 any_scope=True,
+                                                 clone=clone,
+                                                 search_call_list=scl,
+                                                 loop_subst=(loop_subst and
+                                                             ploop_okay))
+            # end if
         # end if
         return found_var
 
+    def __parent_scope(self, standard_name, search_call_list):
+        """Return the first parent of this SuiteObject which needs to be
+        searched for <standard_name> and whether a loop substitution is still
+        allowed when searching that parent.
+        Parent SuiteObjects which do not contain <standard_name> (in their
+        dictionary or, if <search_call_list> is True, their call list) and
+        which do not specialize <find_variable> are skipped.
+        The result is recorded in this SuiteObject's scope index."""
+        key = (standard_name, search_call_list)
+        generation = VarDictionary.scope_generation(standard_name)
+        entry = self.__scope_index.get(key)
+        if (entry is None) or (entry[2] != generation):
+            pscope = self.parent
+            loop_okay = True
+            while (isinstance(pscope, SuiteObject) and
+                   (type(pscope).find_variable is SuiteObject.find_variable) and
+                   (standard_name not in pscope) and
+                   ((not search_call_list) or (pscope.call_list is None) or
+                    (standard_name not in pscope.call_list))):
+                loop_okay = loop_okay and VarDictionary.loop_var_okay(
+                    standard_name, pscope.run_phase())
+                pscope = pscope.parent
+            # end while
+            entry = (pscope, loop_okay, generation)
+            self.__scope_index[key] = entry
+        # end if
+        return entry[0], entry[1]
+
     def match_variable(self, var, run_env):
         """Try to find a source for <var> in this SuiteObject's dictionary
         tree. Several items are returned:
@@ -1134,6 +1170,8 @@ class Scheme(SuiteObject):
         self.__var_debug_checks = list()
         self.__forward_transforms = list()
         self.__reverse_transforms = list()
+        self.__inplace_transforms = list()
+        self.__skip_reverse_transforms = set()
         self._has_run_phase = True
         self.__optional_vars = list()
         super().__init__(name, context, parent, run_env, active_call_list=True)
@@ -1272,8 +1310,7 @@ class Scheme(SuiteObject):
             if compat_obj is not None and (compat_obj.has_vert_transforms or
                                            compat_obj.has_unit_transforms or
                                            compat_obj.has_kind_transforms):
-                self.add_var_transform(var, compat_obj, vert_dim)
-                has_transform = True
+                has_transform = self.add_var_transform(var, compat_obj, vert_dim)
             # end if
 
             # Is this a conditionally allocated variable?
@@ -1624,27 +1661,10 @@ class Scheme(SuiteObject):
         """Register any variable transformation needed by <var> for this Scheme.
         For any transformation identified in <compat_obj>, create dummy variable
         from <var> to perform the transformation. Determine the indices needed
-        for the transform and save for use during write stage"""
-
-        # Add local variable (<var(local_name)>_local) needed for transformation.
-        # Do not let the Group manage this variable. Handle local var
-        # when writing Group.
-        prop_dict = var.copy_prop_dict()
-        prop_dict['local_name'] = var.get_prop_value('local_name')+'_local'
-        # This is a local variable.
-        if 'intent' in prop_dict:
-            del prop_dict['intent']
-        # end if
-        local_trans_var = Var(prop_dict,
-                              ParseSource(_API_SOURCE_NAME,
-                                          _API_LOCAL_VAR_NAME, var.context),
-                              self.run_env)
-        found = self.__group.find_variable(source_var=local_trans_var, any_scope=False)
-        if not found:
-            lmsg = "Adding new local variable, '{}', for variable transform"
-            self.run_env.logger.info(lmsg.format(local_trans_var.get_prop_value('local_name')))
-            self.__group.transform_locals.append(local_trans_var)
-        # end if
+        for the transform and save for use during write stage.
+        An affine unit conversion of an intent(inout) variable is applied to
+        the Group's variable in place so no dummy variable is needed.
+        Return True if a dummy variable is used for the transformation."""
 
         # Create indices (default) for transform.
         lindices   = [':']*var.get_rank()
@@ -1683,6 +1703,37 @@ class Scheme(SuiteObject):
         #hdim = find_horizontal_dimension(var.get_dimensions())
         #if compat_obj.has_dim_transforms:
 
+        if self.__inplace_transform_ok(var, compat_obj):
+            lmsg = "Automatic in-place unit conversion from '{}' to '{}' for '{}' around '{}'"
+            self.run_env.logger.info(lmsg.format(compat_obj.v2_units,
+                                                 compat_obj.v1_units,
+                                                 compat_obj.v2_stdname,
+                                                 self.subroutine_name))
+            self.__inplace_transforms.append([var.get_prop_value('standard_name'),
+                                              lindices, compat_obj])
+            return False
+        # end if
+
+        # Add local variable (<var(local_name)>_local) needed for transformation.
+        # Do not let the Group manage this variable. Handle local var
+        # when writing Group.
+        prop_dict = var.copy_prop_dict()
+        prop_dict['local_name'] = var.get_prop_value('local_name')+'_local'
+        # This is a local variable.
+        if 'intent' in prop_dict:
+            del prop_dict['intent']
+        # end if
+        local_trans_var = Var(prop_dict,
+                              ParseSource(_API_SOURCE_NAME,
+                                          _API_LOCAL_VAR_NAME, var.context),
+                              self.run_env)
+        found = self.__group.find_variable(source_var=local_trans_var, any_scope=False)
+        if not found:
+            lmsg = "Adding new local variable, '{}', for variable transform"
+            self.run_env.logger.info(lmsg.format(local_trans_var.get_prop_value('local_name')))
+            self.__group.transform_locals.append(local_trans_var)
+        # end if
+
         # Register any reverse (pre-Scheme) transforms. Also, save local_name used in
         # transform (used in write stage).
         if (var.get_prop_value('intent') != 'out'):
@@ -1708,6 +1759,68 @@ class Scheme(SuiteObject):
                                               local_trans_var.get_prop_value('local_name'),
                                               lindices, rindices, compat_obj])
         # end if
+        return True
+
+    def __inplace_transform_ok(self, var, compat_obj):
+        """Return True if the transformation described by <compat_obj> can
+        be applied in place to the Group's variable matching <var>.
+        This is the case for an affine unit conversion (no kind or vertical
+        orientation change) of a required intent(inout) variable which the
+        Group may modify. Dimension transforms are not considered as the
+        transform indices do not implement them (see add_var_transform)."""
+        if (var.get_prop_value('intent') != 'inout') or \
+           var.get_prop_value('optional'):
+            return False
+        # end if
+        if compat_obj.has_vert_transforms or compat_obj.has_kind_transforms:
+            return False
+        # end if
+        if not compat_obj.has_affine_unit_transforms:
+            return False
+        # end if
+        stdname = var.get_prop_value('standard_name')
+        gvar = self.__group.call_list.find_variable(standard_name=stdname)
+        return (gvar is not None) and (gvar.get_prop_value('intent') != 'in')
+
+    def transform_keys(self):
+        """Return a list of (dummy, standard_name, key) for each variable
+        transformed through a local dummy variable by this Scheme.
+        Two transforms with the same key compute the same dummy values from
+        the same Group variable."""
+        keys = list()
+        for (dummy, _, sname, rindices, lindices, compat_obj) in self.__reverse_transforms:
+            key = compat_obj.reverse_transform(lvar_lname=dummy, rvar_lname=sname,
+                                               lvar_indices=lindices,
+                                               rvar_indices=rindices)
+            keys.append((dummy, sname, key))
+        # end for
+        for (_, sname, dummy, lindices, rindices, compat_obj) in self.__forward_transforms:
+            key = compat_obj.reverse_transform(lvar_lname=dummy, rvar_lname=sname,
+                                               lvar_indices=lindices,
+                                               rvar_indices=rindices)
+            if (dummy, sname, key) not in keys:
+                keys.append((dummy, sname, key))
+            # end if
+        # end for
+        return keys
+
+    def skip_reverse_transforms(self, synced):
+        """Do not write the reverse (pre-Scheme) transforms whose
+        (dummy, standard_name, key) is in <synced>, the dummy variable
+        already contains the transformed value of the Group's variable."""
+        for tindex, tkey in enumerate(self.transform_keys()):
+            if (tindex < len(self.__reverse_transforms)) and (tkey in synced):
+                self.__skip_reverse_transforms.add(tindex)
+            # end if
+        # end for
+
+    def modified_stdnames(self):
+        """Return the set of standard names of the variables this Scheme
+        may modify"""
+        return {x.get_prop_value('standard_name')
+                for x in self.call_list.variable_list()
+                if x.get_prop_value('intent') != 'in'}
+
     def write_var_transform(self, var, dummy, rindices, lindices, compat_obj,
                             outfile, indent, forward):
         """Write variable transformation needed to call this Scheme in <outfile>.
@@ -1747,10 +1860,20 @@ class Scheme(SuiteObject):
         #    or our module
         cldicts = [self.__group, self.__group.call_list]
         cldicts.extend(self.__group.suite_dicts())
+        # Pass the dummy variable of any transform, including intent(out)
+        # variables which only have a forward transform
+        # (optional variables are passed through their local pointers)
+        sub_lname_list = list(self.__reverse_transforms)
+        for (var_lname, var_sname, dummy, lindices, rindices, compat_obj) in self.__forward_transforms:
+            svar = self.call_list.find_variable(standard_name=var_sname)
+            if (svar is not None) and (not svar.get_prop_value('optional')):
+                sub_lname_list.append([dummy, var_lname, var_sname, rindices, lindices, compat_obj])
+            # end if
+        # end for
         my_args = self.call_list.call_string(cldicts=cldicts,
                                              is_func_call=True,
                                              subname=self.subroutine_name,
-                                             sub_lname_list = self.__reverse_transforms)
+                                             sub_lname_list = sub_lname_list)
         #
         outfile.write('', indent)
         outfile.write('if ({} == 0) then'.format(errcode), indent)
@@ -1758,27 +1881,47 @@ class Scheme(SuiteObject):
         # Write debug checks (operating on variables
         # coming from the group's call list)
         #
+        # If the checks do not run on every call, they are guarded by a flag
+        # set at the start of the Group
+        dbg_indent = indent+1
+        if self.__var_debug_checks and self.__group.debug_check_var_name():
+            outfile.write(f"if ({Group.debug_check_flag}) then", indent+1)
+            dbg_indent = indent+2
+        # end if
         if self.__var_debug_checks:
-            outfile.write('! ##################################################################', indent+1)
-            outfile.comment('Begin debug tests', indent+1)
-            outfile.write('! ##################################################################', indent+1)
-            outfile.write('', indent+1)
+            outfile.write('! ##################################################################', dbg_indent)
+            outfile.comment('Begin debug tests', dbg_indent)
+            outfile.write('! ##################################################################', dbg_indent)
+            outfile.write('', dbg_indent)
         # end if
         for (var, internal_var) in self.__var_debug_checks:
-            stmt = self.write_var_debug_check(var, internal_var, cldicts, outfile, errcode, errmsg, indent+1)
+            stmt = self.write_var_debug_check(var, internal_var, cldicts, outfile, errcode, errmsg, dbg_indent)
         # end for
         if self.__var_debug_checks:
-            outfile.write('! ##################################################################', indent+1)
-            outfile.comment('End debug tests', indent+1)
-            outfile.write('! ##################################################################', indent+1)
-            outfile.write('', indent+1)
+            outfile.write('! ##################################################################', dbg_indent)
+            outfile.comment('End debug tests', dbg_indent)
+            outfile.write('! ##################################################################', dbg_indent)
+            outfile.write('', dbg_indent)
+        # end if
+        if dbg_indent > indent+1:
+            outfile.write('end if', indent+1)
         # end if
         #
         # Write any reverse (pre-Scheme) transforms.
-        if len(self.__reverse_transforms) > 0:
+        if (len(self.__reverse_transforms) > len(self.__skip_reverse_transforms)) or \
+           self.__inplace_transforms:
             outfile.comment('Compute reverse (pre-scheme) transforms', indent+1)
         # end if
+        for (var_sname, indices, compat_obj) in self.__inplace_transforms:
+            lvar       = self.__group.call_list.find_variable(standard_name=var_sname)
+            lvar_lname = lvar.get_prop_value('local_name')
+            tstmt = self.write_var_transform(lvar_lname, lvar_lname, indices, indices, compat_obj, outfile, indent+1, False)
+        # end for
         for rcnt, (dummy, var_lname, var_sname, rindices, lindices, compat_obj) in enumerate(self.__reverse_transforms):
+            if rcnt in self.__skip_reverse_transforms:
+                # <dummy> already holds the transformed value of <var>
+                continue
+            # end if
             # Any transform(s) were added during the Group's analyze phase, but
             # the local_name(s) of the <var> assoicated with the transform(s)
             # may have since changed. Here we need to use the standard_name
@@ -1803,9 +1946,22 @@ class Scheme(SuiteObject):
         #
         if self._has_run_phase:
             stmt = 'call {}({})'
+            timer_id = self.__group.timer_id(self)
             outfile.write('',indent+1)
             outfile.write('! Call scheme', indent+1)
+            if timer_id:
+                tstart = f"call ccpp_timer_start({timer_id}, "
+                tstart += f"'{self.__group.suite.name}', "
+                tstart += f"'{self.__group.sdf_name}', '{self.name}', "
+                tstart += f"'{self.__group.phase()}', {Group.timer_count_name})"
+                outfile.write(tstart, indent+1)
+            # end if
             outfile.write(stmt.format(self.subroutine_name, my_args), indent+1)
+            if timer_id:
+                tstop = f"call ccpp_timer_stop({timer_id}, "
+                tstop += f"{Group.timer_count_name})"
+                outfile.write(tstop, indent+1)
+            # end if
             outfile.write('',indent+1)
         # end if
         #
@@ -1823,9 +1979,14 @@ class Scheme(SuiteObject):
         #
         # Write any forward (post-Scheme) transforms.
         #
-        if len(self.__forward_transforms) > 0:
+        if (len(self.__forward_transforms) > 0) or self.__inplace_transforms:
             outfile.comment('Compute forward (post-scheme) transforms', indent+1)
         # end if
+        for (var_sname, indices, compat_obj) in self.__inplace_transforms:
+            lvar       = self.__group.call_list.find_variable(standard_name=var_sname)
+            lvar_lname = lvar.get_prop_value('local_name')
+            tstmt = self.write_var_transform(lvar_lname, lvar_lname, indices, indices, compat_obj, outfile, indent+1, True)
+        # end for
         for fcnt, (var_lname, var_sname, dummy, lindices, rindices, compat_obj) in enumerate(self.__forward_transforms):
             # Any transform(s) were added during the Group's analyze phase, but
             # the local_name(s) of the <var> assoicated with the transform(s)
@@ -1861,6 +2022,11 @@ class Scheme(SuiteObject):
         """Return this scheme's actual subroutine name"""
         return self.__subroutine_name
 
+    @property
+    def has_debug_checks(self):
+        """Return True if this Scheme has any variable debug checks"""
+        return bool(self.__var_debug_checks)
+
     @property
     def has_vertical_dim(self):
         """Return True if at least one of this Scheme's variables has
@@ -2126,6 +2292,16 @@ class Group(SuiteObject):
 ! ========================================================================
 '''
 
+    # Local flag which is true if the variable debug checks run on this call
+    debug_check_flag = 'ccpp_run_debug_checks'
+    # Local variables for timing scheme calls (--instrument)
+    timer_ids_name = 'ccpp_timer_ids'
+    timer_count_name = 'ccpp_timer_count'
+    # Local variables for the thread copies of suite variables (--threaded-run)
+    thread_index_name = 'ccpp_thread_index'
+    num_threads_name = 'ccpp_num_threads'
+    thread_number_stdname = 'ccpp_thread_number'
+
     __thread_check = CodeBlock([('#ifdef _OPENMP', -1),
                                 ('if (omp_get_thread_num() > 1) then', 1),
                                 ('{errcode} = 1', 2),
@@ -2147,6 +2323,7 @@ class Group(SuiteObject):
         <transition> is the group's phase, <parent> is the group's suite.
         """
         name = parent.name + '_' + group_xml.get('name')
+        self.__sdf_name = group_xml.get('name')
         if transition not in CCPP_STATE_MACH.transitions():
             errmsg = "Bad transition argument to Group, '{}'"
             raise ParseInternalError(errmsg.format(transition))
@@ -2180,6 +2357,10 @@ class Group(SuiteObject):
         self._set_state = None
         self._ddt_library = None
         self.transform_locals = list()
+        # Module variable for the variable debug check interval (if any)
+        self.__debug_check_var = None
+        # Work arrays declared in the suite module (--persistent-work-arrays)
+        self.__module_work_arrays = set()
 
     def phase_match(self, scheme_name):
         """If scheme_name matches the group phase, return the group and
@@ -2307,6 +2488,135 @@ class Group(SuiteObject):
             self.run_env.logger.debug("{}".format(self))
         # end if
 
+    @staticmethod
+    def thread_copy_type(var):
+        """Return the Fortran type specification of <var> (used to declare
+        its thread copies)"""
+        kind = var.get_prop_value('kind')
+        if var.is_ddt():
+            return f"type({kind})"
+        # end if
+        vtype = var.get_prop_value('type')
+        if kind:
+            return f"{vtype}({kind})"
+        # end if
+        return vtype
+
+    @staticmethod
+    def thread_copies_name(var):
+        """Return the name of the suite module array which holds the
+        thread copies of <var> (--threaded-run)"""
+        return f"{var.get_prop_value('local_name')}_thread_copies"
+
+    def thread_copy_vars(self):
+        """Return the list of the suite's thread copy variables
+        (--threaded-run) which are referenced by this Group's schemes"""
+        copy_vars = list()
+        for svar in self.suite.thread_copy_vars:
+            stdname = svar.get_prop_value('standard_name')
+            for scheme in self.schemes():
+                if scheme.call_list.find_variable(standard_name=stdname,
+                                                  any_scope=False):
+                    copy_vars.append(svar)
+                    break
+                # end if
+            # end for
+        # end for
+        return copy_vars
+
+    @staticmethod
+    def __thread_copy_ref(svar, thread):
+        """Return a reference to the copy of <svar> for <thread>"""
+        colons = [':'] * len(svar.get_dimensions())
+        copies = Group.thread_copies_name(svar)
+        return f"{copies}({', '.join(colons + [thread])})"
+
+    def __write_thread_copy_pointers(self, outfile, copy_vars, errcode,
+                                     errmsg, indent):
+        """Point the variables in <copy_vars> at this thread's copy.
+        Run phase groups use the copy for the calling thread, other phases
+        are not threaded and use the first copy."""
+        tindex = Group.thread_index_name
+        if self.run_phase():
+            outfile.write("! Use the suite variable copies for this thread",
+                          indent)
+            thread_num = self.call_list.find_variable(
+                standard_name=Group.thread_number_stdname, any_scope=False)
+            if thread_num is not None:
+                outfile.write(f"{tindex} = " +
+                              thread_num.get_prop_value('local_name'), indent)
+            else:
+                outfile.write(f"{tindex} = 1", indent)
+                outfile.write(f"!$ {tindex} = omp_get_thread_num() + 1",
+                              indent)
+            # end if
+        else:
+            outfile.write("! Use the first copy of suite variables " +
+                          "(copied to all threads below)", indent)
+            outfile.write(f"{tindex} = 1", indent)
+        # end if
+        for svar in copy_vars:
+            lname = svar.get_prop_value('local_name')
+            copies = Group.thread_copies_name(svar)
+            rank = len(svar.get_dimensions())
+            if self.run_phase():
+                outfile.write(f"if ({tindex} > size({copies}, {rank+1})) then",
+                              indent)
+                outfile.write(f"{errcode} = 1", indent+1)
+                emsg = f"write({errmsg}, '(a,i0)') "
+                emsg += f'"No copy of {lname} for thread ", {tindex}'
+                outfile.write(emsg, indent+1)
+                outfile.write("return", indent+1)
+                outfile.write("end if", indent)
+            # end if
+            bounds = ", ".join([f"lbound({copies}, {x+1}):"
+                                for x in range(rank)])
+            if bounds:
+                lname = f"{lname}({bounds})"
+            # end if
+            outfile.write(f"{lname} => " +
+                          Group.__thread_copy_ref(svar, tindex), indent)
+        # end for
+
+    @staticmethod
+    def __write_thread_copy_broadcast(outfile, copy_vars, indent):
+        """Copy the values of the variables in <copy_vars> (set by a
+        phase which is not threaded) to the copies of the other threads"""
+        tindex = Group.thread_index_name
+        outfile.write('\n! Copy suite variables to all threads', indent)
+        for svar in copy_vars:
+            lname = svar.get_prop_value('local_name')
+            copies = Group.thread_copies_name(svar)
+            rank = len(svar.get_dimensions())
+            outfile.write(f"do {tindex} = 2, size({copies}, {rank+1})", indent)
+            outfile.write(f"{Group.__thread_copy_ref(svar, tindex)} = {lname}",
+                          indent+1)
+            outfile.write("end do", indent)
+        # end for
+
+    @staticmethod
+    def __write_persistent_allocate(outfile, lname, alloc_str, indent):
+        """Write code to allocate <lname> with the bounds in <alloc_str>
+        unless it is already allocated with those bounds."""
+        checks = list()
+        for dim_index, dim in enumerate(alloc_str.split(', ')):
+            if ':' in dim:
+                lbnd, ubnd = dim.split(':')
+            else:
+                lbnd, ubnd = '1', dim
+            # end if
+            checks.append(f"(lbound({lname}, {dim_index+1}) /= {lbnd})")
+            checks.append(f"(ubound({lname}, {dim_index+1}) /= {ubnd})")
+        # end for
+        outfile.write(f"if (allocated({lname})) then", indent)
+        outfile.write(f"if ({' .or. '.join(checks)}) then", indent+1)
+        outfile.write(f"deallocate({lname})", indent+2)
+        outfile.write("end if", indent+1)
+        outfile.write("end if", indent)
+        outfile.write(f"if (.not. allocated({lname})) then", indent)
+        outfile.write(f"allocate({lname}({alloc_str}))", indent+1)
+        outfile.write("end if", indent)
+
     def allocate_dim_str(self, dims, context):
         """Create the dimension string for an allocate statement"""
         rdims = list()
@@ -2356,19 +2666,107 @@ class Group(SuiteObject):
         # end if
         return fvar
 
-    def write(self, outfile, host_arglist, indent, const_mod,
-              suite_vars=None, allocate=False, deallocate=False):
-        """Write code for this subroutine (Group), including contents,
-        to <outfile>"""
-        # Unused arguments are for consistent write interface
-        # pylint: disable=unused-argument
-        # group type for (de)allocation
-        if self.timestep_phase():
-            group_type = 'timestep' # Just allocate for the timestep
-        else:
-            group_type = 'run'      # Allocate for entire run
+    def __plan_transforms(self):
+        """Plan the variable transforms of the Schemes in this Group.
+        A Scheme does not repeat a reverse (pre-Scheme) transform if the
+        previous Schemes already left the same dummy variable holding the
+        transformed value of the same Group variable (and no Scheme in
+        between modified either one)."""
+        self.__plan_part_transforms(self.parts, set())
+
+    @staticmethod
+    def __plan_part_transforms(parts, synced):
+        """Plan the variable transforms of the Schemes in <parts>, which
+        are called in order. <synced> is the set of transform keys whose
+        dummy variable holds the transformed value of its Group variable.
+        Return the updated set."""
+        for item in parts:
+            if isinstance(item, TimeSplit):
+                synced = Group.__plan_part_transforms(item.parts, synced)
+                continue
+            # end if
+            if not isinstance(item, Scheme):
+                # Do not track transforms through loops or other constructs
+                synced = set()
+                continue
+            # end if
+            item.skip_reverse_transforms(synced)
+            keys = item.transform_keys()
+            modified = item.modified_stdnames()
+            dummies = {x[0] for x in keys}
+            synced = {x for x in synced
+                      if (x[1] not in modified) and (x[0] not in dummies)}
+            synced.update(keys)
+        # end for
+        return synced
+
+    def debug_check_var_name(self):
+        """Return the name of the module variable which records when the
+        variable debug checks of this Group last ran or None if the checks
+        run on every call (or this Group has no checks)."""
+        interval = self.run_env.debug_check_interval
+        if (interval == 1) or (not self.run_env.debug):
+            return None
+        # end if
+        if not any(x.has_debug_checks for x in self.schemes()):
+            return None
+        # end if
+        if self.__debug_check_var is None:
+            # The variable is declared in the suite module so it must not
+            #    clash with a suite variable or another Group's variable
+            suite = self.parent
+            exclude = {suite[x].get_prop_value('local_name').lower()
+                       for x in suite.keys()}
+            exclude.update({x.__debug_check_var for x in suite.groups
+                            if x.__debug_check_var})
+            if interval == 0:
+                prefix = f"{self.name}_debug_checked"
+            else:
+                prefix = f"{self.name}_debug_ncalls"
+            # end if
+            self.__debug_check_var = self.new_internal_variable_name(
+                prefix=prefix, exclude=exclude)
+        # end if
+        return self.__debug_check_var
+
+    def write_debug_check_data(self, outfile, indent):
+        """Write the declaration of the module variable which records
+        when the variable debug checks of this Group last ran (if needed).
+        The variable is private to each thread."""
+        var_name = self.debug_check_var_name()
+        if var_name is not None:
+            if self.run_env.debug_check_interval == 0:
+                outfile.write(f"logical :: {var_name} = .false.", indent)
+            else:
+                outfile.write(f"integer :: {var_name} = 0", indent)
+            # end if
+            outfile.write(f"!$omp threadprivate({var_name})", indent)
         # end if
-        # Collect information on local variables
+
+    def timed_schemes(self):
+        """Return the list of this Group's scheme calls which are timed
+        (empty unless the --instrument option is on)"""
+        if not self.run_env.instrument:
+            return []
+        # end if
+        return [x for x in self.schemes() if x._has_run_phase]
+
+    def timer_id(self, scheme):
+        """Return the timer id variable for the call to <scheme> or None
+        if the call is not timed"""
+        for index, tscheme in enumerate(self.timed_schemes()):
+            if tscheme is scheme:
+                return f"{Group.timer_ids_name}({index + 1})"
+            # end if
+        # end for
+        return None
+
+    def __local_vars(self):
+        """Collect information on the local variables of this Group.
+        Return a tuple with the dictionaries of allocatable, optional, and
+        scalar local variables (each entry is (var, dictionary, optional)),
+        the sets of allocatable and optional array local names, and the
+        list of local pointers (each entry is [name, kind, dims, type])."""
         subpart_allocate_vars = {}
         subpart_optional_vars = {}
         subpart_scalar_vars = {}
@@ -2461,6 +2859,57 @@ class Group(SuiteObject):
             # end for
 
         # end for
+        return (subpart_allocate_vars, subpart_optional_vars,
+                subpart_scalar_vars, allocatable_var_set, optional_var_set,
+                pointer_var_set)
+
+    def work_arrays(self):
+        """Return a list of (local name, variable, target) for each local
+        array of this run phase Group which may be kept allocated between
+        calls (--persistent-work-arrays) or an empty list.
+        DDT arrays are not included as they are declared in the suite module
+        which does not use the DDT modules."""
+        if not (self.run_env.persistent_work_arrays and self.run_phase()):
+            return []
+        # end if
+        (allocate_vars, optional_vars, _, allocatable_set,
+         optional_set, _) = self.__local_vars()
+        arrays = list()
+        for lname in sorted(allocatable_set):
+            var, _, target = allocate_vars[lname]
+            if not var.is_ddt():
+                arrays.append((lname, var, target))
+            # end if
+        # end for
+        for lname in sorted(optional_set):
+            var, _, target = optional_vars[lname]
+            if not var.is_ddt():
+                arrays.append((lname, var, target))
+            # end if
+        # end for
+        return arrays
+
+    def keep_work_arrays(self, lnames):
+        """Record that the local arrays in <lnames> are declared in the suite
+        module (per thread) and are kept allocated between calls."""
+        self.__module_work_arrays = set(lnames)
+
+    def write(self, outfile, host_arglist, indent, const_mod,
+              suite_vars=None, allocate=False, deallocate=False):
+        """Write code for this subroutine (Group), including contents,
+        to <outfile>"""
+        # Unused arguments are for consistent write interface
+        # pylint: disable=unused-argument
+        # group type for (de)allocation
+        if self.timestep_phase():
+            group_type = 'timestep' # Just allocate for the timestep
+        else:
+            group_type = 'run'      # Allocate for entire run
+        # end if
+        # Collect information on local variables
+        (subpart_allocate_vars, subpart_optional_vars, subpart_scalar_vars,
+         allocatable_var_set, optional_var_set,
+         pointer_var_set) = self.__local_vars()
         # First, write out the subroutine header
         subname = self.name
         call_list = self.call_list.call_string()
@@ -2480,6 +2929,11 @@ class Group(SuiteObject):
             slen = ' '*(modmax - len(smod))
             outfile.write(scheme_use.format(smod, slen, sname), indent+1)
         # end for
+        timed_schemes = self.timed_schemes()
+        if timed_schemes:
+            tmods = 'ccpp_timer_start, ccpp_timer_stop, ccpp_timer_kind'
+            outfile.write(f"use ccpp_timing, only: {tmods}", indent+1)
+        # end if
         # Look for any DDT types
         call_vars = self.call_list.variable_list()
         all_vars = ([x[0] for x in subpart_allocate_vars.values()] +
@@ -2509,8 +2963,16 @@ class Group(SuiteObject):
             var.write_def(outfile, indent+1, spdict,
                           allocatable=False, target=target)
         # end for
+        # Run phase work arrays which are kept (per thread) between calls
+        #    are declared in the suite module
+        persistent_arrays = [x for x in (sorted(allocatable_var_set) +
+                                         sorted(optional_var_set))
+                             if x in self.__module_work_arrays]
         # Allocatable arrays
         for key in subpart_allocate_vars:
+            if key in persistent_arrays:
+                continue
+            # end if
             var = subpart_allocate_vars[key][0]
             spdict = subpart_allocate_vars[key][1]
             target = subpart_allocate_vars[key][2]
@@ -2520,6 +2982,9 @@ class Group(SuiteObject):
         # end for
         # Target arrays.
         for key in subpart_optional_vars:
+            if key in persistent_arrays:
+                continue
+            # end if
             var = subpart_optional_vars[key][0]
             spdict = subpart_optional_vars[key][1]
             target = subpart_optional_vars[key][2]
@@ -2531,6 +2996,54 @@ class Group(SuiteObject):
         for (name, kind, dim, vtype) in pointer_var_set:
             var.write_ptr_def(outfile, indent+1, name,  kind, dim, vtype)
         # end for
+        debug_check_var = self.debug_check_var_name()
+        if debug_check_var is not None:
+            outfile.write(f"logical :: {Group.debug_check_flag}", indent+1)
+        # end if
+        # Each timed scheme call registers its timer on its first call
+        #   (on each thread, so the ids are private to the thread)
+        if timed_schemes:
+            outfile.write(f"integer, save :: {Group.timer_ids_name}" +
+                          f"({len(timed_schemes)}) = 0", indent+1)
+            outfile.write(f"!$omp threadprivate({Group.timer_ids_name})",
+                          indent+1)
+            outfile.write(f"integer(ccpp_timer_kind) :: {Group.timer_count_name}",
+                          indent+1)
+        # end if
+        # Suite variables with a copy for each thread (--threaded-run) are
+        #    referenced through a pointer to this thread's copy
+        copy_vars = self.thread_copy_vars()
+        alloc_copies = list()
+        dealloc_copies = list()
+        if allocate or deallocate:
+            for svar in self.suite.thread_copy_vars:
+                if svar.get_dimensions():
+                    persistence = svar.get_prop_value('persistence')
+                else:
+                    persistence = 'run'
+                # end if
+                if group_type == persistence:
+                    if allocate:
+                        alloc_copies.append(svar)
+                    else:
+                        dealloc_copies.append(svar)
+                    # end if
+                # end if
+            # end for
+        # end if
+        for svar in copy_vars:
+            rank = len(svar.get_dimensions())
+            dimstr = f"({','.join([':']*rank)})" if rank else ''
+            lname = svar.get_prop_value('local_name')
+            outfile.write(f"{Group.thread_copy_type(svar)}, pointer :: " +
+                          f"{lname}{dimstr}", indent+1)
+        # end for
+        if copy_vars:
+            outfile.write(f"integer :: {Group.thread_index_name}", indent+1)
+        # end if
+        if alloc_copies:
+            outfile.write(f"integer :: {Group.num_threads_name}", indent+1)
+        # end if
         outfile.write('', 0)
         # Get error variable names
         if self.run_env.use_error_obj:
@@ -2576,6 +3089,21 @@ class Group(SuiteObject):
                 outfile.write(action, indent+1)
             # end if
         # end for
+        # Decide whether to run the variable debug checks on this call
+        if debug_check_var is not None:
+            outfile.write("! Run the variable debug checks on this call?",
+                          indent+1)
+            interval = self.run_env.debug_check_interval
+            if interval == 0:
+                outfile.write(f"{Group.debug_check_flag} = .not. {debug_check_var}",
+                              indent+1)
+            else:
+                outfile.write(f"{debug_check_var} = mod({debug_check_var}, {interval}) + 1",
+                              indent+1)
+                outfile.write(f"{Group.debug_check_flag} = ({debug_check_var} == 1)",
+                              indent+1)
+            # end if
+        # end if
         # Allocate local arrays
         outfile.write('\n! Allocate local arrays', indent+1)
         alloc_stmt = "allocate({}({}))"
@@ -2583,20 +3111,30 @@ class Group(SuiteObject):
             var = subpart_allocate_vars[lname][0]
             dims = var.get_dimensions()
             alloc_str = self.allocate_dim_str(dims, var.context)
-            outfile.write(alloc_stmt.format(lname, alloc_str), indent+1)
+            if lname in persistent_arrays:
+                Group.__write_persistent_allocate(outfile, lname, alloc_str,
+                                                  indent+1)
+            else:
+                outfile.write(alloc_stmt.format(lname, alloc_str), indent+1)
+            # end if
         # end for
         for lname in optional_var_set:
             var = subpart_optional_vars[lname][0]
             dims = var.get_dimensions()
             alloc_str = self.allocate_dim_str(dims, var.context)
-            outfile.write(alloc_stmt.format(lname, alloc_str), indent+1)
+            if lname in persistent_arrays:
+                Group.__write_persistent_allocate(outfile, lname, alloc_str,
+                                                  indent+1)
+            else:
+                outfile.write(alloc_stmt.format(lname, alloc_str), indent+1)
+            # end if
         # end for
         # Allocate suite vars
         if allocate:
             outfile.write('\n! Allocate suite_vars', indent+1)
             for svar in suite_vars.variable_list():
                 dims = svar.get_dimensions()
-                if dims:
+                if dims and (svar not in suite_vars.thread_copy_vars):
                     timestep_var = svar.get_prop_value('persistence')
                     if group_type == timestep_var:
                         alloc_str = self.allocate_dim_str(dims, svar.context)
@@ -2607,19 +3145,54 @@ class Group(SuiteObject):
                 # end if dims (do not allocate scalars)
             # end for
         # end if
+        # Allocate a copy of suite variables for each thread
+        if alloc_copies:
+            nthreads = Group.num_threads_name
+            outfile.write(f"{nthreads} = 1", indent+1)
+            outfile.write(f"!$ {nthreads} = omp_get_max_threads()", indent+1)
+        # end if
+        for svar in alloc_copies:
+            dims = svar.get_dimensions()
+            alloc_dims = [f"1:{Group.num_threads_name}"]
+            if dims:
+                alloc_dims.insert(0, self.allocate_dim_str(dims, svar.context))
+            # end if
+            outfile.write(alloc_stmt.format(Group.thread_copies_name(svar),
+                                            ", ".join(alloc_dims)), indent+1)
+        # end for
+        if copy_vars:
+            self.__write_thread_copy_pointers(outfile, copy_vars, errcode,
+                                              errmsg, indent+1)
+        # end if
         # Write the scheme and subcycle calls
+        self.__plan_transforms()
         for item in self.parts:
             item.write(outfile, errcode, errmsg, indent + 1)
         # end for
-        # Deallocate local arrays
-        if allocatable_var_set:
+        if copy_vars and (not self.run_phase()):
+            Group.__write_thread_copy_broadcast(outfile, copy_vars, indent+1)
+        # end if
+        # Remember that the variable debug checks passed
+        if (debug_check_var is not None) and \
+           (self.run_env.debug_check_interval == 0):
+            cond = f"{Group.debug_check_flag} .and. ({errcode} == 0)"
+            outfile.write(f"if ({cond}) then", indent+1)
+            outfile.write(f"{debug_check_var} = .true.", indent+2)
+            outfile.write("end if", indent+1)
+        # end if
+        # Deallocate local arrays (persistent arrays are kept for the next call)
+        if allocatable_var_set and (not persistent_arrays):
             outfile.write('\n! Deallocate local arrays', indent+1)
         # end if
         for lname in sorted(allocatable_var_set):
-            outfile.write('if (allocated({})) {} deallocate({})'.format(lname,' '*(20-len(lname)),lname), indent+1)
+            if lname not in persistent_arrays:
+                outfile.write('if (allocated({})) {} deallocate({})'.format(lname,' '*(20-len(lname)),lname), indent+1)
+            # end if
         # end for
         for lname in optional_var_set:
-            outfile.write('if (allocated({})) {} deallocate({})'.format(lname,' '*(20-len(lname)),lname), indent+1)
+            if lname not in persistent_arrays:
+                outfile.write('if (allocated({})) {} deallocate({})'.format(lname,' '*(20-len(lname)),lname), indent+1)
+            # end if
         # end for
         # Nullify local pointers
         if pointer_var_set:
@@ -2633,7 +3206,7 @@ class Group(SuiteObject):
         if deallocate:
             for svar in suite_vars.variable_list():
                 dims = svar.get_dimensions()
-                if dims:
+                if dims and (svar not in suite_vars.thread_copy_vars):
                     timestep_var = svar.get_prop_value('persistence')
                     if group_type == timestep_var:
                         lname = svar.get_prop_value('local_name')
@@ -2642,6 +3215,22 @@ class Group(SuiteObject):
                 # end if (no else, do not deallocate scalars)
             # end for
         # end if
+        for svar in dealloc_copies:
+            lname = Group.thread_copies_name(svar)
+            outfile.write(f"if (allocated({lname})) deallocate({lname})",
+                          indent+1)
+        # end for
+        # Release the work arrays kept by each thread (the threadprivate
+        #    copies persist if the run phase used the same number of threads)
+        if deallocate and (group_type == 'run') and suite_vars.work_arrays:
+            outfile.write('\n! Release the run phase work arrays', indent+1)
+            outfile.write('!$omp parallel', indent+1)
+            for lname in suite_vars.work_arrays:
+                outfile.write(f"if (allocated({lname})) deallocate({lname})",
+                              indent+2)
+            # end for
+            outfile.write('!$omp end parallel', indent+1)
+        # end if
         self._set_state.write(outfile, indent, {})
         # end if
         outfile.write(Group.__subend.format(subname=subname), indent)
@@ -2651,6 +3240,11 @@ class Group(SuiteObject):
         """Return this Group's suite"""
         return self.parent
 
+    @property
+    def sdf_name(self):
+        """Return this Group's name in the suite definition file"""
+        return self.__sdf_name
+
     def suite_dicts(self):
         """Return a list of this Group's Suite's dictionaries"""
         return self.suite.suite_dicts()
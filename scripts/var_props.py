@@ -25,6 +25,9 @@ from parse_tools import ParseInternalError, ParseSyntaxError, CCPPError
 ###############################################################################
 _REAL_SUBST_RE = re.compile(r"(.*\d)p(\d.*)")
 _HDIM_TEMPNAME = '_CCPP_HORIZ_DIM'
+# Unit transforms which scale and/or offset a variable by a constant
+_AFFINE_UNIT_RE = re.compile(r"^([0-9.]+(E[+-]?[0-9]+)?[{]kind[}][*][{]var[}]|"
+                             r"[{]var[}][*/+-][0-9.]+(E[+-]?[0-9]+)?[{]kind[}])$")
 
 ###############################################################################
 # Supported horizontal dimensions (should be defined in CCPP_STANDARD_VARS)
@@ -866,8 +869,26 @@ class VarCompatObj:
                      "var_stdname", "real", "kind_phys", "m+2 s-2", ['horizontal_dimension'], "var2_lname", False, \
                      _DOCTEST_RUNENV).forward_transform("var1_lname", "var2_lname", 'i', 'i')
     'var1_lname(i) = var2_lname(i)'
+
+    # Test that repeated comparisons are taken from the compatibility cache
+    >>> _hits = VarCompatObj.cache_statistics()['hits']
+    >>> VarCompatObj("var_stdname", "real", "kind_phys", "m", ['horizontal_dimension'], "var1_lname", False, \
+                     "var_stdname", "real", "kind_dyn", "mm", ['horizontal_dimension'], "var2_lname", False, \
+                     _DOCTEST_RUNENV).has_unit_transforms
+    '1.0E+3{kind}*{var}'
+    >>> VarCompatObj("var_stdname", "real", "kind_phys", "m", ['horizontal_dimension'], "foo_lname", False, \
+                     "var_stdname", "real", "kind_dyn", "mm", ['horizontal_dimension'], "bar_lname", False, \
+                     _DOCTEST_RUNENV).has_kind_transforms
+    True
+    >>> VarCompatObj.cache_statistics()['hits'] - _hits
+    1
     """
 
+    # Cache of compatibility results (see __init__), shared by all objects
+    __compat_cache = {}
+    __cache_hits = 0
+    __cache_misses = 0
+
     def __init__(self, var1_stdname, var1_type, var1_kind, var1_units,
                  var1_dims, var1_lname, var1_top, var2_stdname, var2_type, var2_kind,
                  var2_units, var2_dims, var2_lname, var2_top, run_env, v1_context=None,
@@ -882,18 +903,40 @@ class VarCompatObj:
            equivalence or to produce kind transformations.
         <is_tend> is a flag where, if true, we are validating a tendency variable (var1)
            against it's equivalent state variable (var2)
+        The result of a comparison only depends on the variable properties
+           (and the kind specifications in <run_env>) so results are cached
+           and reused for later comparisons with the same properties.
         """
-        self.__equiv = True   # No transformation required
-        self.__compat = True  # Callable with transformation
         self.__stdname = var1_stdname
         self.__v1_context = v1_context
         self.__v2_context = v2_context
-        self.__v1_kind = var1_kind
-        self.__v2_kind = var2_kind
         self.v1_units = var1_units
         self.v2_units = var2_units
         self.v1_stdname = var1_stdname
         self.v2_stdname = var2_stdname
+        cache_key = (var1_stdname, var1_type, var1_kind,
+                     run_env.kind_spec(var1_kind), var1_units,
+                     None if var1_dims is None else tuple(var1_dims), var1_top,
+                     var2_stdname, var2_type, var2_kind,
+                     run_env.kind_spec(var2_kind), var2_units,
+                     None if var2_dims is None else tuple(var2_dims), var2_top,
+                     is_tend)
+        if cache_key in VarCompatObj.__compat_cache:
+            VarCompatObj.__cache_hits += 1
+            (self.__equiv, self.__compat, self.__v1_kind, self.__v2_kind,
+             self.__dim_transforms, self.__kind_transforms,
+             self.__unit_transforms, self.has_vert_transforms,
+             self.__incompat_reason) = VarCompatObj.__compat_cache[cache_key]
+            return
+        # end if
+        VarCompatObj.__cache_misses += 1
+        # Results which refer to a variable's local name or context
+        #    cannot be reused
+        cacheable = True
+        self.__equiv = True   # No transformation required
+        self.__compat = True  # Callable with transformation
+        self.__v1_kind = var1_kind
+        self.__v2_kind = var2_kind
         # Default (null) transform information
         self.__dim_transforms = None
         self.__kind_transforms = None
@@ -928,6 +971,7 @@ class VarCompatObj:
                     emsg += "in {}{}"
                     incompat_reason.append(emsg.format(var1_kind,
                                                        var1_lname, ctx))
+                    cacheable = False
                 # end if
                 self.__v1_kind = None
                 v2_kind = self.char_kind_check(var2_kind)
@@ -937,6 +981,7 @@ class VarCompatObj:
                     emsg += "in {}{}"
                     incompat_reason.append(emsg.format(var2_kind,
                                                        var2_lname, ctx))
+                    cacheable = False
                 # end if
                 self.__v2_kind = None
                 # Character types have to 'match' or the variables are
@@ -1019,6 +1064,20 @@ class VarCompatObj:
             # end if
         # end if
         self.__incompat_reason = " and ".join([x for x in incompat_reason if x])
+        if cacheable:
+            VarCompatObj.__compat_cache[cache_key] = (
+                self.__equiv, self.__compat, self.__v1_kind, self.__v2_kind,
+                self.__dim_transforms, self.__kind_transforms,
+                self.__unit_transforms, self.has_vert_transforms,
+                self.__incompat_reason)
+        # end if
+
+    @classmethod
+    def cache_statistics(cls):
+        """Return a dictionary with the number of compatibility results
+        taken from (hits) or added to (misses) the compatibility cache"""
+        return {'hits' : cls.__cache_hits, 'misses' : cls.__cache_misses,
+                'entries' : len(cls.__compat_cache)}
 
     def forward_transform(self, lvar_lname, rvar_lname, rvar_indices, lvar_indices,
                           adjust_hdim=None, flip_vdim=None):
@@ -1508,6 +1567,20 @@ class VarCompatObj:
         """
         return self.__unit_transforms is not None and self.__unit_transforms[0]
 
+    @property
+    def has_affine_unit_transforms(self):
+        """Return True if this object has unit transformations and both the
+        forward and reverse unit transformations only scale and / or offset
+        the variable by a constant (e.g., '1.0E+3{kind}*{var}' or
+        '{var}-273.15{kind}'). Such a transformation can be applied to a
+        variable in place.
+        """
+        if not self.has_unit_transforms:
+            return False
+        # end if
+        return all(_AFFINE_UNIT_RE.match(x) is not None
+                   for x in self.__unit_transforms)
+
     def __bool__(self):
         """Return True if this object describes two Var objects which are
         equivalent (i.e., no transformation required to pass one to the other).
@@ -29,6 +29,14 @@ if [ $res -ne 0 ]; then
   echo "Failure running capgen test"
 fi
 
+# Run capgen test with the threaded run interface
+./capgen_test/run_test --build-dir ct_thr_build --capgen-options "--threaded-run"
+res=$?
+errcnt=$((errcnt + res))
+if [ $res -ne 0 ]; then
+  echo "Failure running capgen test with the threaded run interface"
+fi
+
 # Run advection test
 ./advection_test/run_test
 res=$?
@@ -53,6 +61,24 @@ fi
    echo "Failure running var_compatibility test"
  fi
 
+# Run var_compatibility test with persistent work arrays
+./var_compatibility_test/run_test --build-dir vc_pwa_build                   \
+  --capgen-options "--persistent-work-arrays --debug-check-interval 0"
+res=$?
+errcnt=$((errcnt + res))
+if [ $res -ne 0 ]; then
+  echo "Failure running var_compatibility test with persistent work arrays"
+fi
+
+# Run var_compatibility test with scheme timers
+./var_compatibility_test/run_test --build-dir vc_inst_build                  \
+  --capgen-options "--instrument"
+res=$?
+errcnt=$((errcnt + res))
+if [ $res -ne 0 ]; then
+  echo "Failure running var_compatibility test with scheme timers"
+fi
+
 if [ $errcnt -eq 0 ]; then
   echo "All tests PASSed!"
 else
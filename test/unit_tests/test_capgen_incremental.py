@@ -0,0 +1,275 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for incremental capgen runs
+               (the --incremental option of scripts/ccpp_capgen.py)
+
+               * Tests include:
+                  - A second run with unchanged inputs does not rewrite
+                    any file
+                  - A run after a suite definition file is modified
+                    rewrites only that suite's cap
+                  - A run after a scheme file is modified regenerates
+                    only the caps of the suites using that scheme
+                  - A run after a scheme file used by no suite is
+                    modified records the new file hash
+                  - A run after a scheme file is modified reuses the
+                    analysis of the other suites and produces the same
+                    caps as a full run
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_capgen_incremental.py    # run the unit tests
+-----------------------------------------------------------------------
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_SCRIPTS_DIR = os.path.abspath(os.path.join(_TEST_DIR, os.pardir,
+                                            os.pardir, "scripts"))
+_CAPGEN_TEST_DIR = os.path.abspath(os.path.join(_TEST_DIR, os.pardir,
+                                                "capgen_test"))
+_CAPGEN = os.path.join(_SCRIPTS_DIR, "ccpp_capgen.py")
+
+if not os.path.exists(_SCRIPTS_DIR):
+    raise ImportError(f"Cannot find scripts directory, {_SCRIPTS_DIR}")
+
+sys.path.append(_SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from ccpp_datafile import retrieve_capgen_inputs
+from parse_tools import file_hash
+# pylint: enable=wrong-import-position
+
+_UNUSED_SCHEME_META = """[ccpp-table-properties]
+  name = unused_scheme
+  type = scheme
+[ccpp-arg-table]
+  name = unused_scheme_run
+  type = scheme
+[ errmsg ]
+  standard_name = ccpp_error_message
+  long_name = Error message for error handling in CCPP
+  units = none
+  dimensions = ()
+  type = character
+  kind = len=512
+  intent = out
+[ errflg ]
+  standard_name = ccpp_error_code
+  long_name = Error flag for error handling in CCPP
+  units = 1
+  dimensions = ()
+  type = integer
+  intent = out
+"""
+
+_UNUSED_SCHEME_F90 = """module unused_scheme
+
+   implicit none
+   private
+
+   public :: unused_scheme_run
+
+CONTAINS
+
+!> \\section arg_table_unused_scheme_run  Argument Table
+!! \\htmlinclude arg_table_unused_scheme_run.html
+!!
+   subroutine unused_scheme_run(errmsg, errflg)
+      character(len=512), intent(out) :: errmsg
+      integer,            intent(out) :: errflg
+
+      errmsg = ''
+      errflg = 0
+   end subroutine unused_scheme_run
+
+end module unused_scheme
+"""
+
+###############################################################################
+def file_stamps(dirname):
+###############################################################################
+    """Return a dictionary of the (inode, mtime) of each file in <dirname>"""
+    stamps = {}
+    for file in os.listdir(dirname):
+        fstat = os.stat(os.path.join(dirname, file))
+        stamps[file] = (fstat.st_ino, fstat.st_mtime_ns)
+    # end for
+    return stamps
+
+class CapgenIncrementalTestCase(unittest.TestCase):
+
+    """Tests for incremental capgen runs"""
+
+    def setUp(self):
+        """Copy the capgen_test inputs to a temporary directory"""
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self._src_dir = os.path.join(self._tmp_dir.name, "src")
+        self._out_dir = os.path.join(self._tmp_dir.name, "out")
+        shutil.copytree(_CAPGEN_TEST_DIR, self._src_dir,
+                        ignore=shutil.ignore_patterns("__pycache__"))
+        self._scheme_files = ["temp_scheme_files.txt", "ddt_suite_files.txt"]
+
+    def _run_capgen(self, out_dir=None, verbose=False):
+        """Run capgen incrementally on the copied capgen_test inputs.
+           capgen is run in a separate process as it registers DDTs
+           globally. Return the output of the run."""
+        host_files = ["test_host_data.meta", "test_host_mod.meta",
+                      "test_host.meta"]
+        scheme_files = self._scheme_files
+        suites = ["ddt_suite.xml", "temp_suite.xml"]
+        args = [sys.executable, _CAPGEN, "--host-files",
+                ",".join(os.path.join(self._src_dir, x) for x in host_files),
+                "--scheme-files",
+                ",".join(os.path.join(self._src_dir, x) for x in scheme_files),
+                "--suites",
+                ",".join(os.path.join(self._src_dir, x) for x in suites),
+                "--host-name", "test_host", "--output-root",
+                out_dir or self._out_dir, "--debug", "--incremental"]
+        if verbose:
+            args.extend(["--verbose", "--verbose"])
+        # end if
+        # Some generated argument lists depend on set ordering, use a
+        # fixed hash seed so runs can be compared
+        env = dict(os.environ, PYTHONHASHSEED="0")
+        result = subprocess.run(args, check=True, capture_output=True,
+                                text=True, env=env)
+        return result.stdout + result.stderr
+
+    def _modify_file(self, filename, old, new):
+        """Replace <old> with <new> in <filename> (in the copied inputs)"""
+        pathname = os.path.join(self._src_dir, filename)
+        with open(pathname, 'r') as infile:
+            contents = infile.read()
+        # end with
+        self.assertTrue(old in contents)
+        with open(pathname, 'w') as outfile:
+            outfile.write(contents.replace(old, new))
+        # end with
+
+    def test_unchanged_inputs(self):
+        """Test that a second run with unchanged inputs rewrites no files"""
+        # Setup
+        self._run_capgen()
+        before = file_stamps(self._out_dir)
+        # Exercise
+        self._run_capgen()
+        # Verify
+        self.assertEqual(before, file_stamps(self._out_dir))
+
+    def test_modified_sdf(self):
+        """Test that modifying an SDF rewrites only that suite's cap"""
+        # Setup
+        self._run_capgen()
+        before = file_stamps(self._out_dir)
+        self._modify_file("temp_suite.xml", "physics2", "physics_two")
+        # Exercise
+        self._run_capgen()
+        # Verify
+        after = file_stamps(self._out_dir)
+        self.assertEqual(before["ccpp_ddt_suite_cap.F90"],
+                         after["ccpp_ddt_suite_cap.F90"])
+        self.assertNotEqual(before["ccpp_temp_suite_cap.F90"],
+                            after["ccpp_temp_suite_cap.F90"])
+        with open(os.path.join(self._out_dir,
+                               "ccpp_temp_suite_cap.F90"), 'r') as infile:
+            self.assertTrue("temp_suite_physics_two" in infile.read())
+        # end with
+
+    def test_modified_scheme(self):
+        """Test that modifying a scheme regenerates only the caps of the
+           suites which use it"""
+        # Setup
+        self._run_capgen()
+        # Mark the suite caps so we can tell which ones are regenerated
+        marker = "! Not regenerated"
+        for cap in ["ccpp_ddt_suite_cap.F90", "ccpp_temp_suite_cap.F90"]:
+            with open(os.path.join(self._out_dir, cap), 'a') as outfile:
+                outfile.write(marker + "\n")
+            # end with
+        # end for
+        self._modify_file("temp_adjust.F90", "CONTAINS",
+                          "! A new comment\nCONTAINS")
+        # Exercise
+        self._run_capgen()
+        # Verify
+        with open(os.path.join(self._out_dir,
+                               "ccpp_ddt_suite_cap.F90"), 'r') as infile:
+            self.assertTrue(marker in infile.read())
+        # end with
+        with open(os.path.join(self._out_dir,
+                               "ccpp_temp_suite_cap.F90"), 'r') as infile:
+            self.assertFalse(marker in infile.read())
+        # end with
+
+    def test_modified_unused_scheme(self):
+        """Test that modifying a scheme used by no suite regenerates no
+           cap but records the new hash of the scheme file"""
+        # Setup
+        for filename, contents in [("unused_scheme.meta", _UNUSED_SCHEME_META),
+                                   ("unused_scheme.F90", _UNUSED_SCHEME_F90)]:
+            with open(os.path.join(self._src_dir, filename), 'w') as outfile:
+                outfile.write(contents)
+            # end with
+        # end for
+        self._scheme_files.append("unused_scheme.meta")
+        self._run_capgen()
+        self._modify_file("unused_scheme.F90", "CONTAINS",
+                          "! A new comment\nCONTAINS")
+        before = file_stamps(self._out_dir)
+        # Exercise
+        self._run_capgen()
+        # Verify
+        after = file_stamps(self._out_dir)
+        for filename in before:
+            # The stored suite analysis is updated with the new file hash
+            if filename not in ("datatable.xml", "ccpp_parse_cache"):
+                self.assertEqual(before[filename], after[filename])
+            # end if
+        # end for
+        fortran_file = os.path.join(self._src_dir, "unused_scheme.F90")
+        _, input_files, _, _ = retrieve_capgen_inputs(os.path.join(self._out_dir,
+                                                                   "datatable.xml"))
+        self.assertEqual(input_files[fortran_file]['hash'],
+                         file_hash(fortran_file))
+
+    def test_reused_suite_analysis(self):
+        """Test that modifying a scheme reuses the previous analysis of
+           the suites which do not use it and that the generated files
+           match those of a full run"""
+        # Setup
+        self._run_capgen()
+        self._modify_file("temp_adjust.F90", "CONTAINS",
+                          "! A new comment\nCONTAINS")
+        # Exercise
+        log = self._run_capgen(verbose=True)
+        full_dir = os.path.join(self._tmp_dir.name, "full")
+        self._run_capgen(out_dir=full_dir)
+        # Verify
+        self.assertTrue("Using previous analysis of CCPP suite, ddt_suite"
+                        in log)
+        self.assertFalse("Using previous analysis of CCPP suite, temp_suite"
+                         in log)
+        for filename in os.listdir(full_dir):
+            if filename.endswith(".F90"):
+                with open(os.path.join(self._out_dir, filename), 'r') as infile:
+                    incremental = infile.read()
+                # end with
+                with open(os.path.join(full_dir, filename), 'r') as infile:
+                    self.assertEqual(incremental, infile.read(), filename)
+                # end with
+            # end if
+        # end for
+
+if __name__ == "__main__":
+    unittest.main()
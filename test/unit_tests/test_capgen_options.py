@@ -0,0 +1,346 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the code generated by capgen
+               options (scripts/ccpp_capgen.py)
+
+               * Tests include:
+                  - The module variables for --debug-check-interval
+                    are valid (and unique) Fortran names for groups
+                    with long names
+                  - Affine unit conversions of intent(inout) variables
+                    are applied in place
+                  - A reverse transform is skipped when an earlier
+                    scheme left the same transformed value
+                  - A required intent(out) variable with a transform is
+                    passed to the scheme as its local array
+                  - --persistent-work-arrays keeps the run phase work
+                    arrays in the suite module and releases them in
+                    the suite finalize routine
+                  - --instrument registers the timers of each thread and
+                    lists the timing module with the utility files only
+                    when it is used
+                  - --threaded-run gives each thread its own copy of the
+                    suite variables modified in the run phase and is
+                    skipped for hosts without the required run arguments
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_capgen_options.py    # run the unit tests
+-----------------------------------------------------------------------
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_SCRIPTS_DIR = os.path.abspath(os.path.join(_TEST_DIR, os.pardir,
+                                            os.pardir, "scripts"))
+_FORTRAN_TEST_DIR = os.path.abspath(os.path.join(_TEST_DIR, os.pardir))
+_CAPGEN = os.path.join(_SCRIPTS_DIR, "ccpp_capgen.py")
+
+if not os.path.exists(_SCRIPTS_DIR):
+    raise ImportError(f"Cannot find scripts directory, {_SCRIPTS_DIR}")
+
+# Maximum length of a Fortran name
+_MAX_NAME_LEN = 63
+
+_THREADPRIVATE_RE = re.compile(r"^\s*!\$omp threadprivate\((\w+)\)", re.M)
+
+# Host files, scheme files, and suites for each test host
+_TEST_INPUTS = {"capgen_test" : (["test_host_data.meta", "test_host_mod.meta",
+                                  "test_host.meta"],
+                                 ["temp_scheme_files.txt",
+                                  "ddt_suite_files.txt"],
+                                 ["ddt_suite.xml", "temp_suite.xml"]),
+                "ddthost_test" : (["test_host_data.meta", "test_host_mod.meta",
+                                   "host_ccpp_ddt.meta", "test_host.meta"],
+                                  ["temp_scheme_files.txt",
+                                   "ddt_suite_files.txt"],
+                                  ["ddt_suite.xml", "temp_suite.xml"]),
+                "var_compatibility_test" : (["test_host_data.meta",
+                                             "test_host_mod.meta",
+                                             "test_host.meta"],
+                                            ["var_compatibility_files.txt"],
+                                            ["var_compatibility_suite.xml"])}
+
+###############################################################################
+def join_continuation_lines(code):
+###############################################################################
+    """Return <code> with Fortran continuation lines joined"""
+    return re.sub(r"\s*&\s*\n\s*", " ", code)
+
+class CapgenOptionsTestCase(unittest.TestCase):
+
+    """Tests for code generated by capgen options"""
+
+    def setUp(self):
+        """Create a temporary directory for the test inputs and output"""
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self._src_dir = os.path.join(self._tmp_dir.name, "src")
+        self._out_dir = os.path.join(self._tmp_dir.name, "out")
+        self._test_name = None
+
+    def _copy_test(self, test_name):
+        """Copy the inputs of the test host, <test_name>, to the
+           temporary directory"""
+        shutil.copytree(os.path.join(_FORTRAN_TEST_DIR, test_name),
+                        self._src_dir,
+                        ignore=shutil.ignore_patterns("__pycache__"))
+        self._test_name = test_name
+
+    def _run_capgen(self, *options):
+        """Run capgen with <options> on the copied test inputs.
+           capgen is run in a separate process as it registers DDTs
+           globally."""
+        host_files, scheme_files, suites = _TEST_INPUTS[self._test_name]
+        args = [sys.executable, _CAPGEN, "--host-files",
+                ",".join(os.path.join(self._src_dir, x) for x in host_files),
+                "--scheme-files",
+                ",".join(os.path.join(self._src_dir, x) for x in scheme_files),
+                "--suites",
+                ",".join(os.path.join(self._src_dir, x) for x in suites),
+                "--host-name", "test_host", "--output-root", self._out_dir]
+        subprocess.run(args + list(options), check=True, capture_output=True)
+
+    def _modify_file(self, filename, old, new):
+        """Replace <old> with <new> in <filename> (in the copied inputs)"""
+        pathname = os.path.join(self._src_dir, filename)
+        with open(pathname, 'r') as infile:
+            contents = infile.read()
+        # end with
+        self.assertIn(old, contents)
+        with open(pathname, 'w') as outfile:
+            outfile.write(contents.replace(old, new))
+        # end with
+
+    def _read_output(self, filename):
+        """Return the contents of the generated file, <filename>"""
+        with open(os.path.join(self._out_dir, filename), 'r') as infile:
+            return infile.read()
+        # end with
+
+    def _read_cap(self, suite):
+        """Return the contents of the generated cap for <suite>"""
+        return self._read_output(f"ccpp_{suite}_cap.F90")
+
+    def test_debug_check_var_names(self):
+        """Test that the --debug-check-interval module variables of groups
+        with long names are unique and not longer than a Fortran name"""
+        # Setup, group names which fill most of the Fortran name length
+        #    so that the debug check variable names must be truncated
+        self._copy_test("capgen_test")
+        long_name = "a" * (_MAX_NAME_LEN - len("temp_suite_") - 8)
+        self._modify_file("temp_suite.xml", '"physics1"',
+                          f'"{long_name}_one"')
+        self._modify_file("temp_suite.xml", '"physics2"',
+                          f'"{long_name}_two"')
+        for interval in ["0", "3"]:
+            # Exercise
+            self._run_capgen("--debug", "--debug-check-interval", interval)
+            # Verify
+            cap = self._read_cap("temp_suite")
+            var_names = [x for x in _THREADPRIVATE_RE.findall(cap)
+                         if long_name in x]
+            self.assertEqual(len(var_names), 2)
+            self.assertEqual(len(set(var_names)), 2)
+            for var_name in var_names:
+                self.assertLessEqual(len(var_name), _MAX_NAME_LEN)
+                # The variable is declared and used by its group
+                self.assertGreater(cap.count(var_name), 2)
+            # end for
+        # end for
+
+    def test_in_place_affine_transforms(self):
+        """Test that affine unit conversions of intent(inout) variables are
+        applied to the group's variables before and after the scheme call"""
+        # Setup
+        self._copy_test("var_compatibility_test")
+        # Exercise
+        self._run_capgen("--debug")
+        # Verify
+        cap = join_continuation_lines(self._read_cap("var_compatibility_suite"))
+        self.assertNotIn("effrl_inout_local", cap)
+        self.assertNotIn("scalar_var1_local", cap)
+        before, call, after = cap.partition("call effr_calc_run(")
+        self.assertTrue(call)
+        call = after[0:after.index(")\n")]
+        self.assertIn("effrl_inout=effrl_inout", call)
+        self.assertIn("scalar_var=scalar_var1", call)
+        self.assertIn("effrl_inout(:,1:pver) = " +
+                      "1.0E+6_kind_phys*effrl_inout(:,1:pver)", before)
+        self.assertIn("scalar_var1 = 1.0E-3_kind_phys*scalar_var1", before)
+        self.assertIn("effrl_inout(:,1:pver) = " +
+                      "1.0E-6_kind_phys*effrl_inout(:,1:pver)", after)
+        self.assertIn("scalar_var1 = 1.0E+3_kind_phys*scalar_var1", after)
+
+    def test_skip_reverse_transforms(self):
+        """Test that a scheme skips its reverse transform when the previous
+        scheme left the same transformed value in the local array"""
+        # Setup, call effr_diag twice in a row
+        self._copy_test("var_compatibility_test")
+        self._modify_file("var_compatibility_suite.xml",
+                          "<scheme>effr_diag</scheme>",
+                          "<scheme>effr_diag</scheme>\n" +
+                          "    <scheme>effr_diag</scheme>")
+        reverse = ("effrr_in_local(:,1:pver) = " +
+                   "1.0E+6_kind_phys*effrr_inout(:,pver:1:-1)")
+        # Exercise
+        self._run_capgen("--debug")
+        # Verify
+        cap = join_continuation_lines(self._read_cap("var_compatibility_suite"))
+        parts = cap.split("call effr_diag_run(")
+        self.assertEqual(len(parts), 3)
+        # The first call computes the transform, the second one reuses it
+        self.assertIn(reverse, parts[0].split("call effr_post_run(")[-1])
+        self.assertNotIn(reverse, parts[1])
+        for part in parts[1:]:
+            self.assertTrue(part.startswith("effrr_in=effrr_in_local,"))
+        # end for
+
+    def test_intent_out_transform(self):
+        """Test that a required intent(out) variable with a unit conversion
+        is passed to the scheme as its local array (which is then converted
+        into the group's variable)"""
+        # Setup, make effrl_inout an intent(out) argument of effr_calc
+        self._copy_test("var_compatibility_test")
+        self._modify_file("effr_calc.meta", "kind = kind_phys\n  intent = inout"
+                          "\n[effri_out]",
+                          "kind = kind_phys\n  intent = out\n[effri_out]")
+        self._modify_file("effr_calc.F90", "intent(inout) :: effrl_inout",
+                          "intent(out)   :: effrl_inout")
+        self._modify_file("effr_calc.F90",
+                          "min(max(effrl_inout,re_qc_min),re_qc_max)",
+                          "re_qc_min")
+        # Exercise
+        self._run_capgen("--debug")
+        # Verify
+        cap = join_continuation_lines(self._read_cap("var_compatibility_suite"))
+        before, call, after = cap.partition("call effr_calc_run(")
+        self.assertTrue(call)
+        call = after[0:after.index(")\n")]
+        self.assertIn("effrl_inout=effrl_inout_local", call)
+        # There is no reverse transform for an intent(out) variable
+        self.assertNotIn("effrl_inout_local(:,1:pver) =", before)
+        self.assertIn("effrl_inout(:,1:pver) = " +
+                      "1.0E-6_kind_phys*effrl_inout_local(:,1:pver)", after)
+
+    def test_persistent_work_arrays(self):
+        """Test that --persistent-work-arrays declares the run phase work
+        arrays (per thread) in the suite module and that the suite finalize
+        routine releases them"""
+        # Setup
+        self._copy_test("var_compatibility_test")
+        work_arrays = ["effrg_in_local", "effri_out_local", "effrr_in_local",
+                       "effrs_inout_local"]
+        # Exercise
+        self._run_capgen("--debug", "--persistent-work-arrays")
+        # Verify
+        cap = join_continuation_lines(self._read_cap("var_compatibility_suite"))
+        module, _, routines = cap.partition("\nCONTAINS")
+        self.assertTrue(routines)
+        self.assertEqual(sorted(_THREADPRIVATE_RE.findall(module)),
+                         work_arrays)
+        run_group, _, finalize = routines.partition(
+            "subroutine var_compatibility_suite_finalize(")
+        self.assertTrue(finalize)
+        finalize = finalize[0:finalize.index("end subroutine")]
+        self.assertIn("!$omp parallel", finalize)
+        for work_array in work_arrays:
+            self.assertRegex(module,
+                             rf"allocatable.*:: {work_array}\(:,:\)")
+            # Not declared as a local variable of the run group
+            self.assertNotRegex(run_group, rf"::\s*{work_array}\b")
+            self.assertIn(f"if (allocated({work_array})) " +
+                          f"deallocate({work_array})", finalize)
+        # end for
+
+    def test_instrument(self):
+        """Test that --instrument declares the timer ids of each group
+        private to each thread, adds the timing API to the host cap, and
+        lists the timing module with the utility files"""
+        # Setup
+        self._copy_test("var_compatibility_test")
+        # Exercise
+        self._run_capgen("--debug")
+        datatable = self._read_output("datatable.xml")
+        # Verify, the timing module is not needed without --instrument
+        cap = self._read_cap("var_compatibility_suite")
+        self.assertNotIn("ccpp_timing", cap)
+        self.assertNotIn("ccpp_timing.F90", datatable)
+        # Exercise
+        shutil.rmtree(self._out_dir)
+        self._run_capgen("--debug", "--instrument")
+        # Verify
+        cap = self._read_cap("var_compatibility_suite")
+        self.assertIn("integer, save :: ccpp_timer_ids(", cap)
+        self.assertIn("ccpp_timer_ids", _THREADPRIVATE_RE.findall(cap))
+        self.assertIn("call ccpp_timer_start(ccpp_timer_ids(1), ", cap)
+        self.assertIn("call ccpp_timer_stop(ccpp_timer_ids(1), ", cap)
+        host_cap = self._read_output("test_host_ccpp_cap.F90")
+        self.assertIn("public :: test_host_ccpp_timing_report", host_cap)
+        self.assertIn("public :: test_host_ccpp_timing_reset", host_cap)
+        self.assertIn("ccpp_timing.F90", self._read_output("datatable.xml"))
+
+    def test_threaded_run(self):
+        """Test that --threaded-run points the suite variables modified in
+        the run phase to a copy for each thread and that OpenMP is only
+        used by the suite caps with --threaded-run"""
+        # Setup
+        self._copy_test("capgen_test")
+        # Exercise
+        self._run_capgen("--debug")
+        # Verify, no OpenMP or thread copies without --threaded-run
+        cap = self._read_cap("temp_suite")
+        self.assertNotIn("omp_lib", cap)
+        self.assertNotIn("_thread_copies", cap)
+        # Exercise
+        shutil.rmtree(self._out_dir)
+        self._run_capgen("--debug", "--threaded-run")
+        # Verify
+        cap = join_continuation_lines(self._read_cap("temp_suite"))
+        module, _, routines = cap.partition("\nCONTAINS")
+        self.assertTrue(routines)
+        self.assertIn("use omp_lib, only: omp_get_thread_num", module)
+        self.assertRegex(module, r"allocatable, target :: " +
+                         r"promote_pcnst_thread_copies\(:,:\)")
+        self.assertIn("allocate(promote_pcnst_thread_copies(1:pcnst, " +
+                      "1:ccpp_num_threads))", routines)
+        run_group = routines[routines.index(
+            "subroutine temp_suite_physics1("):]
+        run_group = run_group[0:run_group.index("end subroutine")]
+        self.assertRegex(run_group, r"pointer\s*:: promote_pcnst\(:\)")
+        self.assertIn("!$ ccpp_thread_index = omp_get_thread_num() + 1",
+                      run_group)
+        self.assertIn("promote_pcnst(lbound(promote_pcnst_thread_copies, " +
+                      "1):) => promote_pcnst_thread_copies(:, " +
+                      "ccpp_thread_index)", run_group)
+        # A DDT holding column data is shared by the threads
+        ddt_cap = self._read_cap("ddt_suite")
+        self.assertNotIn("_thread_copies", ddt_cap)
+        host_cap = self._read_output("test_host_ccpp_cap.F90")
+        self.assertIn("public :: test_host_ccpp_physics_run_threaded",
+                      host_cap)
+
+    def test_threaded_run_missing_args(self):
+        """Test that --threaded-run skips the threaded run routine of a
+        host which does not pass the chunk information to its run phase"""
+        # Setup
+        self._copy_test("ddthost_test")
+        # Exercise
+        self._run_capgen("--debug", "--threaded-run")
+        # Verify
+        host_cap = self._read_output("test_host_ccpp_cap.F90")
+        self.assertIn("subroutine test_host_ccpp_physics_run(", host_cap)
+        self.assertNotIn("_run_threaded", host_cap)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for move_modified_files
+               in scripts file file_utils.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_file_utils.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_SCRIPTS_DIR = os.path.abspath(os.path.join(_TEST_DIR, os.pardir,
+                                            os.pardir, "scripts"))
+
+if not os.path.exists(_SCRIPTS_DIR):
+    raise ImportError(f"Cannot find scripts directory, {_SCRIPTS_DIR}")
+
+sys.path.append(_SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from file_utils import move_modified_files
+# pylint: enable=wrong-import-position
+
+###############################################################################
+def write_file(pathname, contents):
+###############################################################################
+    """Write <contents> to <pathname>"""
+    with open(pathname, 'w') as outfile:
+        outfile.write(contents)
+    # end with
+
+###############################################################################
+def read_file(pathname):
+###############################################################################
+    """Return the contents of <pathname>"""
+    with open(pathname, 'r') as infile:
+        return infile.read()
+    # end with
+
+###############################################################################
+def content_hash(contents):
+###############################################################################
+    """Return the (size, hash) of <contents> as used by move_modified_files"""
+    data = contents.encode('utf-8')
+    return (len(data), hashlib.sha256(data).hexdigest())
+
+class MoveModifiedFilesTestCase(unittest.TestCase):
+
+    """Tests for `move_modified_files`."""
+
+    def setUp(self):
+        """Create source and destination directories with one unchanged,
+           one modified, and one new file"""
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self._src_dir = os.path.join(self._tmp_dir.name, "src")
+        self._dest_dir = os.path.join(self._tmp_dir.name, "dest")
+        os.makedirs(self._src_dir)
+        os.makedirs(self._dest_dir)
+        for fname, contents in [("same.F90", "same\n"),
+                                ("modified.F90", "new contents\n"),
+                                ("new.F90", "new file\n")]:
+            write_file(os.path.join(self._src_dir, fname), contents)
+        # end for
+        write_file(os.path.join(self._dest_dir, "same.F90"), "same\n")
+        write_file(os.path.join(self._dest_dir, "modified.F90"),
+                   "old contents\n")
+        self._same_stat = os.stat(os.path.join(self._dest_dir, "same.F90"))
+
+    def test_move_modified_files(self):
+        """Test that only modified and new files are moved"""
+        # Exercise
+        move_modified_files(self._src_dir, self._dest_dir, remove_src=True)
+        # Verify
+        same_stat = os.stat(os.path.join(self._dest_dir, "same.F90"))
+        self.assertEqual((self._same_stat.st_ino, self._same_stat.st_mtime_ns),
+                         (same_stat.st_ino, same_stat.st_mtime_ns))
+        self.assertEqual(read_file(os.path.join(self._dest_dir,
+                                                "modified.F90")),
+                         "new contents\n")
+        self.assertEqual(read_file(os.path.join(self._dest_dir, "new.F90")),
+                         "new file\n")
+        self.assertFalse(os.path.exists(self._src_dir))
+
+    def test_overwrite(self):
+        """Test that all files are moved with <overwrite>"""
+        # Exercise
+        move_modified_files(self._src_dir, self._dest_dir, overwrite=True)
+        # Verify
+        same_stat = os.stat(os.path.join(self._dest_dir, "same.F90"))
+        self.assertNotEqual(self._same_stat.st_ino, same_stat.st_ino)
+        self.assertEqual(os.listdir(self._src_dir), [])
+
+    def test_recorded_dest_hash(self):
+        """Test that a recorded destination hash is used while the
+        destination file is unmodified and ignored once it is modified"""
+        # Setup
+        src_path = os.path.abspath(os.path.join(self._src_dir, "modified.F90"))
+        dest_path = os.path.abspath(os.path.join(self._dest_dir,
+                                                 "modified.F90"))
+        src_hashes = {src_path : content_hash("new contents\n")}
+        dstat = os.stat(dest_path)
+        # Record the new hash for the old destination file so that we can
+        #    tell whether the destination file was read
+        dest_hashes = {dest_path : (dstat.st_size, dstat.st_mtime_ns,
+                                    src_hashes[src_path][1])}
+        # Exercise
+        file_hashes = move_modified_files(self._src_dir, self._dest_dir,
+                                          src_hashes=src_hashes,
+                                          dest_hashes=dest_hashes)
+        # Verify
+        self.assertEqual(read_file(dest_path), "old contents\n")
+        self.assertEqual(file_hashes, dest_hashes)
+        # Setup, make the recorded entry stale
+        write_file(src_path, "new contents\n")
+        dest_hashes = {dest_path : (dstat.st_size, dstat.st_mtime_ns - 1,
+                                    src_hashes[src_path][1])}
+        # Exercise
+        file_hashes = move_modified_files(self._src_dir, self._dest_dir,
+                                          src_hashes=src_hashes,
+                                          dest_hashes=dest_hashes)
+        # Verify
+        self.assertEqual(read_file(dest_path), "new contents\n")
+        dstat = os.stat(dest_path)
+        self.assertEqual(file_hashes[dest_path],
+                         (dstat.st_size, dstat.st_mtime_ns,
+                          src_hashes[src_path][1]))
+
+    def test_same_dir_hashes(self):
+        """Test that the hashes of files already in place are returned"""
+        # Setup
+        dest_path = os.path.abspath(os.path.join(self._dest_dir, "same.F90"))
+        src_hashes = {dest_path : content_hash("same\n")}
+        # Exercise
+        file_hashes = move_modified_files(self._dest_dir, self._dest_dir,
+                                          src_hashes=src_hashes)
+        # Verify
+        self.assertEqual(file_hashes,
+                         {dest_path : (self._same_stat.st_size,
+                                       self._same_stat.st_mtime_ns,
+                                       src_hashes[dest_path][1])})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,8 +14,10 @@
 
 import filecmp
 import glob
+import hashlib
 import os
 import sys
+import tempfile
 import unittest
 
 _TEST_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -122,6 +124,46 @@ class MetadataTableTestCase(unittest.TestCase):
         amsg = f"{generate} does not match {compare}"
         self.assertTrue(filecmp.cmp(generate, compare, shallow=False), msg=amsg)
 
+    def test_buffered_write(self):
+        """Test that a buffered FortranWriter writes the same file and
+        records its content hash."""
+        # Setup
+        testname = "linebreak_test"
+        compare = os.path.join(_SAMPLE_FILES_DIR, f"{testname}.F90")
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        generate = os.path.join(tmp_dir.name, f"{testname}_buffered.F90")
+        # Exercise
+        header = "Test of line breaking for FortranWriter"
+        with FortranWriter(generate, 'w', header, f"{testname}",
+                           buffered=True) as gen:
+            data_items = ', '.join([f"name{x:03}" for x in range(100)])
+            gen.write(f"character(len=7) :: data = (/ {data_items} /)", 1)
+            gen.end_module_header()
+            line_items = ["call endrun('Cannot read columns_on_task from ",
+                          "file'//', columns_on_task has no horizontal ",
+                          "dimension; columns_on_task is a ",
+                          "protected variable')"]
+            # Nothing is written until the FortranWriter is closed
+            self.assertFalse(os.path.exists(generate))
+            gen.write(f"{''.join(line_items)}", 2)
+        # end with
+
+        # Check that file was generated
+        amsg = f"{generate} does not match {compare}"
+        self.assertTrue(filecmp.cmp(generate, compare, shallow=False), msg=amsg)
+        # Check the content hash
+        with open(compare, 'rb') as infile:
+            contents = infile.read()
+        # end with
+        self.assertEqual(FortranWriter.content_hashes()[generate],
+                         (len(contents), hashlib.sha256(contents).hexdigest()))
+        # A modified file no longer has a content hash
+        with open(generate, 'a') as outfile:
+            outfile.write("! Modified\n")
+        # end with
+        self.assertFalse(generate in FortranWriter.content_hashes())
+
 if __name__ == "__main__":
     unittest.main()
 
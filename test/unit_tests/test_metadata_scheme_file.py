@@ -35,6 +35,10 @@
                   - Correctly interpret Fortran with preprocessor logic
                     which affects the subroutine statement and/or the dummy
                     argument statements resulting in incorrect Fortran
+                  - Parse files in parallel (--jobs) with the same results
+                    and errors as a serial parse
+                  - Load unchanged files from the parse cache with the same
+                    results as a parse
 
  Assumptions:
 
@@ -46,6 +50,7 @@
 import sys
 import os
 import logging
+import tempfile
 import unittest
 
 _TEST_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -85,6 +90,11 @@ class MetadataHeaderTestCase(unittest.TestCase):
                                                       'suites':'',
                                                       'preproc_directives':
                                                       'CCPP=2'})
+        self._run_env_jobs = CCPPFrameworkEnv(logger,
+                                              ndict={'host_files':'',
+                                                     'scheme_files':'',
+                                                     'suites':'',
+                                                     'jobs':2})
 
     def test_good_scheme_file(self):
         """Test that good metadata file matches the Fortran,
@@ -343,6 +353,88 @@ class MetadataHeaderTestCase(unittest.TestCase):
         scheme_headers, table_dict = parse_scheme_files(scheme_files,
                                                         self._run_env_ccpp)
 
+    def test_parallel_scheme_files(self):
+        """Test that parsing scheme files with a pool of worker processes
+           returns the same headers, in the same order, as a serial parse"""
+        # Setup
+        scheme_files = [os.path.join(self._sample_files_dir, x)
+                        for x in ["temp_adjust.meta", "reorder.meta"]]
+        # Exercise
+        serial_headers, serial_tables = parse_scheme_files(scheme_files,
+                                                           self._run_env,
+                                                           skip_ddt_check=True)
+        par_headers, par_tables = parse_scheme_files(scheme_files,
+                                                     self._run_env_jobs,
+                                                     skip_ddt_check=True)
+        # Verify that the header titles and tables are the same
+        self.assertEqual([x.title for x in serial_headers],
+                         [x.title for x in par_headers])
+        self.assertEqual(list(serial_tables.keys()), list(par_tables.keys()))
+        # Verify that the variables survived the trip from the workers
+        for sheader, pheader in zip(serial_headers, par_headers):
+            self.assertEqual(sheader.prop_list('local_name'),
+                             pheader.prop_list('local_name'))
+        # end for
+
+    def test_parallel_scheme_file_error(self):
+        """Test that an error in a file parsed by a worker process is
+           reported as in a serial parse"""
+        # Setup
+        scheme_files = [os.path.join(self._sample_files_dir, x)
+                        for x in ["reorder.meta", "invalid_dummy_arg.meta"]]
+        # Exercise
+        with self.assertRaises(CCPPError) as context:
+            parse_scheme_files(scheme_files, self._run_env_jobs)
+        # Verify correct error message returned
+        emsg = "Invalid dummy argument, 'woohoo', at"
+        self.assertTrue(emsg in str(context.exception))
+
+    def test_parse_cache(self):
+        """Test that a second parse of unchanged files is loaded from the
+           parse cache and matches the first parse"""
+        # Setup
+        scheme_files = [os.path.join(self._sample_files_dir, x)
+                        for x in ["temp_adjust.meta", "reorder.meta"]]
+        logger = logging.getLogger(self.__class__.__name__)
+        with tempfile.TemporaryDirectory() as output_root:
+            run_env = CCPPFrameworkEnv(logger, ndict={'host_files':'',
+                                                      'scheme_files':'',
+                                                      'suites':'',
+                                                      'output_root':output_root,
+                                                      'use_parse_cache':True})
+            # Exercise
+            first_headers, _ = parse_scheme_files(scheme_files, run_env,
+                                                  skip_ddt_check=True,
+                                                  known_ddts=list())
+            first_entries = _cache_entries(run_env.parse_cache_dir)
+            cache_headers, _ = parse_scheme_files(scheme_files, run_env,
+                                                  skip_ddt_check=True,
+                                                  known_ddts=list())
+            cache_entries = _cache_entries(run_env.parse_cache_dir)
+        # end with
+        # Verify that there is one entry per file and that the second
+        #   parse did not replace any entry (i.e., it loaded each file)
+        self.assertEqual(len(first_entries), len(scheme_files))
+        self.assertEqual(first_entries, cache_entries)
+        # Verify that the cached headers match the parsed headers
+        self.assertEqual([x.title for x in first_headers],
+                         [x.title for x in cache_headers])
+        for fheader, cheader in zip(first_headers, cache_headers):
+            self.assertEqual(fheader.prop_list('local_name'),
+                             cheader.prop_list('local_name'))
+        # end for
+
+def _cache_entries(cache_dir):
+    """Return a dictionary of the entries in <cache_dir> with their
+       inode numbers (a rewritten entry gets a new inode)"""
+    entries = {}
+    for root, _, files in os.walk(cache_dir):
+        for file in files:
+            entries[file] = os.stat(os.path.join(root, file)).st_ino
+        # end for
+    # end for
+    return entries
+
 if __name__ == "__main__":
     unittest.main()
 
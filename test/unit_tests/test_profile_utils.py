@@ -0,0 +1,99 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for PhaseProfiler
+               in scripts file profile_utils.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_profile_utils.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+
+import os
+import sys
+import tracemalloc
+import unittest
+
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_SCRIPTS_DIR = os.path.abspath(os.path.join(_TEST_DIR, os.pardir,
+                                            os.pardir, "scripts"))
+
+if not os.path.exists(_SCRIPTS_DIR):
+    raise ImportError(f"Cannot find scripts directory, {_SCRIPTS_DIR}")
+
+sys.path.append(_SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from profile_utils import PhaseProfiler
+# pylint: enable=wrong-import-position
+
+# Size (in bytes) of the temporary allocation made inside a phase
+_ALLOC_SIZE = 8 * 1024 * 1024
+
+def allocate_and_free():
+    """Allocate <_ALLOC_SIZE> bytes and release them"""
+    data = bytearray(_ALLOC_SIZE)
+    del data
+
+class PhaseProfilerTestCase(unittest.TestCase):
+
+    """Tests for `PhaseProfiler`."""
+
+    def setUp(self):
+        """Create an enabled profiler"""
+        self._prof = PhaseProfiler(enabled=True)
+        self.addCleanup(self._prof.stop)
+
+    @unittest.skipUnless(hasattr(tracemalloc, 'reset_peak'),
+                         "Per-phase peaks require Python 3.9 or later")
+    def test_peak_per_phase(self):
+        """Test that each phase reports its own peak, not the run peak"""
+        # Exercise
+        with self._prof.phase('outer'):
+            with self._prof.phase('big'):
+                allocate_and_free()
+            # end with
+            with self._prof.phase('small'):
+                pass
+            # end with
+        # end with
+        # Verify
+        phases = self._prof.report()['phases']
+        min_kb = _ALLOC_SIZE // 1024
+        self.assertGreaterEqual(phases['big']['peak_mem_kb'], min_kb)
+        self.assertGreaterEqual(phases['outer']['peak_mem_kb'], min_kb)
+        self.assertLess(phases['small']['peak_mem_kb'], min_kb)
+
+    def test_memory_delta(self):
+        """Test that memory kept after a phase is reported as its delta"""
+        # Exercise
+        with self._prof.phase('keep'):
+            kept = bytearray(_ALLOC_SIZE)
+        # end with
+        with self._prof.phase('free'):
+            allocate_and_free()
+        # end with
+        # Verify
+        phases = self._prof.report()['phases']
+        min_kb = _ALLOC_SIZE // 1024
+        self.assertGreaterEqual(phases['keep']['mem_delta_kb'], min_kb)
+        self.assertLess(abs(phases['free']['mem_delta_kb']), min_kb)
+        self.assertEqual(len(kept), _ALLOC_SIZE)
+
+    def test_stop(self):
+        """Test that the profiler stops the tracing it started"""
+        # Setup
+        was_tracing = tracemalloc.is_tracing()
+        # Exercise
+        with self._prof.phase('phase'):
+            pass
+        # end with
+        self._prof.stop()
+        # Verify
+        self.assertEqual(tracemalloc.is_tracing(), was_tracing)
+
+if __name__ == "__main__":
+    unittest.main()
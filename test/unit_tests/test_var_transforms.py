@@ -157,6 +157,29 @@ class VarCompatTestCase(unittest.TestCase):
         self.assertFalse(compat.has_dim_transforms)
         self.assertTrue(compat.has_unit_transforms)
 
+    def test_affine_unit_change(self):
+        """Test that scale and offset unit changes are detected as affine"""
+        real_array1 = self._new_var('real_stdname1', 'm', ['hdim', 'vdim'],
+                                    'real', vkind='kind_phys')
+        real_array2 = self._new_var('real_stdname1', 'mm', ['hdim', 'vdim'],
+                                    'real', vkind='kind_phys')
+        compat = real_array1.compatible(real_array2, self.__run_env)
+        self.assertTrue(compat.has_unit_transforms)
+        self.assertTrue(compat.has_affine_unit_transforms)
+        real_array1 = self._new_var('real_stdname1', 'K', ['hdim', 'vdim'],
+                                    'real', vkind='kind_phys')
+        real_array2 = self._new_var('real_stdname1', 'C', ['hdim', 'vdim'],
+                                    'real', vkind='kind_phys')
+        compat = real_array1.compatible(real_array2, self.__run_env)
+        self.assertTrue(compat.has_unit_transforms)
+        self.assertTrue(compat.has_affine_unit_transforms)
+        # No unit change
+        real_array2 = self._new_var('real_stdname1', 'K', ['hdim', 'vdim'],
+                                    'real', vkind='kind_dyn')
+        compat = real_array1.compatible(real_array2, self.__run_env)
+        self.assertFalse(compat.has_unit_transforms)
+        self.assertFalse(compat.has_affine_unit_transforms)
+
     def test_unsupported_unit_change(self):
         """Test that unsupported unit changes are detected"""
         real_scalar1 = self._new_var('real_stdname1', 'min', [],
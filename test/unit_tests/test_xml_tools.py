@@ -0,0 +1,168 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for validate_xml_file
+               in scripts file parse_tools/xml_tools.py
+
+               * Tests include:
+                  - In-process validation with lxml of valid and
+                    invalid files
+                  - A repeated validation is found in the validation
+                    cache (in memory and in the cache directory)
+                  - Changing an included schema file invalidates the
+                    cached validation
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_xml_tools.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_SCRIPTS_DIR = os.path.abspath(os.path.join(_TEST_DIR, os.pardir,
+                                            os.pardir, "scripts"))
+
+if not os.path.exists(_SCRIPTS_DIR):
+    raise ImportError(f"Cannot find scripts directory, {_SCRIPTS_DIR}")
+
+sys.path.append(_SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from parse_tools import CCPPError
+from parse_tools import xml_tools
+from parse_tools.xml_tools import validate_xml_file
+# pylint: enable=wrong-import-position
+
+_MAIN_SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:include schemaLocation="types.xsd"/>
+  <xs:element name="suite" type="suite_type"/>
+</xs:schema>
+"""
+
+_TYPES_SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:complexType name="suite_type">
+    <xs:sequence>
+      <xs:element name="scheme" type="xs:string" maxOccurs="{}"/>
+    </xs:sequence>
+  </xs:complexType>
+</xs:schema>
+"""
+
+_VALID_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<suite><scheme>scheme_a</scheme><scheme>scheme_b</scheme></suite>
+"""
+
+_INVALID_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<suite><group>scheme_a</group></suite>
+"""
+
+_HAVE_VALIDATOR = bool(xml_tools._LXML_ETREE or xml_tools._XMLLINT)
+
+###############################################################################
+def write_file(pathname, contents):
+###############################################################################
+    """Write <contents> to <pathname>"""
+    with open(pathname, 'w') as outfile:
+        outfile.write(contents)
+    # end with
+
+class ValidateXMLFileTestCase(unittest.TestCase):
+
+    """Tests for `validate_xml_file`."""
+
+    def setUp(self):
+        """Create a schema (with an included schema file) and XML files"""
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        tmp_dir = self._tmp_dir.name
+        self._schema = os.path.join(tmp_dir, "main.xsd")
+        self._types_schema = os.path.join(tmp_dir, "types.xsd")
+        self._valid_xml = os.path.join(tmp_dir, "valid.xml")
+        self._invalid_xml = os.path.join(tmp_dir, "invalid.xml")
+        self._cache_dir = os.path.join(tmp_dir, "cache")
+        write_file(self._schema, _MAIN_SCHEMA)
+        write_file(self._types_schema, _TYPES_SCHEMA.format("unbounded"))
+        write_file(self._valid_xml, _VALID_XML)
+        write_file(self._invalid_xml, _INVALID_XML)
+        self._logger = logging.getLogger(__name__)
+        # Start each test without any remembered validations
+        xml_tools._VALIDATED_XML.clear()
+        self.addCleanup(xml_tools._VALIDATED_XML.clear)
+
+    def _validate(self, filename):
+        """Validate <filename> against the test schema and return the
+        number of times the validator was run"""
+        if xml_tools._LXML_ETREE:
+            vname = '_validate_with_lxml'
+        else:
+            vname = 'call_command'
+        # end if
+        validator = getattr(xml_tools, vname)
+        with mock.patch.object(xml_tools, vname,
+                               side_effect=validator) as mock_validator:
+            self.assertTrue(validate_xml_file(filename, self._schema, [1, 0],
+                                              self._logger,
+                                              cache_dir=self._cache_dir))
+        # end with
+        return mock_validator.call_count
+
+    @unittest.skipUnless(xml_tools._LXML_ETREE, "lxml is not installed")
+    def test_lxml_valid(self):
+        """Test that a valid file passes in-process validation"""
+        self.assertTrue(xml_tools._validate_with_lxml(self._valid_xml,
+                                                      self._schema))
+
+    @unittest.skipUnless(xml_tools._LXML_ETREE, "lxml is not installed")
+    def test_lxml_invalid(self):
+        """Test that an invalid file raises a CCPPError"""
+        with self.assertRaises(CCPPError) as context:
+            validate_xml_file(self._invalid_xml, self._schema, [1, 0],
+                              self._logger)
+        # end with
+        self.assertIn("fails to validate", str(context.exception))
+
+    @unittest.skipUnless(_HAVE_VALIDATOR, "No XML validator is available")
+    def test_cache_hit(self):
+        """Test that a repeated validation uses the remembered result, both
+        in memory and from the cache directory"""
+        # Exercise and verify
+        self.assertEqual(self._validate(self._valid_xml), 1)
+        self.assertEqual(self._validate(self._valid_xml), 0)
+        xml_tools._VALIDATED_XML.clear()
+        self.assertEqual(self._validate(self._valid_xml), 0)
+
+    @unittest.skipUnless(_HAVE_VALIDATOR, "No XML validator is available")
+    def test_cache_miss_included_schema(self):
+        """Test that changing an included schema file forces validation"""
+        # Setup
+        self.assertEqual(self._validate(self._valid_xml), 1)
+        # Exercise
+        write_file(self._types_schema, _TYPES_SCHEMA.format("2"))
+        # Verify
+        self.assertEqual(self._validate(self._valid_xml), 1)
+        xml_tools._VALIDATED_XML.clear()
+        self.assertEqual(self._validate(self._valid_xml), 0)
+
+    @unittest.skipUnless(_HAVE_VALIDATOR, "No XML validator is available")
+    def test_cache_miss_xml_file(self):
+        """Test that changing the XML file forces validation"""
+        # Setup
+        self.assertEqual(self._validate(self._valid_xml), 1)
+        # Exercise
+        write_file(self._valid_xml, _VALID_XML.replace("scheme_b", "scheme_c"))
+        # Verify
+        self.assertEqual(self._validate(self._valid_xml), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,9 +5,10 @@
 
  Assumptions:
 
- Command line arguments: build_dir database_filepath
+ Command line arguments: build_dir database_filepath [--instrument]
 
- Usage: python test_reports <build_dir> <database_filepath>
+ Usage: python test_reports <build_dir> <database_filepath> [--instrument]
+        (--instrument if the caps were generated with --instrument)
 -----------------------------------------------------------------------
 """
 import sys
@@ -34,15 +35,18 @@ from ccpp_datafile import datatable_report, DatatableReport
 
 def usage(errmsg=None):
     """Raise an exception with optional error message and usage message"""
-    emsg = "usage: {} <build_dir> <database_filepath>"
+    emsg = "usage: {} <build_dir> <database_filepath> [--instrument]"
     if errmsg:
         emsg = errmsg + '\n' + emsg
     # end if
     raise ValueError(emsg.format(sys.argv[0]))
 
-if len(sys.argv) != 3:
+if len(sys.argv) not in (3, 4):
     usage()
 # end if
+if (len(sys.argv) == 4) and (sys.argv[3] != "--instrument"):
+    usage(f"Unknown option, '{sys.argv[3]}'")
+# end if
 
 _BUILD_DIR = os.path.abspath(sys.argv[1])
 _DATABASE = os.path.abspath(sys.argv[2])
@@ -63,6 +67,9 @@ _UTILITY_FILES = [os.path.join(_BUILD_DIR, "ccpp", "ccpp_kinds.F90"),
                   os.path.join(_SRC_DIR, "ccpp_scheme_utils.F90"),
                   os.path.join(_SRC_DIR, "ccpp_hashable.F90"),
                   os.path.join(_SRC_DIR, "ccpp_hash_table.F90")]
+if len(sys.argv) == 4:
+    _UTILITY_FILES.append(os.path.join(_SRC_DIR, "ccpp_timing.F90"))
+# end if
 _CCPP_FILES = _UTILITY_FILES + \
               [os.path.join(_BUILD_DIR, "ccpp", "test_host_ccpp_cap.F90"),
                os.path.join(_BUILD_DIR, "ccpp", "ccpp_var_compatibility_suite_cap.F90")]
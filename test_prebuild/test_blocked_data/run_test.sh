@@ -1,11 +1,19 @@
 #!/usr/bin/env bash
 
-rm -fr build
-mkdir build
-../../scripts/ccpp_prebuild.py --debug --config=ccpp_prebuild_config.py --builddir=build
-cd build
-cmake .. 2>&1 | tee log.cmake
-make 2>&1 | tee log.make
-./test_blocked_data.x
-cd ..
-rm -fr build
+# Run the test with the default blocked data conversion and with persistent block buffers
+for prebuild_opts in "" "--persistent-block-buffers"; do
+  rm -fr build
+  mkdir build
+  ../../scripts/ccpp_prebuild.py --debug ${prebuild_opts} --config=ccpp_prebuild_config.py --builddir=build
+  cd build
+  cmake .. 2>&1 | tee log.cmake
+  make 2>&1 | tee log.make
+  ./test_blocked_data.x
+  res=$?
+  cd ..
+  rm -fr build
+  if [ $res -ne 0 ]; then
+    echo "test_blocked_data failed with prebuild options '${prebuild_opts}'"
+    exit $res
+  fi
+done
@@ -55,3 +55,88 @@ def test_MetadataTable_parse_table(tmpdir):
     (im_data,) = metadata_section.variable_list()
     assert isinstance(im_data, Var)
     assert im_data.get_dimensions() == []
+
+
+def test_parse_metadata_tables_jobs():
+    """Parsing variable definition files in parallel gives the same result as a
+    serial parse, also for DDTs that are defined in an earlier file"""
+    from ccpp_prebuild import gather_variable_definitions
+
+    test_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            os.pardir, "test_blocked_data")
+    variable_definition_files = [os.path.join(test_dir, os.pardir, os.pardir, "src", "ccpp_types.F90"),
+                                 os.path.join(test_dir, "data.F90")]
+    cwd = os.getcwd()
+
+    results = []
+    for jobs in [1, 2]:
+        (success, metadata, dependencies) = gather_variable_definitions(variable_definition_files,
+                                                                        None, jobs=jobs)
+        assert success
+        # The parser must not change the working directory
+        assert os.getcwd() == cwd
+        results.append(({key : [(var.local_name, var.container) for var in metadata[key]]
+                          for key in metadata.keys()}, dependencies))
+    assert results[0] == results[1]
+
+
+def test_metadata_cache(tmpdir):
+    """A metadata file is parsed once and then retrieved from the on-disk cache
+    (also by later runs) until it is modified"""
+    from metadata_parser import parse_new_metadata_file, set_metadata_cache_dir
+
+    path = str(tmpdir.join("table.meta"))
+    with open(path, "w") as f:
+        f.write(example_table)
+    cache_dir = str(tmpdir.join("cache"))
+
+    try:
+        set_metadata_cache_dir(cache_dir)
+        first = parse_new_metadata_file(path)
+        assert os.listdir(cache_dir)
+        # A later run finds the cached parse
+        set_metadata_cache_dir(cache_dir)
+        second = parse_new_metadata_file(path)
+        assert second is not first
+        assert [x.table_name for x in second] == [x.table_name for x in first]
+        # A modified file is parsed again
+        with open(path, "w") as f:
+            f.write(example_table.replace("<name>", "<new_name>"))
+        third = parse_new_metadata_file(path)
+        assert [x.table_name for x in third] == ["<new_name>"]
+    finally:
+        set_metadata_cache_dir(None)
+
+
+def test_merge_dictionaries_reports_all_mismatches():
+    """Merging metadata dictionaries accepts compatible character lengths
+    and reports all incompatible entries at once"""
+    import mkcap
+    from metadata_parser import merge_dictionaries
+
+    def var(standard_name, type, kind, container):
+        return mkcap.Var(standard_name=standard_name, local_name=standard_name,
+                         long_name='', units='1', type=type, dimensions=[],
+                         rank='', kind=kind, intent='in', active='T',
+                         container=container)
+
+    x = {'a' : [var('a', 'character', 'len=*', 'x')],
+         'b' : [var('b', 'real', 'kind_phys', 'x')],
+         'c' : [var('c', 'integer', '', 'x')]}
+    y = {'a' : [var('a', 'character', 'len=64', 'y')],
+         'c' : [var('c', 'integer', '', 'y')]}
+    z = merge_dictionaries(x, y)
+    assert list(z.keys()) == ['a', 'b', 'c']
+    assert [v.container for v in z['a']] == ['x', 'y']
+    assert [v.container for v in z['c']] == ['x', 'y']
+
+    y = {'a' : [var('a', 'character', 'len=32', 'y')],
+         'b' : [var('b', 'real', 'kind_dyn', 'y')],
+         'c' : [var('c', 'real', '', 'y')]}
+    try:
+        merge_dictionaries(z, y)
+    except Exception as e:
+        message = str(e)
+    else:
+        assert False, "Incompatible entries not reported"
+    assert message.count('Incompatible entries') == 3